@@ -49,6 +49,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'tabla.middleware.InstrumentacionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -79,14 +80,84 @@ WSGI_APPLICATION = 'debateApp.wsgi.application'
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
+# Con DATABASE_URL (p. ej. PostgreSQL en Render) se usan conexiones persistentes
+# con chequeo de salud; con DB_POOL=1, el pool de psycopg 3 (requiere
+# `psycopg[binary,pool]`). Sin DATABASE_URL, SQLite local ajustado para que
+# varias cargas de votos simultáneas esperen su turno en vez de fallar con
+# "database is locked".
+
+if 'DATABASE_URL' in os.environ:
+    import dj_database_url
+
+    DATABASES = {
+        'default': dj_database_url.config(
+            conn_max_age=int(os.environ.get('DB_CONN_MAX_AGE', 600)),
+            conn_health_checks=True,
+        )
+    }
+    if os.environ.get('DB_POOL') == '1' and DATABASES['default']['ENGINE'] == 'django.db.backends.postgresql':
+        # El pool reemplaza a las conexiones persistentes (Django no admite ambos)
+        DATABASES['default']['CONN_MAX_AGE'] = 0
+        DATABASES['default'].setdefault('OPTIONS', {})['pool'] = {
+            'min_size': int(os.environ.get('DB_POOL_MIN', 2)),
+            'max_size': int(os.environ.get('DB_POOL_MAX', 10)),
+            'timeout': 10,
+        }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': BASE_DIR / 'db.sqlite3',
+            'OPTIONS': {
+                # Esperar hasta 20 s un bloqueo en lugar de fallar enseguida
+                'timeout': 20,
+                # Tomar el bloqueo de escritura al empezar la transacción: evita
+                # el "database is locked" inmediato al pasar de lectura a escritura
+                'transaction_mode': 'IMMEDIATE',
+                'init_command': (
+                    'PRAGMA journal_mode=WAL;'        # lectores no bloquean al escritor
+                    'PRAGMA synchronous=NORMAL;'      # seguro con WAL, menos fsync
+                    'PRAGMA mmap_size=134217728;'     # 128 MB mapeados en memoria
+                    'PRAGMA temp_store=MEMORY;'
+                    'PRAGMA cache_size=-20000;'       # ~20 MB de caché de páginas
+                ),
+            },
+        }
+    }
+
+
+# Cache
+# Memoria local por proceso (LRU) salvo que se configure REDIS_URL.
 
-DATABASES = {
+CACHES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-        }
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'debateapp',
+        'OPTIONS': {'MAX_ENTRIES': 2000},
+    }
 }
 
+if 'REDIS_URL' in os.environ:
+    CACHES['default'] = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.environ['REDIS_URL'],
+    }
+
+# Tabla de posiciones en caché (ver tabla/cache.py)
+TABLA_CACHE_ALIAS = 'default'
+TABLA_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Páginas públicas (tabla, cuadro y eliminatorias sin login): segundos que
+# pueden reutilizarlas el navegador y un proxy inverso / CDN (s-maxage).
+# Django las invalida solo; el proxy las sirve a lo sumo s-maxage de más.
+TABLA_PUBLICO_MAX_AGE = 10
+TABLA_PUBLICO_S_MAXAGE = 30
+
+
+# El formulario de resultados de una ronda envía 3 campos por equipo
+# (1.000 equipos = 3.000 campos); el límite por defecto de Django es 1.000.
+DATA_UPLOAD_MAX_NUMBER_FIELDS = 20000
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -139,3 +210,53 @@ STATIC_ROOT = BASE_DIR / 'staticfiles'
 
 # Whitenoise para servir static en Render
 MIDDLEWARE.insert(1, 'whitenoise.middleware.WhiteNoiseMiddleware')
+
+# Emparejamiento BP (ver tabla/emparejamiento.py)
+TABLA_MOTOR_EMPAREJAMIENTO = 'tabla.emparejamiento.MotorOptimo'
+TABLA_EMPAREJAMIENTO_PRESUPUESTO = 0.5  # segundos; si se excede se usa el greedy
+
+# Eventos en vivo (SSE). El backend de memoria reparte dentro del proceso;
+# con varios workers o el worker de trabajos hace falta Redis (ver tabla/eventos.py).
+TABLA_EVENTOS_BACKEND = 'tabla.eventos.BackendMemoria'
+if 'REDIS_URL' in os.environ:
+    TABLA_EVENTOS_BACKEND = 'tabla.eventos.BackendRedis'
+    TABLA_EVENTOS_REDIS_URL = os.environ['REDIS_URL']
+
+# Trabajos pesados (emparejar, cerrar ronda, eliminatorias; ver tabla/trabajos.py).
+# Por defecto corren en línea, dentro del request. Con TABLA_TRABAJOS_EN_LINEA=0
+# los toma el worker del Procfile (manage.py procesar_trabajos): activarlo solo
+# donde ese worker corre y comparte la base (DATABASE_URL; un SQLite local no se
+# comparte entre servicios).
+TABLA_TRABAJOS_EN_LINEA = os.environ.get('TABLA_TRABAJOS_EN_LINEA', '1') == '1'
+TABLA_TRABAJOS_VENCIMIENTO = 60  # segundos sin latido para dar por caído a un worker
+
+# Instrumentación por request (tabla/middleware.py): Server-Timing + log estructurado.
+# Presupuesto de consultas por nombre de URL ('*' = resto), medido y con ~50% de
+# margen; no depende del tamaño del torneo (ver CostoConstanteTests).
+TABLA_PRESUPUESTO_CONSULTAS = {
+    'ronda_view': 60,       # carga de toda la ronda + cierre en línea: 41
+    'eliminatorias': 45,    # armar una fase: 29
+    'sala_votos': 45,       # una sala: 15; la última además cierra la ronda
+    'torneo_tabla': 10,     # 4-5
+    'api_tabla': 10,
+    'api_cuadro': 10,
+    'api_estado': 10,       # 5-6
+    '*': 60,
+}
+# 'raise' corta la respuesta cuando la vista ya confirmó sus escrituras: solo
+# para desarrollo (y tests, con override_settings). Desplegado, siempre 'log'.
+TABLA_PRESUPUESTO_ACCION = os.environ.get('TABLA_PRESUPUESTO_ACCION', 'log') if DEBUG else 'log'
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'tabla': {
+            'handlers': ['console'],
+            'level': os.environ.get('TABLA_LOG_LEVEL', 'WARNING' if DEBUG else 'INFO'),
+        },
+    },
+}
@@ -34,14 +34,41 @@ urlpatterns = [
 
     # Rondas + pantallas
     path('torneo/<int:torneo_id>/tabla/', tv.torneo_tabla, name='torneo_tabla'),
+    path('torneo/<int:torneo_id>/oradores/', tv.torneo_oradores, name='torneo_oradores'),
+    path('torneo/<int:torneo_id>/break/', tv.torneo_break, name='torneo_break'),
     path('torneo/<int:torneo_id>/ronda/<int:num>/', tv.ronda_view, name='ronda_view'),
+    path('torneo/<int:torneo_id>/ronda/<int:num>/reabrir/', tv.ronda_reabrir, name='ronda_reabrir'),
+    path('torneo/<int:torneo_id>/sala/<int:sala_id>/votos/', tv.sala_votos, name='sala_votos'),
     path('torneo/<int:torneo_id>/entre/<int:num>/', tv.entre_rondas, name='entre_rondas'),
+    # Trabajos en cola (emparejar, cerrar, eliminatorias): pantalla de espera
+    path('torneo/<int:torneo_id>/trabajo/<int:trabajo_id>/', tv.trabajo_estado, name='trabajo_estado'),
 
     # Eliminatorias
     path('torneo/<int:torneo_id>/eliminatorias/', tv.eliminatorias_view, name='eliminatorias'),
 
+    # Exportación: recurso = tabla | salas | resultados ; formato = csv | ndjson
+    path('torneo/<int:torneo_id>/exportar/<slug:recurso>.<slug:formato>', tv.torneo_exportar,
+         name='torneo_exportar'),
+
+    # Páginas públicas (sin login, en caché; solo torneos con `publico`)
+    path('publico/torneo/<int:torneo_id>/tabla/', tv.publico_tabla, name='publico_tabla'),
+    path('publico/torneo/<int:torneo_id>/cuadro/', tv.publico_cuadro, name='publico_cuadro'),
+    path('publico/torneo/<int:torneo_id>/eliminatorias/', tv.publico_eliminatorias,
+         name='publico_eliminatorias'),
+
     # API REST – ubicación del torneo
     path('api/torneos/<int:torneo_id>/ubicacion/', tv.torneo_ubicacion_api,
          name='torneo_ubicacion_api'),
+    # Torneos cercanos a un punto o dentro de un rectángulo lat/lng
+    path('api/torneos/cerca/', tv.api_torneos_cerca, name='api_torneos_cerca'),
+    path('api/torneos/zona/', tv.api_torneos_zona, name='api_torneos_zona'),
+
+    # API JSON para pantallas / clientes móviles (responde 304 si nada cambió)
+    path('api/torneos/<int:torneo_id>/tabla/', tv.api_tabla, name='api_tabla'),
+    path('api/torneos/<int:torneo_id>/cuadro/', tv.api_cuadro, name='api_cuadro'),
+    path('api/torneos/<int:torneo_id>/estado/', tv.api_estado, name='api_estado'),
+    path('api/trabajos/<int:trabajo_id>/', tv.api_trabajo, name='api_trabajo'),
+    # Eventos en vivo (Server-Sent Events): cuadro, resultados, tabla
+    path('api/torneos/<int:torneo_id>/eventos/', tv.torneo_eventos, name='torneo_eventos'),
 ]
 
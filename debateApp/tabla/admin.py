@@ -1,41 +1,152 @@
 # tabla/admin.py
 from django.contrib import admin
-from .models import Torneo, Equipo, Debatiente, Ronda, Sala, SalaEquipo, ResultadoSala
+from django.core.paginator import Paginator
+from django.utils.functional import cached_property
+
+from .models import Torneo, Equipo, Debatiente, Ronda, Sala, SalaEquipo, ResultadoSala, EventoResultado, Trabajo
+
+# Más allá de esto el admin no cuenta filas: se llega al resto filtrando o buscando
+TOPE_CONTEO = 10000
+# Torneos que se ofrecen en el filtro lateral (no se cargan todos)
+TORNEOS_EN_FILTRO = 10
+
+
+class PaginadorSinConteo(Paginator):
+    """
+    Cuenta a lo sumo TOPE_CONTEO filas (COUNT sobre un subquery con LIMIT):
+    el costo de una página no crece con el tamaño de la tabla.
+    """
+
+    @cached_property
+    def count(self):
+        return self.object_list[:TOPE_CONTEO].count()
+
+
+def filtro_torneo(campo: str):
+    """Filtro lateral por torneo (`campo` es la ruta al FK) con solo los más recientes."""
+
+    class FiltroTorneo(admin.SimpleListFilter):
+        title = 'torneo'
+        parameter_name = 'torneo'
+
+        def lookups(self, request, model_admin):
+            recientes = Torneo.objects.order_by('-creado', '-id')[:TORNEOS_EN_FILTRO]
+            opciones = [(str(pk), nombre) for pk, nombre in recientes.values_list('pk', 'nombre')]
+            # El elegido sigue visible aunque ya no esté entre los recientes
+            elegido = self.value()
+            if elegido and elegido.isdigit() and elegido not in {pk for pk, _ in opciones}:
+                opciones += [(str(pk), nombre) for pk, nombre in
+                             Torneo.objects.filter(pk=elegido).values_list('pk', 'nombre')]
+            return opciones
+
+        def queryset(self, request, queryset):
+            if self.value() and self.value().isdigit():
+                return queryset.filter(**{campo: self.value()})
+            return queryset
+
+    return FiltroTorneo
+
+
+class AdminTabla(admin.ModelAdmin):
+    """
+    Base de los admins: cada página cuesta un número fijo de consultas.
+    `list_select_related` cubre lo que recorren list_display y __str__;
+    también se aplica fuera del changelist (autocompletado, edición).
+    """
+    paginator = PaginadorSinConteo
+    show_full_result_count = False
+    ordering = ('-pk',)  # el del changelist; también lo usa el autocompletado
+
+    def get_queryset(self, request):
+        qs = super().get_queryset(request)
+        if isinstance(self.list_select_related, (list, tuple)) and self.list_select_related:
+            qs = qs.select_related(*self.list_select_related)
+        return qs
+
 
 @admin.register(Torneo)
-class TorneoAdmin(admin.ModelAdmin):
+class TorneoAdmin(AdminTabla):
     list_display = ('nombre', 'responsable', 'n_rondas', 'n_clasificados', 'cerrado', 'ganador')
     list_filter = ('cerrado',)
+    list_select_related = ('ganador',)
     search_fields = ('nombre', 'responsable')
+    autocomplete_fields = ('ganador',)
 
 @admin.register(Equipo)
-class EquipoAdmin(admin.ModelAdmin):
+class EquipoAdmin(AdminTabla):
     list_display = ('nombre', 'torneo', 'es_swing', 'puntos', 'speakers_total', 'speakers_prom')
-    list_filter = ('torneo', 'es_swing')
+    list_filter = (filtro_torneo('torneo'), 'es_swing')
+    list_select_related = ('torneo',)
     search_fields = ('nombre',)
+    autocomplete_fields = ('torneo',)
 
 @admin.register(Debatiente)
-class DebatienteAdmin(admin.ModelAdmin):
+class DebatienteAdmin(AdminTabla):
     list_display = ('nombre', 'equipo')
-    list_filter = ('equipo__torneo',)
+    list_filter = (filtro_torneo('equipo__torneo'),)
+    list_select_related = ('equipo',)
     search_fields = ('nombre', 'equipo__nombre')
+    autocomplete_fields = ('equipo',)
 
 @admin.register(Ronda)
-class RondaAdmin(admin.ModelAdmin):
+class RondaAdmin(AdminTabla):
     list_display = ('torneo', 'numero', 'emparejada', 'cerrada')
-    list_filter = ('torneo', 'emparejada', 'cerrada')
+    list_filter = (filtro_torneo('torneo'), 'emparejada', 'cerrada')
+    list_select_related = ('torneo',)
+    search_fields = ('torneo__nombre',)
+    autocomplete_fields = ('torneo',)
 
 @admin.register(Sala)
-class SalaAdmin(admin.ModelAdmin):
+class SalaAdmin(AdminTabla):
     list_display = ('nombre', 'ronda')
-    list_filter = ('ronda__torneo',)
+    list_filter = (filtro_torneo('ronda__torneo'),)
+    list_select_related = ('ronda__torneo',)
+    search_fields = ('nombre', 'ronda__torneo__nombre')
+    autocomplete_fields = ('ronda',)
 
 @admin.register(SalaEquipo)
-class SalaEquipoAdmin(admin.ModelAdmin):
+class SalaEquipoAdmin(AdminTabla):
     list_display = ('sala', 'equipo', 'posicion')
-    list_filter = ('sala__ronda__torneo', 'posicion')
+    list_filter = (filtro_torneo('sala__ronda__torneo'), 'posicion')
+    list_select_related = ('sala__ronda__torneo', 'equipo')
+    search_fields = ('equipo__nombre', 'sala__nombre')
+    autocomplete_fields = ('sala', 'equipo')
 
 @admin.register(ResultadoSala)
-class ResultadoSalaAdmin(admin.ModelAdmin):
+class ResultadoSalaAdmin(AdminTabla):
     list_display = ('sala_equipo', 'ranking', 'puntos', 'orador1', 'orador2')
-    list_filter = ('sala_equipo__sala__ronda__torneo', 'ranking')
+    list_filter = (filtro_torneo('sala_equipo__sala__ronda__torneo'), 'ranking')
+    list_select_related = ('sala_equipo__sala__ronda__torneo', 'sala_equipo__equipo')
+    autocomplete_fields = ('sala_equipo',)
+
+    # Editar acá no toca la tabla: en rondas cerradas se corrige desde la sala
+    # (services.corregir_votos_sala), que aplica el delta a los equipos
+    def has_change_permission(self, request, obj=None):
+        if obj is not None and obj.sala_equipo.sala.ronda.cerrada:
+            return False
+        return super().has_change_permission(request, obj)
+
+@admin.register(EventoResultado)
+class EventoResultadoAdmin(AdminTabla):
+    list_display = ('creado', 'torneo', 'ronda', 'equipo', 'tipo', 'ranking', 'orador1', 'orador2', 'usuario')
+    list_filter = ('tipo', filtro_torneo('torneo'))
+    list_select_related = ('torneo', 'ronda__torneo', 'equipo', 'usuario')
+    date_hierarchy = 'creado'
+
+    # La bitácora es append-only
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+@admin.register(Trabajo)
+class TrabajoAdmin(AdminTabla):
+    list_display = ('id', 'torneo', 'ronda', 'accion', 'estado', 'intentos', 'worker', 'latido', 'actualizado')
+    list_filter = ('estado', 'accion', filtro_torneo('torneo'))
+    list_select_related = ('torneo', 'ronda__torneo')
+    readonly_fields = ('worker', 'latido', 'iniciado', 'resultado')
+    autocomplete_fields = ('torneo', 'ronda')
@@ -1,6 +1,25 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
+
+
+def _limite_variables_sqlite(sender, connection, **kwargs):
+    """
+    Django 5.1 supone 999 variables por consulta en SQLite y parte los
+    bulk_create en lotes de 999 // columnas filas: la cantidad de consultas
+    crecería con el torneo. Se usa el límite real de la biblioteca (32766
+    desde SQLite 3.32).
+    """
+    if connection.vendor != 'sqlite' or not hasattr(connection.connection, 'getlimit'):
+        return
+    import sqlite3
+
+    connection.features.max_query_params = connection.connection.getlimit(sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER)
 
 
 class TablaConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'tabla'
+
+    def ready(self):
+        from . import signals  # noqa: F401 - registra los receptores
+        connection_created.connect(_limite_variables_sqlite, dispatch_uid='tabla_limite_variables_sqlite')
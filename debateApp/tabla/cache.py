@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+from collections import namedtuple
+from typing import Callable, List
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Avg, Count, F, StdDev, Sum
+from django.utils import timezone
+
+from .models import PuntajeOrador, TablaRonda, Torneo
+
+# Orden oficial de la tabla
+ORDEN_TABLA = ('-puntos', '-speakers_total', '-speakers_prom', 'id')
+
+# Fila compacta de la tabla (en caché se guarda como tupla simple)
+FilaTabla = namedtuple('FilaTabla', 'id nombre es_swing puntos speakers_total speakers_prom')
+FilaOrador = namedtuple('FilaOrador', 'id nombre equipo es_swing total promedio desvio rondas')
+
+
+def _cache():
+    return caches[getattr(settings, 'TABLA_CACHE_ALIAS', 'default')]
+
+
+def _timeout() -> int:
+    return getattr(settings, 'TABLA_CACHE_TIMEOUT', 60 * 60 * 24)
+
+
+def clave_tabla(torneo: Torneo) -> str:
+    return f'tabla:{torneo.pk}:{torneo.version_tabla}'
+
+
+def tabla_torneo(torneo: Torneo) -> List[FilaTabla]:
+    """
+    Tabla de posiciones del torneo, ordenada.
+    Se guarda en caché por (torneo, version_tabla): mientras no se cierre una
+    ronda ni se editen equipos, no se consulta la tabla Equipo.
+    """
+    cache = _cache()
+    clave = clave_tabla(torneo)
+    filas = cache.get(clave)
+    if filas is None:
+        filas = tuple(
+            torneo.equipos.order_by(*ORDEN_TABLA).values_list(*FilaTabla._fields)
+        )
+        cache.set(clave, filas, _timeout())
+    return list(map(FilaTabla._make, filas))
+
+
+def tabla_tras_ronda(torneo: Torneo, numero: int) -> List[FilaTabla]:
+    """
+    La tabla como quedó al cerrar la ronda `numero`, desde las fotos de
+    TablaRonda: una consulta por rango de tablaronda_orden_idx, ya ordenada.
+    También en caché por (torneo, version_tabla): reabrir una ronda la invalida.
+    """
+    cache = _cache()
+    clave = f'{clave_tabla(torneo)}:r{numero}'
+    filas = cache.get(clave)
+    if filas is None:
+        filas = tuple(
+            TablaRonda.objects.filter(torneo=torneo, numero=numero)
+            .order_by('-puntos_total', '-speakers_total', '-speakers_prom', 'equipo')
+            .values_list(
+                'equipo', 'equipo__nombre', 'equipo__es_swing',
+                'puntos_total', 'speakers_total', 'speakers_prom',
+            )
+        )
+        cache.set(clave, filas, _timeout())
+    return list(map(FilaTabla._make, filas))
+
+
+def clave_oradores(torneo: Torneo) -> str:
+    return f'oradores:{torneo.pk}:{torneo.version_tabla}'
+
+
+def tabla_oradores(torneo: Torneo) -> List[FilaOrador]:
+    """
+    Tabla de oradores de las rondas clasificatorias cerradas: total, promedio, desvío
+    estándar y rondas habladas por debatiente, en una consulta agrupada.
+    Se guarda en caché por (torneo, version_tabla), igual que tabla_torneo.
+    """
+    cache = _cache()
+    clave = clave_oradores(torneo)
+    filas = cache.get(clave)
+    if filas is None:
+        filas = tuple(
+            PuntajeOrador.objects
+            .filter(
+                resultado__sala_equipo__sala__ronda__torneo=torneo,
+                resultado__sala_equipo__sala__ronda__numero__lte=torneo.n_rondas,
+                resultado__sala_equipo__sala__ronda__cerrada=True,
+            )
+            .values('debatiente')
+            .annotate(
+                total=Sum('puntaje'), promedio=Avg('puntaje'),
+                desvio=StdDev('puntaje'), rondas=Count('id'),
+            )
+            .order_by('-total', '-promedio', 'debatiente')
+            .values_list(
+                'debatiente', 'debatiente__nombre', 'debatiente__equipo__nombre',
+                'debatiente__equipo__es_swing', 'total', 'promedio', 'desvio', 'rondas',
+            )
+        )
+        cache.set(clave, filas, _timeout())
+    return list(map(FilaOrador._make, filas))
+
+
+def marcar_cambio(torneo_id: int, tabla: bool = False) -> None:
+    """
+    Registra que algo del torneo cambió (cuadro, resultados, estado de rondas).
+    Con `tabla=True` además incrementa la versión de la tabla de posiciones.
+    Es la base de los ETag / Last-Modified de la API y de la clave de las
+    páginas públicas.
+    """
+    cambios = {'actualizado': timezone.now()}
+    if tabla:
+        cambios['version_tabla'] = F('version_tabla') + 1
+    Torneo.objects.filter(pk=torneo_id).update(**cambios)
+
+
+def invalidar_tabla(torneo_id: int) -> None:
+    """
+    Incrementa la versión de la tabla del torneo. Las entradas viejas de la
+    caché quedan huérfanas y se desalojan solas (LRU).
+    """
+    marcar_cambio(torneo_id, tabla=True)
+
+
+# ------------------------- páginas públicas -------------------------
+
+def pagina_publica(clave: str, armar: Callable[[], str]) -> str:
+    """
+    HTML de una página pública; `armar()` solo corre si no está en caché.
+    `clave` incluye la marca del torneo en la base (version_tabla y
+    actualizado, ver views._etag_publica): cualquier cambio, hecho por
+    cualquier proceso, pasa por marcar_cambio y la renueva, así que la caché
+    no necesita ser compartida ni invalidarse.
+    """
+    cache = _cache()
+    clave = f'pagina:{clave}'
+    html = cache.get(clave)
+    if html is None:
+        html = armar()
+        cache.set(clave, html, _timeout())
+    return html
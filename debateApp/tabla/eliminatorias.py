@@ -0,0 +1,83 @@
+"""
+Cuadro de eliminatorias (break) precalculado.
+
+Con salas de 4 equipos y un ganador por sala, cada fase divide por 4 la
+cantidad de equipos: los clasificados deben ser 4, 16, 64, 256...
+
+- Fase 1: los clasificados se reparten en serpentina por su lugar en la tabla
+  (sala 1 = semillas 1, 2R, 2R+1, 4R), así las mejores semillas no se cruzan
+  hasta el final.
+- Fases siguientes: el ganador de la sala con llave i hereda la semilla i y se
+  reparte con la misma serpentina.
+
+Sala.llave guarda el lugar de cada sala en su fase; con eso avanzar a los
+ganadores es una búsqueda indexada y el orden es determinista.
+"""
+from __future__ import annotations
+
+from typing import List, NamedTuple, Tuple
+
+EQUIPOS_POR_SALA = 4
+POSICIONES = ['OG', 'OO', 'CG', 'CO']
+
+# Por salas de la fase: la final es una sala, la semifinal las 4 que la alimentan...
+_NOMBRES_FASE = {1: 'Final', 4: 'Semifinal', 16: 'Cuartos', 64: 'Octavos'}
+
+
+class Fase(NamedTuple):
+    nombre: str
+    equipos: int
+    # Por sala (en orden de llave): semillas que entran a la sala
+    salas: List[Tuple[int, ...]]
+
+
+def nombre_fase(n_equipos: int) -> str:
+    return _NOMBRES_FASE.get(n_equipos // EQUIPOS_POR_SALA, 'Eliminatoria')
+
+
+def validar_clasificados(n: int) -> None:
+    """ValueError si `n` no es 4·4^k (4, 16, 64, ...)."""
+    k = n
+    while k > EQUIPOS_POR_SALA and k % EQUIPOS_POR_SALA == 0:
+        k //= EQUIPOS_POR_SALA
+    if k != EQUIPOS_POR_SALA:
+        abajo = EQUIPOS_POR_SALA
+        while abajo * EQUIPOS_POR_SALA <= n:
+            abajo *= EQUIPOS_POR_SALA
+        raise ValueError(
+            'Los clasificados deben ser 4, 16, 64 o 256… '
+            '(cada sala de eliminatoria tiene 4 equipos y avanza solo el ganador). '
+            f'Los más cercanos a {n}: {abajo} o {abajo * EQUIPOS_POR_SALA}.'
+        )
+
+
+def serpentina(n_equipos: int) -> List[Tuple[int, ...]]:
+    """Semillas 1..n repartidas en n/4 salas; en cada sala, de mejor a peor semilla."""
+    n_salas = n_equipos // EQUIPOS_POR_SALA
+    salas = [[] for _ in range(n_salas)]
+    for i in range(n_equipos):
+        fila, col = divmod(i, n_salas)
+        salas[col if fila % 2 == 0 else n_salas - 1 - col].append(i + 1)
+    return [tuple(s) for s in salas]
+
+
+def planificar(n_clasificados: int) -> List[Fase]:
+    """Todas las fases del break, de la primera a la final."""
+    validar_clasificados(n_clasificados)
+    fases, n = [], n_clasificados
+    while n >= EQUIPOS_POR_SALA:
+        fases.append(Fase(nombre_fase(n), n, serpentina(n)))
+        n //= EQUIPOS_POR_SALA
+    return fases
+
+
+def asignar(fase: Fase, por_semilla: List[int]) -> List[Tuple[str, List[Tuple[int, str]]]]:
+    """
+    Salas listas para services._materializar_salas: `por_semilla[i]` es el
+    equipo con semilla i+1 (clasificado i+1 o ganador de la llave i+1).
+    """
+    return [
+        (f'{fase.nombre} {llave}',
+         [(por_semilla[s - 1], POSICIONES[p]) for p, s in enumerate(semillas)])
+        for llave, semillas in enumerate(fase.salas, start=1)
+    ]
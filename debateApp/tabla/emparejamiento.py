@@ -0,0 +1,154 @@
+"""
+Motores de emparejamiento BP.
+
+Trabajan sobre arreglos compactos de enteros, sin tocar modelos:
+  - `puntos`: array con los puntos de cada equipo, en orden de ranking actual.
+  - `historial`: array plano de 4*n con cuántas veces estuvo cada equipo en
+    cada posición (índices 0..3 = OG, OO, CG, CO).
+
+Devuelven una lista de salas; cada sala es [(indice_equipo, indice_posicion), ...].
+El motor se elige con settings.TABLA_MOTOR_EMPAREJAMIENTO (ruta con puntos).
+"""
+from __future__ import annotations
+
+import logging
+import time
+from array import array
+from typing import List, Tuple
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+Salas = List[List[Tuple[int, int]]]
+
+MOTOR_POR_DEFECTO = 'tabla.emparejamiento.MotorOptimo'
+
+
+class PresupuestoAgotado(Exception):
+    """El motor superó su presupuesto de tiempo."""
+
+
+class MotorGreedy:
+    """
+    Power-pairing clásico: bloques consecutivos de 4 y posiciones
+    rotando por número de ronda.
+    """
+    usa_historial = False
+
+    def emparejar(self, puntos: array, historial: array, numero_ronda: int) -> Salas:
+        n = len(puntos)
+        rot = (numero_ronda - 1) % 4
+        return [
+            [(i + j, (rot + j) % 4) for j in range(min(4, n - i))]
+            for i in range(0, n, 4)
+        ]
+
+
+class MotorOptimo:
+    """
+    Las salas son las del MotorGreedy: bloques consecutivos de 4 en el orden de
+    la tabla, arrastres incluidos. Eso no se negocia. Dentro de cada sala, las
+    posiciones se reparten con el algoritmo húngaro para balancear el historial
+    OG/OO/CG/CO: ocupar una posición cuesta 2·h + 1 (lo que aumenta la suma de
+    cuadrados del historial, h = veces que el equipo ya estuvo ahí). A igual
+    costo se respeta la rotación del greedy.
+
+    Si se excede el presupuesto de tiempo, cae al MotorGreedy.
+    """
+    usa_historial = True
+
+    def __init__(self, presupuesto: float | None = None):
+        if presupuesto is None:
+            presupuesto = getattr(settings, 'TABLA_EMPAREJAMIENTO_PRESUPUESTO', 0.5)
+        self.presupuesto = presupuesto
+
+    def emparejar(self, puntos: array, historial: array, numero_ronda: int) -> Salas:
+        if len(puntos) % 4:
+            # No debería pasar: los swings completan múltiplo de 4
+            return MotorGreedy().emparejar(puntos, historial, numero_ronda)
+        try:
+            return self._emparejar(puntos, historial, numero_ronda,
+                                   time.perf_counter() + self.presupuesto)
+        except PresupuestoAgotado:
+            logger.warning(
+                "Emparejamiento óptimo excedió %.2fs con %d equipos; se usa el greedy.",
+                self.presupuesto, len(puntos),
+            )
+            return MotorGreedy().emparejar(puntos, historial, numero_ronda)
+
+    def _emparejar(self, puntos: array, historial: array, numero_ronda: int, limite: float) -> Salas:
+        rot = (numero_ronda - 1) % 4
+        salas: Salas = []
+        for base in range(0, len(puntos), 4):
+            # Filas: los 4 equipos de la sala; columnas: OG, OO, CG, CO.
+            # Costo ×4 para que el desempate (0 o 1 por equipo) nunca lo supere.
+            costo = array('l', (
+                4 * (2 * historial[4 * (base + j) + p] + 1) + (p != (rot + j) % 4)
+                for j in range(4) for p in range(4)
+            ))
+            asignacion = _hungaro(costo, 4)
+            salas.append(sorted(((base + j, p) for j, p in enumerate(asignacion)), key=lambda x: x[1]))
+
+            if time.perf_counter() > limite:
+                raise PresupuestoAgotado
+        return salas
+
+
+def _hungaro(costo: array, n: int) -> List[int]:
+    """
+    Asignación de costo mínimo sobre una matriz n×n plana (algoritmo húngaro,
+    O(n³), con potenciales). Devuelve la columna asignada a cada fila.
+    """
+    inf = float('inf')
+    u = [0] * (n + 1)
+    v = [0] * (n + 1)
+    p = [0] * (n + 1)
+    camino = [0] * (n + 1)
+    for i in range(1, n + 1):
+        p[0] = i
+        j0 = 0
+        minv = [inf] * (n + 1)
+        usado = [False] * (n + 1)
+        while True:
+            usado[j0] = True
+            i0 = p[j0]
+            fila = (i0 - 1) * n - 1
+            ui0 = u[i0]
+            delta = inf
+            j1 = 0
+            for j in range(1, n + 1):
+                if not usado[j]:
+                    cur = costo[fila + j] - ui0 - v[j]
+                    if cur < minv[j]:
+                        minv[j] = cur
+                        camino[j] = j0
+                    if minv[j] < delta:
+                        delta = minv[j]
+                        j1 = j
+            for j in range(n + 1):
+                if usado[j]:
+                    u[p[j]] += delta
+                    v[j] -= delta
+                else:
+                    minv[j] -= delta
+            j0 = j1
+            if p[j0] == 0:
+                break
+        while True:
+            j1 = camino[j0]
+            p[j0] = p[j1]
+            j0 = j1
+            if not j0:
+                break
+    asignacion = [0] * n
+    for j in range(1, n + 1):
+        asignacion[p[j] - 1] = j - 1
+    return asignacion
+
+
+def obtener_motor():
+    """Instancia el motor configurado en settings.TABLA_MOTOR_EMPAREJAMIENTO."""
+    ruta = getattr(settings, 'TABLA_MOTOR_EMPAREJAMIENTO', MOTOR_POR_DEFECTO)
+    return import_string(ruta)()
@@ -0,0 +1,168 @@
+"""
+Pub/sub de eventos de torneo para el endpoint SSE (Server-Sent Events).
+
+Los servicios publican al confirmarse la transacción (cuadro publicado,
+avance de resultados, tabla actualizada) y cada conexión SSE es una cola
+asyncio barata: un solo worker ASGI sostiene miles de suscriptores ociosos.
+
+El backend es intercambiable (settings.TABLA_EVENTOS_BACKEND):
+- BackendMemoria solo reparte dentro del proceso. Sirve con un único proceso
+  web y trabajos en línea; lo que publique otro proceso (un segundo worker
+  web, `procesar_trabajos`) no llega.
+- BackendRedis reparte entre procesos por Pub/Sub de Redis (settings lo elige
+  si hay REDIS_URL).
+
+El stream SSE solo tiene sentido bajo ASGI: con WSGI o runserver cada
+conexión abierta ocupa un hilo para siempre (ver views.torneo_eventos).
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import threading
+import time
+from collections import defaultdict
+from functools import lru_cache
+from typing import AsyncIterator
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+BACKEND_POR_DEFECTO = 'tabla.eventos.BackendMemoria'
+
+
+class Suscripcion:
+    __slots__ = ('cola', 'loop')
+
+    def __init__(self, maximo: int = 64):
+        self.cola: asyncio.Queue = asyncio.Queue(maxsize=maximo)
+        self.loop = asyncio.get_running_loop()
+
+    def _entregar(self, evento: dict) -> None:
+        try:
+            self.cola.put_nowait(evento)
+        except asyncio.QueueFull:
+            pass  # cliente lento: los eventos son avisos de estado, alcanza con el próximo
+
+    async def siguiente(self, timeout: float) -> dict:
+        return await asyncio.wait_for(self.cola.get(), timeout)
+
+
+class BackendMemoria:
+    """Reparte eventos a las suscripciones del proceso actual (thread-safe)."""
+
+    def __init__(self):
+        self._canales = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def suscribir(self, canal: str) -> Suscripcion:
+        sub = Suscripcion()
+        with self._lock:
+            self._canales[canal].add(sub)
+        return sub
+
+    def desuscribir(self, canal: str, sub: Suscripcion) -> None:
+        with self._lock:
+            subs = self._canales.get(canal)
+            if subs is not None:
+                subs.discard(sub)
+                if not subs:
+                    del self._canales[canal]
+
+    def hay_suscriptores(self, canal: str) -> bool:
+        return bool(self._canales.get(canal))
+
+    def publicar(self, canal: str, evento: dict) -> None:
+        with self._lock:
+            subs = list(self._canales.get(canal, ()))
+        for sub in subs:
+            # Se puede publicar desde el hilo de una vista síncrona
+            sub.loop.call_soon_threadsafe(sub._entregar, evento)
+
+
+class BackendRedis(BackendMemoria):
+    """
+    Publica en Redis (canal PREFIJO + canal) y cada proceso reparte lo que
+    recibe a sus suscripciones locales desde un hilo de escucha, que se
+    levanta con la primera suscripción. Requiere el paquete `redis` y
+    settings.TABLA_EVENTOS_REDIS_URL.
+    """
+    PREFIJO = 'tabla:eventos:'
+
+    def __init__(self):
+        super().__init__()
+        import redis  # dependencia opcional, como la caché con REDIS_URL
+
+        self._redis = redis.Redis.from_url(settings.TABLA_EVENTOS_REDIS_URL)
+        self._escucha = None
+
+    def suscribir(self, canal: str) -> Suscripcion:
+        with self._lock:
+            if self._escucha is None:
+                self._escucha = threading.Thread(target=self._escuchar, name='eventos-redis', daemon=True)
+                self._escucha.start()
+        return super().suscribir(canal)
+
+    def _escuchar(self) -> None:
+        while True:
+            try:
+                pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+                pubsub.psubscribe(self.PREFIJO + '*')
+                for mensaje in pubsub.listen():
+                    canal = mensaje['channel'].decode()[len(self.PREFIJO):]
+                    super().publicar(canal, json.loads(mensaje['data']))
+            except Exception:  # noqa: BLE001 - Redis caído: reintentar sin matar el hilo
+                logger.exception('Se perdió la escucha de eventos en Redis; reintentando')
+                time.sleep(1)
+
+    def hay_suscriptores(self, canal: str) -> bool:
+        # Los suscriptores pueden estar en otro proceso: publicar siempre es barato
+        return True
+
+    def publicar(self, canal: str, evento: dict) -> None:
+        self._redis.publish(self.PREFIJO + canal, json.dumps(evento, ensure_ascii=False))
+
+
+@lru_cache(maxsize=None)
+def obtener_backend():
+    ruta = getattr(settings, 'TABLA_EVENTOS_BACKEND', BACKEND_POR_DEFECTO)
+    return import_string(ruta)()
+
+
+def canal_torneo(torneo_id: int) -> str:
+    return f'torneo:{torneo_id}'
+
+
+def hay_suscriptores(torneo_id: int) -> bool:
+    return obtener_backend().hay_suscriptores(canal_torneo(torneo_id))
+
+
+def publicar(torneo_id: int, tipo: str, datos: dict) -> None:
+    """Publica el evento cuando (y si) se confirma la transacción actual."""
+    evento = {'tipo': tipo, 'datos': datos}
+    transaction.on_commit(
+        lambda: obtener_backend().publicar(canal_torneo(torneo_id), evento)
+    )
+
+
+async def flujo_sse(torneo_id: int, latido: float = 15.0) -> AsyncIterator[str]:
+    """Genera el stream text/event-stream de un torneo hasta que el cliente corta."""
+    backend = obtener_backend()
+    canal = canal_torneo(torneo_id)
+    sub = backend.suscribir(canal)
+    try:
+        yield 'retry: 3000\n\n'
+        while True:
+            try:
+                evento = await sub.siguiente(latido)
+            except asyncio.TimeoutError:
+                yield ': latido\n\n'  # mantiene viva la conexión detrás de proxies
+                continue
+            datos = json.dumps(evento['datos'], ensure_ascii=False)
+            yield f"event: {evento['tipo']}\ndata: {datos}\n\n"
+    finally:
+        backend.desuscribir(canal, sub)
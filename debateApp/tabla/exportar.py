@@ -0,0 +1,127 @@
+"""
+Exportación en streaming (CSV / NDJSON) de tabla, cuadros y resultados.
+
+Cada recurso es una lista de columnas y un queryset `values_list` que se
+recorre por bloques de CHUNK filas: la memoria no crece con el torneo y los
+primeros bytes salen apenas llega el primer bloque de filas.
+
+Bajo ASGI se usa `aexportar` (asíncrono): a un generador síncrono
+Django lo consume entero en memoria antes de empezar a enviarlo.
+"""
+from __future__ import annotations
+
+import csv
+import json
+from itertools import islice
+from typing import AsyncIterator, Callable, Iterator, Optional, Tuple
+
+from asgiref.sync import sync_to_async
+from django.db.models import QuerySet
+
+from .cache import ORDEN_TABLA
+from .models import Torneo, SalaEquipo, ResultadoSala
+
+CHUNK = 2000
+
+FORMATOS = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson',
+}
+
+
+# Cada recurso: (columnas, queryset values_list, si se antepone la posición 1..n)
+Recurso = Tuple[Tuple[str, ...], QuerySet, bool]
+
+
+def _tabla(torneo: Torneo) -> Recurso:
+    columnas = ('posicion', 'equipo_id', 'equipo', 'es_swing',
+                'puntos', 'speakers_total', 'speakers_prom')
+    filas = (
+        torneo.equipos
+        .order_by(*ORDEN_TABLA)
+        .values_list('id', 'nombre', 'es_swing', 'puntos', 'speakers_total', 'speakers_prom')
+    )
+    return columnas, filas, True
+
+
+def _salas(torneo: Torneo) -> Recurso:
+    columnas = ('ronda', 'sala_id', 'sala', 'posicion', 'equipo_id', 'equipo')
+    filas = (
+        SalaEquipo.objects
+        .filter(sala__ronda__torneo=torneo)
+        .order_by('sala__ronda__numero', 'sala_id', 'posicion')
+        .values_list(
+            'sala__ronda__numero', 'sala_id', 'sala__nombre',
+            'posicion', 'equipo_id', 'equipo__nombre',
+        )
+    )
+    return columnas, filas, False
+
+
+def _resultados(torneo: Torneo) -> Recurso:
+    columnas = ('ronda', 'sala_id', 'sala', 'posicion', 'equipo_id', 'equipo',
+                'ranking', 'puntos', 'orador1', 'orador2')
+    filas = (
+        ResultadoSala.objects
+        .filter(sala_equipo__sala__ronda__torneo=torneo)
+        .order_by('sala_equipo__sala__ronda__numero', 'sala_equipo__sala_id', 'sala_equipo__posicion')
+        .values_list(
+            'sala_equipo__sala__ronda__numero', 'sala_equipo__sala_id',
+            'sala_equipo__sala__nombre', 'sala_equipo__posicion',
+            'sala_equipo__equipo_id', 'sala_equipo__equipo__nombre',
+            'ranking', 'puntos', 'orador1', 'orador2',
+        )
+    )
+    return columnas, filas, False
+
+
+RECURSOS = {
+    'tabla': _tabla,
+    'salas': _salas,
+    'resultados': _resultados,
+}
+
+
+class _Eco:
+    """Pseudo-archivo: csv.writer escribe y devolvemos la línea tal cual."""
+    def write(self, valor):
+        return valor
+
+
+def _formato(formato: str, columnas) -> Tuple[Optional[str], Callable[[tuple], str]]:
+    """(encabezado o None, función fila -> línea) del formato pedido."""
+    if formato == 'csv':
+        escritor = csv.writer(_Eco())
+        return escritor.writerow(columnas), escritor.writerow
+    return None, lambda fila: json.dumps(dict(zip(columnas, fila)), ensure_ascii=False) + '\n'
+
+
+def exportar(torneo: Torneo, recurso: str, formato: str) -> Iterator[str]:
+    """Generador de líneas del recurso en el formato pedido."""
+    columnas, filas, numerar = RECURSOS[recurso](torneo)
+    encabezado, linea = _formato(formato, columnas)
+    if encabezado is not None:
+        yield encabezado
+    for i, fila in enumerate(filas.iterator(chunk_size=CHUNK), start=1):
+        yield linea((i, *fila) if numerar else fila)
+
+
+async def aexportar(torneo: Torneo, recurso: str, formato: str) -> AsyncIterator[str]:
+    """Como `exportar`, pero asíncrono: para StreamingHttpResponse bajo ASGI."""
+    columnas, filas, numerar = RECURSOS[recurso](torneo)
+    encabezado, linea = _formato(formato, columnas)
+    if encabezado is not None:
+        yield encabezado
+    # QuerySet.aiterator() de Django 5.1 ejecuta la consulta de un values_list
+    # en el contexto async (SynchronousOnlyOperation): se leen los bloques del
+    # iterador síncrono en el hilo de la base.
+    lector = filas.iterator(chunk_size=CHUNK)  # generador: consulta en el primer next()
+    siguiente_bloque = sync_to_async(lambda: list(islice(lector, CHUNK)))
+    i = 0
+    try:
+        while bloque := await siguiente_bloque():
+            for fila in bloque:
+                i += 1
+                yield linea((i, *fila) if numerar else fila)
+    finally:
+        await sync_to_async(lector.close)()
@@ -1,6 +1,7 @@
 from django import forms
 from django.forms import formset_factory
 from .models import Torneo, Equipo, Debatiente, ResultadoSala
+from .eliminatorias import validar_clasificados
 
 # ---- Torneo ----
 class TorneoForm(forms.ModelForm):
@@ -37,6 +38,13 @@ class EquiposSimpleForm(forms.Form):
 
 EquiposFormSet = formset_factory(EquiposSimpleForm, extra=0)
 
+# ---- Paso 2 (alternativa): archivo CSV/TSV con equipo, integrante1, integrante2 ----
+class ImportarEquiposForm(forms.Form):
+    archivo = forms.FileField(
+        label='Archivo CSV/TSV',
+        help_text='Una fila por equipo: nombre del equipo, integrante 1, integrante 2.',
+    )
+
 # (opcional) modelo de resultado si llegas a usarlo como form
 class ResultadoItemForm(forms.ModelForm):
     class Meta:
@@ -50,7 +58,7 @@ class TorneoForm(forms.ModelForm):
         fields = [
             'nombre', 'responsable',
             'n_equipos', 'n_clasificados', 'n_rondas',
-            'lugar_nombre', 'lugar_lat', 'lugar_lng',
+            'lugar_nombre', 'lugar_lat', 'lugar_lng', 'publico',
         ]
         labels = {
             'nombre': 'Nombre del torneo',
@@ -61,5 +69,18 @@ class TorneoForm(forms.ModelForm):
             'lugar_nombre': 'Lugar (nombre / sede)',
             'lugar_lat': 'Latitud',
             'lugar_lng': 'Longitud',
+            'publico': 'Publicar tabla y cuadro (sin login)',
         }
        
+
+    def clean_n_clasificados(self):
+        n = self.cleaned_data['n_clasificados']
+        if self.instance.pk and n == self.instance.n_clasificados:
+            # Torneos creados antes de esta validación: se pueden seguir editando
+            # sin tocar el campo; el break avisa al armarse (avanzar_eliminatorias)
+            return n
+        try:
+            validar_clasificados(n)
+        except ValueError as e:
+            raise forms.ValidationError(str(e))
+        return n
@@ -0,0 +1,131 @@
+"""
+Geohash y distancias para buscar torneos por ubicación, sin extensiones GIS.
+
+Cada torneo con coordenadas guarda su geohash (`Torneo.geocelda`, indexado):
+las celdas de un mismo prefijo son un rango contiguo del índice, así una zona
+se cubre con unos pocos `geocelda BETWEEN` (ver `rangos`). Lo que entra por
+la celda pero cae fuera de la zona lo descarta el filtro por lat/lng, y la
+distancia exacta (haversine) se calcula solo sobre esos candidatos.
+"""
+from __future__ import annotations
+
+import math
+from typing import List, Optional, Tuple
+
+BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+PRECISION = 9  # ~5 m: de sobra para una sede
+# Tope de celdas para cubrir una zona: se baja de precisión hasta no pasarlo
+MAX_CELDAS = 24
+RADIO_TIERRA_KM = 6371.0088
+KM_POR_GRADO = math.pi * RADIO_TIERRA_KM / 180
+
+# (sur, oeste, norte, este) en grados
+Zona = Tuple[float, float, float, float]
+
+
+def codificar(lat: Optional[float], lng: Optional[float], precision: int = PRECISION) -> str:
+    """Geohash de (lat, lng); '' si falta alguna coordenada."""
+    if lat is None or lng is None:
+        return ''
+    lat_min, lat_max, lng_min, lng_max = -90.0, 90.0, -180.0, 180.0
+    celda, bits, es_lng = [], 0, True
+    for i in range(precision * 5):
+        if es_lng:
+            medio = (lng_min + lng_max) / 2
+            bit = lng >= medio
+            lng_min, lng_max = (medio, lng_max) if bit else (lng_min, medio)
+        else:
+            medio = (lat_min + lat_max) / 2
+            bit = lat >= medio
+            lat_min, lat_max = (medio, lat_max) if bit else (lat_min, medio)
+        bits = bits * 2 + bit
+        es_lng = not es_lng
+        if i % 5 == 4:
+            celda.append(BASE32[bits])
+            bits = 0
+    return ''.join(celda)
+
+
+def tamano_celda(precision: int) -> Tuple[float, float]:
+    """(alto, ancho) en grados de una celda de `precision` caracteres."""
+    bits = precision * 5
+    return 180.0 / 2 ** (bits // 2), 360.0 / 2 ** ((bits + 1) // 2)
+
+
+def partir_antimeridiano(zona: Zona) -> List[Zona]:
+    """Una zona con oeste > este cruza el meridiano 180: se parte en dos."""
+    sur, oeste, norte, este = zona
+    if oeste <= este:
+        return [zona]
+    return [(sur, oeste, norte, 180.0), (sur, -180.0, norte, este)]
+
+
+def celdas(zona: Zona, max_celdas: int = MAX_CELDAS) -> List[str]:
+    """
+    Geohashes que cubren `zona` (que no cruza el antimeridiano), con la mayor
+    precisión que no pase de `max_celdas`. [] si ni con un carácter alcanza
+    (zona del tamaño del mundo: no hay nada que prefiltrar).
+    """
+    sur, oeste, norte, este = zona
+    for precision in range(PRECISION, 0, -1):
+        alto, ancho = tamano_celda(precision)
+        filas_max, columnas_max = round(180 / alto) - 1, round(360 / ancho) - 1
+        filas = range(min(int((sur + 90) // alto), filas_max),
+                      min(int((norte + 90) // alto), filas_max) + 1)
+        columnas = range(min(int((oeste + 180) // ancho), columnas_max),
+                         min(int((este + 180) // ancho), columnas_max) + 1)
+        if len(filas) * len(columnas) <= max_celdas:
+            # El centro de cada celda de la grilla da su geohash
+            return sorted({
+                codificar(-90 + (f + 0.5) * alto, -180 + (c + 0.5) * ancho, precision)
+                for f in filas for c in columnas
+            })
+    return []
+
+
+def rangos(zona: Zona, max_celdas: int = MAX_CELDAS) -> List[Tuple[str, str]]:
+    """
+    `celdas(zona)` como rangos [desde, hasta) de geocelda, juntando celdas
+    vecinas en el orden del índice.
+    """
+    resultado: List[Tuple[str, str]] = []
+    for celda in celdas(zona, max_celdas):
+        desde, hasta = celda, _siguiente(celda)
+        if resultado and resultado[-1][1] == desde:
+            resultado[-1] = (resultado[-1][0], hasta)
+        else:
+            resultado.append((desde, hasta))
+    return resultado
+
+
+def _siguiente(celda: str) -> str:
+    """El primer geohash (de cualquier largo) posterior a todos los que empiezan con `celda`."""
+    while celda and celda[-1] == BASE32[-1]:
+        celda = celda[:-1]
+    if not celda:
+        return '~'  # después de todo geohash
+    return celda[:-1] + BASE32[BASE32.index(celda[-1]) + 1]
+
+
+def zona_alrededor(lat: float, lng: float, radio_km: float) -> Zona:
+    """La zona lat/lng más chica que contiene el círculo de `radio_km` alrededor del punto."""
+    d_lat = radio_km / KM_POR_GRADO
+    sur, norte = max(lat - d_lat, -90.0), min(lat + d_lat, 90.0)
+    cos_lat = math.cos(math.radians(max(abs(sur), abs(norte))))
+    if sur == -90.0 or norte == 90.0 or cos_lat <= 0 or d_lat / cos_lat >= 180:
+        return sur, -180.0, norte, 180.0  # el círculo toca un polo: todas las longitudes
+    d_lng = d_lat / cos_lat
+    oeste, este = lng - d_lng, lng + d_lng
+    if oeste < -180:
+        oeste += 360
+    if este > 180:
+        este -= 360
+    return sur, oeste, norte, este
+
+
+def distancia_km(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    """Distancia sobre la esfera (haversine)."""
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    d_lat, d_lng = p2 - p1, math.radians(lng2 - lng1)
+    a = math.sin(d_lat / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(d_lng / 2) ** 2
+    return 2 * RADIO_TIERRA_KM * math.asin(min(1.0, math.sqrt(a)))
@@ -0,0 +1,67 @@
+"""
+Lectura de equipos desde CSV/TSV para la carga masiva (Paso 2).
+
+El archivo se recorre línea a línea (sin cargarlo entero) y se validan todas
+las filas antes de escribir: se devuelven juntos todos los errores.
+Formato por fila: nombre_equipo, integrante1, integrante2.
+"""
+from __future__ import annotations
+
+import csv
+import io
+from typing import List, Tuple
+
+MAX_NOMBRE = 120
+ENCABEZADOS = {'equipo', 'nombre', 'nombre_equipo', 'nombre del equipo', 'team'}
+
+FilaEquipo = Tuple[str, str, str]
+
+
+def _separador(muestra: str) -> str:
+    """El separador (tab, punto y coma o coma) más frecuente en la primera línea."""
+    primera = muestra.lstrip('\r\n').split('\n', 1)[0]
+    return max('\t;,', key=primera.count)
+
+
+def leer_equipos(archivo) -> Tuple[List[FilaEquipo], List[str]]:
+    """
+    Devuelve (filas, errores). Si hay errores, `filas` no debe usarse.
+    Acepta encabezado opcional, separador coma, punto y coma o tabulador.
+    """
+    texto = io.TextIOWrapper(archivo, encoding='utf-8-sig', newline='')
+    try:
+        muestra = texto.read(4096)
+        texto.seek(0)
+        lector = csv.reader(texto, delimiter=_separador(muestra))
+
+        filas: List[FilaEquipo] = []
+        errores: List[str] = []
+        vistos = {}
+        for linea, celdas in enumerate(lector, start=1):
+            celdas = [c.strip() for c in celdas]
+            while celdas and not celdas[-1]:
+                celdas.pop()
+            if not celdas:
+                continue
+            if linea == 1 and celdas[0].lower() in ENCABEZADOS:
+                continue
+            if len(celdas) != 3 or not all(celdas):
+                errores.append(f'Línea {linea}: se esperaban 3 columnas (equipo, integrante 1, integrante 2).')
+                continue
+            if any(len(c) > MAX_NOMBRE for c in celdas):
+                errores.append(f'Línea {linea}: los nombres no pueden superar {MAX_NOMBRE} caracteres.')
+                continue
+            clave = celdas[0].casefold()
+            if clave in vistos:
+                errores.append(f'Línea {linea}: el equipo "{celdas[0]}" ya aparece en la línea {vistos[clave]}.')
+                continue
+            vistos[clave] = linea
+            filas.append((celdas[0], celdas[1], celdas[2]))
+    except UnicodeDecodeError:
+        return [], ['El archivo debe estar codificado en UTF-8.']
+    finally:
+        texto.detach()
+
+    if not filas and not errores:
+        errores.append('El archivo no contiene equipos.')
+    return filas, errores
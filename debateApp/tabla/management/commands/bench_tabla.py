@@ -0,0 +1,142 @@
+"""
+Benchmark de servicios y vistas sobre torneos sintéticos.
+
+    python manage.py bench_tabla --equipos 16 64 256 1000 2000 --salida bench.json
+    python manage.py bench_tabla --comparar bench_anterior.json
+
+Corre sobre una base de prueba temporal (nunca sobre la base real) y guarda,
+por cada paso, el tiempo de pared y la cantidad de consultas SQL.
+"""
+import json
+import platform
+import random
+import subprocess
+from datetime import datetime, timezone
+
+import django
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from tabla.medicion import ContadorConsultas
+from tabla.services import (
+    cerrar_ronda_y_actualizar_tabla,
+    generar_emparejamientos,
+    guardar_resultados,
+    salas_con_participaciones,
+)
+from tabla.sintetico import crear_torneo_sintetico, post_votos, votos_aleatorios
+
+
+class Command(BaseCommand):
+    help = 'Mide emparejamiento, carga de votos, cierre de ronda y tablas sobre torneos sintéticos.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--equipos', type=int, nargs='+', default=[16, 64, 256, 1000, 2000])
+        parser.add_argument('--rondas', type=int, default=3)
+        parser.add_argument('--semilla', type=int, default=0)
+        parser.add_argument('--salida', default='bench_tabla.json')
+        parser.add_argument('--comparar', help='JSON de una corrida anterior para comparar.')
+
+    def handle(self, *args, **opts):
+        setup_test_environment()
+        nombre_original = connection.creation.create_test_db(
+            verbosity=0, autoclobber=True, serialize=False
+        )
+        try:
+            resultados = []
+            for n in opts['equipos']:
+                resultados += self._medir_torneo(n, opts['rondas'], opts['semilla'])
+        finally:
+            connection.creation.destroy_test_db(nombre_original, verbosity=0)
+            teardown_test_environment()
+
+        informe = {
+            'fecha': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'commit': _commit_actual(),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'base': connection.vendor,
+            'semilla': opts['semilla'],
+            'resultados': resultados,
+        }
+        with open(opts['salida'], 'w', encoding='utf-8') as f:
+            json.dump(informe, f, indent=2, ensure_ascii=False)
+        self.stdout.write(self.style.SUCCESS(f"Resultados guardados en {opts['salida']}"))
+
+        if opts['comparar']:
+            with open(opts['comparar'], encoding='utf-8') as f:
+                self._comparar(json.load(f)['resultados'], resultados)
+
+    # ------------------------------------------------------------------
+
+    def _medir_torneo(self, n_equipos, n_rondas, semilla):
+        rnd = random.Random(semilla * 100003 + n_equipos)
+        n_clasificados = min(16, n_equipos - n_equipos % 4)
+        torneo = crear_torneo_sintetico(n_equipos, n_rondas, n_clasificados, semilla)
+        user, _ = User.objects.get_or_create(username='bench')
+        client = Client()
+        client.force_login(user)
+        filas = []
+
+        def medir(paso, funcion, ronda=None):
+            with ContadorConsultas() as c:
+                respuesta = funcion()
+            if hasattr(respuesta, 'status_code') and respuesta.status_code >= 400:
+                raise RuntimeError(f'{paso}: HTTP {respuesta.status_code}')
+            filas.append({
+                'equipos': n_equipos, 'paso': paso, 'ronda': ronda,
+                'segundos': round(c.segundos, 6), 'consultas': c.consultas,
+            })
+            self.stdout.write(
+                f'{n_equipos:>6} equipos  {paso:<32} r{ronda or "-"}  '
+                f'{c.segundos * 1000:9.1f} ms  {c.consultas:>5} consultas'
+            )
+
+        url_ronda = f'/torneo/{torneo.id}/ronda/%d/'
+        for ronda in torneo.rondas.order_by('numero'):
+            num = ronda.numero
+            medir('generar_emparejamientos', lambda: generar_emparejamientos(ronda), num)
+            medir('ronda_view GET', lambda: client.get(url_ronda % num), num)
+            paquetes = salas_con_participaciones(ronda)
+            if num < n_rondas:
+                datos = post_votos(paquetes, rnd)
+                medir('ronda_view POST', lambda: client.post(url_ronda % num, datos), num)
+            else:
+                valores = votos_aleatorios(paquetes, rnd)
+                medir('guardar_resultados', lambda: guardar_resultados(ronda, valores), num)
+                medir('cerrar_ronda_y_actualizar_tabla',
+                      lambda: cerrar_ronda_y_actualizar_tabla(ronda), num)
+
+        cache.clear()
+        medir('torneo_tabla GET (caché fría)', lambda: client.get(f'/torneo/{torneo.id}/tabla/'))
+        medir('torneo_tabla GET (caché caliente)', lambda: client.get(f'/torneo/{torneo.id}/tabla/'))
+        medir('eliminatorias_view', lambda: client.get(f'/torneo/{torneo.id}/eliminatorias/'))
+        return filas
+
+    def _comparar(self, anteriores, actuales):
+        previo = {(r['equipos'], r['paso'], r['ronda']): r for r in anteriores}
+        self.stdout.write('\nComparación (actual / anterior):')
+        for r in actuales:
+            a = previo.get((r['equipos'], r['paso'], r['ronda']))
+            if not a or not a['segundos']:
+                continue
+            ratio = r['segundos'] / a['segundos']
+            estilo = self.style.ERROR if ratio > 1.25 else self.style.SUCCESS if ratio < 0.8 else str
+            self.stdout.write(estilo(
+                f"{r['equipos']:>6} {r['paso']:<32} r{r['ronda'] or '-'}  x{ratio:5.2f}  "
+                f"consultas {a['consultas']} -> {r['consultas']}"
+            ))
+
+
+def _commit_actual():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
@@ -0,0 +1,116 @@
+"""
+Prueba de carga: muchos POST de votos (ronda_view) en paralelo.
+
+    python manage.py carga_votos --torneos 40 --equipos 64 --hilos 8
+
+Cada hilo envía los votos de una ronda completa de un torneo distinto, así
+que todas las escrituras compiten por la misma base. Con SQLite compara la
+configuración de settings (WAL, timeout, transacciones IMMEDIATE) contra la
+de fábrica de Django (journal DELETE, timeout de 5 s, transacciones DEFERRED).
+
+Corre sobre una base de prueba temporal en disco, nunca sobre la real.
+"""
+import copy
+import os
+import random
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, connections
+from django.test import Client
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+
+from tabla.services import generar_emparejamientos, salas_con_participaciones
+from tabla.sintetico import crear_torneo_sintetico, post_votos
+
+# SQLite "de fábrica": lo que había antes de ajustar settings.DATABASES
+SQLITE_BASE = {'init_command': 'PRAGMA journal_mode=DELETE;'}
+
+
+class Command(BaseCommand):
+    help = 'Mide cuántos POST de votos por segundo soporta la base con escrituras concurrentes.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--torneos', type=int, default=40)
+        parser.add_argument('--equipos', type=int, default=64)
+        parser.add_argument('--hilos', type=int, default=8)
+        parser.add_argument('--semilla', type=int, default=0)
+
+    # Como el runner de tests: sin la página de error de DEBUG (que evalúa querysets)
+    @override_settings(DEBUG=False)
+    def handle(self, *args, **opts):
+        setup_test_environment()
+        try:
+            configuraciones = [('settings', None)]
+            if connection.vendor == 'sqlite':
+                configuraciones.insert(0, ('sqlite de fábrica', SQLITE_BASE))
+            for nombre, opciones in configuraciones:
+                r = self._medir(opciones, opts)
+                estilo = self.style.ERROR if r['errores'] else self.style.SUCCESS
+                self.stdout.write(estilo(
+                    f"{nombre:<18} {r['ok']:>4} ok  {r['errores']:>4} errores  "
+                    f"{r['segundos']:6.2f} s  {r['ok'] / r['segundos']:7.1f} POST/s"
+                ))
+                for mensaje in sorted(r['mensajes'])[:3]:
+                    self.stdout.write(f'    {mensaje}')
+        finally:
+            teardown_test_environment()
+
+    def _medir(self, opciones, opts):
+        ajustes = connections.settings[connection.alias]
+        original = copy.deepcopy(ajustes)
+        archivo = None
+        if connection.vendor == 'sqlite':
+            # Base en disco (la de prueba en memoria no se comparte entre hilos)
+            fd, archivo = tempfile.mkstemp(suffix='.sqlite3')
+            os.close(fd)
+            ajustes['TEST'] = {**ajustes.get('TEST', {}), 'NAME': archivo}
+            if opciones is not None:
+                ajustes['OPTIONS'] = opciones
+        nombre_original = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            user, _ = User.objects.get_or_create(username='carga')
+            rnd = random.Random(opts['semilla'])
+            trabajos = []
+            for _ in range(opts['torneos']):
+                torneo = crear_torneo_sintetico(opts['equipos'], 1, 4, opts['semilla'])
+                ronda = torneo.rondas.get()
+                generar_emparejamientos(ronda)
+                client = Client()
+                client.force_login(user)  # la sesión se crea fuera de la medición
+                url = f'/torneo/{torneo.id}/ronda/1/'
+                trabajos.append((client, url, post_votos(salas_con_participaciones(ronda), rnd)))
+            connections.close_all()  # cada hilo abre la suya con las OPTIONS a medir
+
+            def enviar(trabajo):
+                client, url, datos = trabajo
+                try:
+                    respuesta = client.post(url, datos)
+                    return respuesta.status_code < 400, f'HTTP {respuesta.status_code}'
+                except Exception as e:  # noqa: BLE001 - se informa al final
+                    return False, f'{type(e).__name__}: {e}'
+                finally:
+                    connections.close_all()
+
+            inicio = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=opts['hilos']) as pool:
+                resultados = list(pool.map(enviar, trabajos))
+            segundos = time.perf_counter() - inicio
+        finally:
+            connection.creation.destroy_test_db(nombre_original, verbosity=0)
+            ajustes.clear()
+            ajustes.update(original)
+            if archivo:
+                for sufijo in ('', '-wal', '-shm'):
+                    if os.path.exists(archivo + sufijo):
+                        os.remove(archivo + sufijo)
+
+        return {
+            'ok': sum(ok for ok, _ in resultados),
+            'errores': sum(not ok for ok, _ in resultados),
+            'segundos': segundos,
+            'mensajes': {m for ok, m in resultados if not ok},
+        }
@@ -0,0 +1,53 @@
+"""
+Worker de la cola de trabajos (ver tabla/trabajos.py).
+
+    python manage.py procesar_trabajos
+    python manage.py procesar_trabajos --una-vez   # vacía la cola y termina
+
+Se pueden correr varios a la vez: cada trabajo lo toma uno solo, y si un
+worker se cae otro retoma sus trabajos cuando vence el latido.
+"""
+import os
+import socket
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from tabla import trabajos
+
+
+class Command(BaseCommand):
+    help = 'Procesa los trabajos en cola (emparejar, cerrar rondas, eliminatorias).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--una-vez', action='store_true',
+                            help='Procesar lo que haya en la cola y terminar.')
+        parser.add_argument('--espera', type=float, default=1.0,
+                            help='Segundos entre consultas cuando la cola está vacía.')
+        parser.add_argument('--nombre', default=f'{socket.gethostname()}:{os.getpid()}')
+
+    def handle(self, *args, **opts):
+        nombre = opts['nombre']
+        self.stdout.write(f'Worker {nombre} esperando trabajos…')
+        try:
+            while True:
+                trabajo = trabajos.tomar(nombre)
+                if trabajo is None:
+                    if opts['una_vez']:
+                        return
+                    connection.close_if_unusable_or_obsolete()
+                    time.sleep(opts['espera'])
+                    continue
+
+                inicio = time.perf_counter()
+                with trabajos.latiendo(trabajo):
+                    trabajo = trabajos.ejecutar(trabajo)
+                estilo = self.style.SUCCESS if trabajo.estado == trabajo.HECHO else self.style.ERROR
+                self.stdout.write(estilo(
+                    f'{trabajo.pk:>6} {trabajo.accion:<14} R{trabajo.ronda_id:<6} '
+                    f'{trabajo.estado:<9} {time.perf_counter() - inicio:6.2f}s  {trabajo.mensaje}'
+                ))
+        except KeyboardInterrupt:
+            # Lo que estaba en curso se deshace; otro worker lo retoma al vencer el latido
+            self.stdout.write('Worker detenido.')
@@ -0,0 +1,76 @@
+"""
+Reconstruye los contadores de la tabla (puntos, speakers_total, speakers_prom)
+a partir de los ResultadoSala de las rondas cerradas.
+
+    python manage.py reconstruir_tabla                  # todos los torneos
+    python manage.py reconstruir_tabla --torneo 3 7     # solo algunos
+    python manage.py reconstruir_tabla --procesos 8 --dry-run
+
+Cada torneo se resuelve con una consulta agrupada; con --procesos > 1 los
+torneos se reparten entre procesos worker. Informa los equipos cuyos
+contadores guardados no coincidían.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+# Este módulo se importa también en los workers: nada de modelos a nivel módulo.
+
+
+def _inicializar_worker():
+    import django
+    from django.db import connections
+
+    django.setup()
+    connections.close_all()  # nunca compartir la conexión heredada del padre
+
+
+def _reconstruir(torneo_id, aplicar):
+    from tabla.services import reconstruir_agregados
+
+    return torneo_id, reconstruir_agregados(torneo_id, aplicar=aplicar)
+
+
+class Command(BaseCommand):
+    help = 'Recalcula los agregados de Equipo desde ResultadoSala e informa las diferencias.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--torneo', type=int, nargs='+', help='IDs de torneo (por defecto, todos).')
+        parser.add_argument('--procesos', type=int, default=os.cpu_count() or 1)
+        parser.add_argument('--dry-run', action='store_true', help='Solo informar, sin corregir.')
+
+    def handle(self, *args, **opts):
+        from django.db import connections
+        from tabla.models import Torneo
+
+        torneos = Torneo.objects.order_by('id')
+        if opts['torneo']:
+            torneos = torneos.filter(id__in=opts['torneo'])
+        ids = list(torneos.values_list('id', flat=True))
+        aplicar = not opts['dry_run']
+        procesos = max(1, min(opts['procesos'], len(ids)))
+
+        if procesos == 1:
+            resultados = (_reconstruir(t, aplicar) for t in ids)
+            self._informar(resultados, aplicar, len(ids))
+            return
+
+        connections.close_all()  # antes de forkear
+        with ProcessPoolExecutor(max_workers=procesos, initializer=_inicializar_worker) as pool:
+            self._informar(pool.map(_reconstruir, ids, [aplicar] * len(ids)), aplicar, len(ids))
+
+    def _informar(self, resultados, aplicar, n_torneos):
+        total = 0
+        for torneo_id, derivas in resultados:
+            total += len(derivas)
+            for d in derivas:
+                self.stdout.write(
+                    f'Torneo {torneo_id} · {d.nombre} (id {d.equipo_id}): '
+                    f'puntos {d.guardado[0]} -> {d.calculado[0]}, '
+                    f'speakers {d.guardado[1]} -> {d.calculado[1]}, '
+                    f'promedio {d.guardado[2]:.2f} -> {d.calculado[2]:.2f}'
+                )
+        verbo = 'corregidos' if aplicar else 'con diferencias (sin corregir)'
+        estilo = self.style.WARNING if total else self.style.SUCCESS
+        self.stdout.write(estilo(f'{n_torneos} torneos revisados, {total} equipos {verbo}.'))
@@ -0,0 +1,42 @@
+"""
+Probabilidad de break de cada equipo (Monte Carlo, ver tabla/simulacion.py).
+
+    python manage.py simular_break 12
+    python manage.py simular_break 12 --simulaciones 50000 --semilla 7 --todos
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from tabla import simulacion
+from tabla.models import Torneo
+
+
+class Command(BaseCommand):
+    help = 'Simula las rondas clasificatorias que faltan e informa la probabilidad de break.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('torneo', type=int)
+        parser.add_argument('--simulaciones', type=int, default=simulacion.SIMULACIONES)
+        parser.add_argument('--semilla', type=int)
+        parser.add_argument('--todos', action='store_true',
+                            help='Listar también los equipos sin chances.')
+
+    def handle(self, *args, **opts):
+        if not simulacion.disponible():
+            raise CommandError('El simulador de break necesita NumPy (pip install numpy).')
+        try:
+            torneo = Torneo.objects.get(pk=opts['torneo'])
+        except Torneo.DoesNotExist:
+            raise CommandError(f"No existe el torneo {opts['torneo']}.")
+
+        r = simulacion.simular_break(torneo, opts['simulaciones'], opts['semilla'])
+        self.stdout.write(
+            f'{torneo.nombre}: {r.rondas_restantes} rondas restantes, '
+            f'{r.simulaciones} simulaciones, {r.segundos:.2f}s'
+        )
+        for puesto, (fila, prob) in enumerate(r.filas, start=1):
+            if prob == 0 and not opts['todos']:
+                continue
+            self.stdout.write(
+                f'{puesto:>4}  {fila.nombre:<40} {fila.puntos:>4} pts '
+                f'{fila.speakers_total:>6} spk  {prob * 100:6.2f} %'
+            )
@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+import time
+from contextlib import ExitStack
+from dataclasses import dataclass, field
+
+from django.db import connections
+
+
+@dataclass
+class ContadorConsultas:
+    """
+    Cuenta consultas SQL y mide su tiempo usando `execute_wrapper`.
+    Funciona con DEBUG=False (no depende de `connection.queries`).
+
+        with ContadorConsultas() as c:
+            ...
+        c.consultas, c.tiempo_sql, c.segundos, c.mas_lenta
+    """
+    alias: tuple = ()
+    consultas: int = 0
+    tiempo_sql: float = 0.0
+    mas_lenta: tuple = (0.0, '')
+    segundos: float = 0.0
+    _pila: ExitStack = field(default=None, repr=False)
+    _inicio: float = field(default=0.0, repr=False)
+
+    def __call__(self, execute, sql, params, many, context):
+        t0 = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            dur = time.perf_counter() - t0
+            self.consultas += 1
+            self.tiempo_sql += dur
+            if dur > self.mas_lenta[0]:
+                self.mas_lenta = (dur, sql)
+
+    def __enter__(self) -> 'ContadorConsultas':
+        self._pila = ExitStack()
+        for alias in (self.alias or connections):
+            self._pila.enter_context(connections[alias].execute_wrapper(self))
+        self._inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.segundos = time.perf_counter() - self._inicio
+        self._pila.close()
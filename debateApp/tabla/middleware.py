@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+import logging
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+
+from .medicion import ContadorConsultas
+
+logger = logging.getLogger('tabla.rendimiento')
+
+
+class PresupuestoConsultasExcedido(Exception):
+    """Una vista hizo más consultas que las permitidas en TABLA_PRESUPUESTO_CONSULTAS."""
+
+
+class InstrumentacionMiddleware:
+    """
+    Mide cada request: cantidad de consultas, tiempo total de SQL, consulta más
+    lenta, tiempo de la vista y tiempo total. Lo publica en la cabecera
+    `Server-Timing` y en una línea de log estructurada (logger tabla.rendimiento).
+
+    Presupuestos por vista (nombre de URL) en settings:
+        TABLA_PRESUPUESTO_CONSULTAS = {'ronda_view': 30, '*': 50}
+        TABLA_PRESUPUESTO_ACCION = 'log' | 'raise'
+
+    El control corre después de la vista, con sus escrituras ya confirmadas:
+    'raise' es para desarrollo y tests (settings.py lo ignora sin DEBUG).
+
+    Bajo ASGI corre en modo asíncrono (sin saltar de hilo por request); las
+    consultas se cuentan en el hilo de sync_to_async del request, que es
+    donde el ORM las ejecuta.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        inicio = time.perf_counter()
+        with ContadorConsultas() as medicion:
+            response = self.get_response(request)
+        return self._publicar(request, response, medicion, inicio)
+
+    async def __acall__(self, request):
+        inicio = time.perf_counter()
+        medicion = ContadorConsultas()
+        await sync_to_async(medicion.__enter__)()
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(medicion.__exit__)(None, None, None)
+        return self._publicar(request, response, medicion, inicio)
+
+    def _publicar(self, request, response, medicion: ContadorConsultas, inicio: float):
+        """Server-Timing, log estructurado y control del presupuesto de consultas."""
+        total = time.perf_counter() - inicio
+        vista = total - (getattr(request, '_inicio_vista', inicio) - inicio)
+
+        match = getattr(request, 'resolver_match', None)
+        nombre = match.url_name if match else None
+        response['Server-Timing'] = ', '.join([
+            f'db;dur={medicion.tiempo_sql * 1000:.1f};desc="{medicion.consultas} consultas"',
+            f'vista;dur={vista * 1000:.1f}',
+            f'total;dur={total * 1000:.1f}',
+        ])
+        datos = {
+            'metodo': request.method,
+            'ruta': request.path,
+            'vista': nombre,
+            'estado': response.status_code,
+            'consultas': medicion.consultas,
+            'sql_ms': round(medicion.tiempo_sql * 1000, 1),
+            'vista_ms': round(vista * 1000, 1),
+            'total_ms': round(total * 1000, 1),
+            'sql_mas_lenta_ms': round(medicion.mas_lenta[0] * 1000, 1),
+        }
+        logger.info(' '.join(f'{k}={v}' for k, v in datos.items()), extra=datos)
+
+        presupuestos = getattr(settings, 'TABLA_PRESUPUESTO_CONSULTAS', {})
+        limite = presupuestos.get(nombre, presupuestos.get('*'))
+        if limite is not None and medicion.consultas > limite:
+            mensaje = (
+                f'{nombre or request.path}: {medicion.consultas} consultas '
+                f'(presupuesto {limite}). Más lenta: {medicion.mas_lenta[1][:500]}'
+            )
+            if getattr(settings, 'TABLA_PRESUPUESTO_ACCION', 'log') == 'raise':
+                raise PresupuestoConsultasExcedido(mensaje)
+            logger.warning(mensaje, extra=datos)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request._inicio_vista = time.perf_counter()
+        return None
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.5 on 2026-10-17 01:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tabla', '0003_torneo_lugar_lat_torneo_lugar_lng_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='torneo',
+            name='version_tabla',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
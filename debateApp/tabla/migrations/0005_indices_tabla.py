@@ -0,0 +1,37 @@
+# Generated by Django 5.1.5 on 2026-10-17 01:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tabla', '0004_torneo_version_tabla'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='equipo',
+            index=models.Index(fields=['torneo', '-puntos', '-speakers_total', '-speakers_prom', 'id'], name='equipo_ranking_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='resultadosala',
+            index=models.Index(fields=['sala_equipo', 'ranking'], name='resultado_se_ranking_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ronda',
+            index=models.Index(fields=['torneo', 'numero'], name='ronda_torneo_numero_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ronda',
+            index=models.Index(fields=['torneo', 'cerrada', 'numero'], name='ronda_torneo_cerrada_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='salaequipo',
+            index=models.Index(fields=['sala', 'posicion', 'equipo'], name='salaequipo_sala_pos_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='salaequipo',
+            index=models.Index(fields=['equipo', 'sala'], name='salaequipo_equipo_sala_idx'),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.1.5 on 2026-10-17 02:10
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tabla', '0005_indices_tabla'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='torneo',
+            name='actualizado',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+    ]
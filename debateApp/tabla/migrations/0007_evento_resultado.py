@@ -0,0 +1,36 @@
+# Generated by Django 5.1.5 on 2026-10-17 01:23
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tabla', '0006_torneo_actualizado'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EventoResultado',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(choices=[('carga', 'Carga'), ('correccion', 'Corrección')], max_length=12)),
+                ('ranking', models.PositiveIntegerField()),
+                ('puntos', models.IntegerField()),
+                ('orador1', models.PositiveIntegerField()),
+                ('orador2', models.PositiveIntegerField()),
+                ('creado', models.DateTimeField(auto_now_add=True)),
+                ('equipo', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='eventos_resultado', to='tabla.equipo')),
+                ('ronda', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='eventos_resultado', to='tabla.ronda')),
+                ('sala_equipo', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='eventos', to='tabla.salaequipo')),
+                ('torneo', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='eventos_resultado', to='tabla.torneo')),
+                ('usuario', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['torneo', 'creado'], name='evento_torneo_creado_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.1.5 on 2026-10-17 01:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tabla', '0007_evento_resultado'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='sala',
+            name='llave',
+            field=models.PositiveSmallIntegerField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='sala',
+            index=models.Index(fields=['ronda', 'llave'], name='sala_ronda_llave_idx'),
+        ),
+    ]
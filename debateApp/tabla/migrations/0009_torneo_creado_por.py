@@ -0,0 +1,29 @@
+# Generated by Django 5.1.5 on 2026-10-17 01:29
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tabla', '0008_sala_llave'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='torneo',
+            name='creado_por',
+            field=models.ForeignKey(blank=True, db_index=False, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='torneos_creados', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='torneo',
+            index=models.Index(fields=['-creado', '-id'], name='torneo_creado_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='torneo',
+            index=models.Index(fields=['creado_por', '-creado', '-id'], name='torneo_autor_creado_idx'),
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.1.5 on 2026-10-17 01:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def vincular_oradores(apps, schema_editor):
+    """orador1/orador2 de cada ResultadoSala -> primer/segundo Debatiente (por id) del equipo."""
+    Debatiente = apps.get_model('tabla', 'Debatiente')
+    ResultadoSala = apps.get_model('tabla', 'ResultadoSala')
+    PuntajeOrador = apps.get_model('tabla', 'PuntajeOrador')
+
+    oradores = {}
+    for deb_id, equipo_id in Debatiente.objects.order_by('equipo_id', 'id').values_list('id', 'equipo_id'):
+        oradores.setdefault(equipo_id, []).append(deb_id)
+
+    lote = []
+    filas = ResultadoSala.objects.values_list('id', 'sala_equipo__equipo_id', 'orador1', 'orador2')
+    for res_id, equipo_id, or1, or2 in filas.iterator(chunk_size=2000):
+        for orden, (deb_id, puntaje) in enumerate(zip(oradores.get(equipo_id, []), (or1, or2)), start=1):
+            lote.append(PuntajeOrador(resultado_id=res_id, debatiente_id=deb_id, orden=orden, puntaje=puntaje))
+        if len(lote) >= 2000:
+            PuntajeOrador.objects.bulk_create(lote)
+            lote = []
+    PuntajeOrador.objects.bulk_create(lote)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tabla', '0009_torneo_creado_por'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PuntajeOrador',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('orden', models.PositiveSmallIntegerField()),
+                ('puntaje', models.PositiveIntegerField()),
+                ('debatiente', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='puntajes', to='tabla.debatiente')),
+                ('resultado', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='puntajes_orador', to='tabla.resultadosala')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['debatiente', 'puntaje'], name='puntaje_debatiente_idx')],
+                'unique_together': {('resultado', 'orden')},
+            },
+        ),
+        migrations.RunPython(vincular_oradores, migrations.RunPython.noop),
+    ]
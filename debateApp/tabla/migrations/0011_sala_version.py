@@ -0,0 +1,18 @@
+# Generated by Django 5.1.5 on 2026-10-17 01:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tabla', '0010_puntaje_orador'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='sala',
+            name='version',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.1.5 on 2026-10-17 01:42
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tabla', '0011_sala_version'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Trabajo',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('accion', models.CharField(choices=[('emparejar', 'Emparejar'), ('cerrar', 'Cerrar ronda'), ('eliminatorias', 'Eliminatorias')], max_length=16)),
+                ('estado', models.CharField(choices=[('pendiente', 'Pendiente'), ('en_curso', 'En curso'), ('hecho', 'Hecho'), ('error', 'Error')], default='pendiente', max_length=10)),
+                ('intentos', models.PositiveSmallIntegerField(default=0)),
+                ('worker', models.CharField(blank=True, max_length=100)),
+                ('latido', models.DateTimeField(blank=True, null=True)),
+                ('mensaje', models.TextField(blank=True)),
+                ('resultado', models.JSONField(blank=True, null=True)),
+                ('creado', models.DateTimeField(auto_now_add=True)),
+                ('iniciado', models.DateTimeField(blank=True, null=True)),
+                ('actualizado', models.DateTimeField(auto_now=True)),
+                ('ronda', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='trabajos', to='tabla.ronda')),
+                ('torneo', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='trabajos', to='tabla.torneo')),
+                ('usuario', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['estado', 'id'], name='trabajo_estado_idx')],
+                'unique_together': {('ronda', 'accion')},
+            },
+        ),
+    ]
@@ -0,0 +1,64 @@
+# Generated by Django 5.1.5 on 2026-10-17 01:47
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def tomar_fotos(apps, schema_editor):
+    """Fotos de las rondas ya cerradas, acumulando en orden de ronda dentro de cada torneo."""
+    Ronda = apps.get_model('tabla', 'Ronda')
+    ResultadoSala = apps.get_model('tabla', 'ResultadoSala')
+    TablaRonda = apps.get_model('tabla', 'TablaRonda')
+
+    rondas = Ronda.objects.filter(cerrada=True).order_by('torneo_id', 'numero')
+    acumulado, torneo_actual, lote = {}, None, []
+    for ronda_id, torneo_id, numero in rondas.values_list('id', 'torneo_id', 'numero'):
+        if torneo_id != torneo_actual:
+            acumulado, torneo_actual = {}, torneo_id
+        filas = ResultadoSala.objects.filter(sala_equipo__sala__ronda_id=ronda_id).values_list(
+            'sala_equipo__equipo_id', 'puntos', 'orador1', 'orador2'
+        )
+        for equipo_id, puntos, or1, or2 in filas:
+            pts, spk, debates = acumulado.get(equipo_id, (0, 0, 0))
+            pts, spk, debates = pts + puntos, spk + or1 + or2, debates + 1
+            acumulado[equipo_id] = (pts, spk, debates)
+            lote.append(TablaRonda(
+                torneo_id=torneo_id, ronda_id=ronda_id, numero=numero, equipo_id=equipo_id,
+                puntos=puntos, speakers=or1 + or2, puntos_total=pts, speakers_total=spk,
+                speakers_prom=spk / (2 * debates), debates=debates,
+            ))
+        if len(lote) >= 2000:
+            TablaRonda.objects.bulk_create(lote)
+            lote = []
+    TablaRonda.objects.bulk_create(lote)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tabla', '0012_trabajo'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TablaRonda',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('numero', models.PositiveIntegerField()),
+                ('puntos', models.IntegerField()),
+                ('speakers', models.IntegerField()),
+                ('puntos_total', models.IntegerField()),
+                ('speakers_total', models.IntegerField()),
+                ('speakers_prom', models.FloatField()),
+                ('debates', models.PositiveIntegerField()),
+                ('equipo', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tablas_ronda', to='tabla.equipo')),
+                ('ronda', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='tablas', to='tabla.ronda')),
+                ('torneo', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='tablas_ronda', to='tabla.torneo')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['torneo', 'numero', '-puntos_total', '-speakers_total', '-speakers_prom', 'equipo'], name='tablaronda_orden_idx')],
+                'unique_together': {('ronda', 'equipo')},
+            },
+        ),
+        migrations.RunPython(tomar_fotos, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.1.5 on 2026-10-17 01:53
+
+from django.conf import settings
+from django.db import migrations, models
+
+from tabla.geo import codificar
+
+
+def calcular_geoceldas(apps, schema_editor):
+    """Geocelda de los torneos que ya tenían coordenadas."""
+    Torneo = apps.get_model('tabla', 'Torneo')
+    lote = []
+    for torneo in Torneo.objects.exclude(lugar_lat=None).exclude(lugar_lng=None).only(
+        'lugar_lat', 'lugar_lng'
+    ).iterator():
+        torneo.geocelda = codificar(torneo.lugar_lat, torneo.lugar_lng)
+        lote.append(torneo)
+        if len(lote) >= 2000:
+            Torneo.objects.bulk_update(lote, ['geocelda'])
+            lote = []
+    Torneo.objects.bulk_update(lote, ['geocelda'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tabla', '0013_tablaronda'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='torneo',
+            name='geocelda',
+            field=models.CharField(blank=True, default='', editable=False, max_length=9),
+        ),
+        migrations.AddIndex(
+            model_name='torneo',
+            index=models.Index(fields=['geocelda', 'lugar_lat', 'lugar_lng'], name='torneo_geocelda_idx'),
+        ),
+        migrations.RunPython(calcular_geoceldas, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.5 on 2026-10-17 01:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tabla', '0014_torneo_geocelda'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='torneo',
+            name='publico',
+            field=models.BooleanField(default=False),
+        ),
+    ]
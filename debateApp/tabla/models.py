@@ -1,6 +1,9 @@
 # tabla/models.py
+from django.conf import settings
 from django.db import models
 
+from . import geo
+
 class Torneo(models.Model):
     nombre = models.CharField(max_length=120)
     responsable = models.CharField(max_length=120)
@@ -8,11 +11,27 @@ class Torneo(models.Model):
     n_clasificados = models.PositiveIntegerField()
     n_rondas = models.PositiveIntegerField()
     creado = models.DateTimeField(auto_now_add=True)
+    creado_por = models.ForeignKey(
+        settings.AUTH_USER_MODEL, null=True, blank=True, on_delete=models.SET_NULL,
+        related_name='torneos_creados', editable=False,
+        db_index=False,  # cubierto por torneo_autor_creado_idx
+    )
         # Ubicación del torneo
     lugar_nombre = models.CharField(max_length=200, blank=True)
     lugar_lat = models.FloatField(null=True, blank=True)
     lugar_lng = models.FloatField(null=True, blank=True)
+    # Geohash de (lugar_lat, lugar_lng), lo mantiene save(): búsqueda por zona (ver tabla/geo.py)
+    geocelda = models.CharField(max_length=geo.PRECISION, blank=True, default='', editable=False)
+
+
+    # Se incrementa cada vez que cambia la tabla (cierre de ronda, alta/edición/baja
+    # de equipos). Forma parte de la clave de la caché de posiciones.
+    version_tabla = models.PositiveIntegerField(default=0, editable=False)
+    # Último cambio de cualquier tipo (cuadro, resultados, rondas, equipos)
+    actualizado = models.DateTimeField(auto_now=True)
 
+    # Tabla, cuadro y eliminatorias visibles sin login (páginas en caché, ver views.publico_*)
+    publico = models.BooleanField(default=False)
 
     # Estado final
     cerrado = models.BooleanField(default=False)
@@ -21,6 +40,23 @@ class Torneo(models.Model):
         related_name='torneos_ganados'
     )
 
+    class Meta:
+        indexes = [
+            # Paginación por clave (creado, id) del panel de inicio
+            models.Index(fields=['-creado', '-id'], name='torneo_creado_idx'),
+            models.Index(fields=['creado_por', '-creado', '-id'], name='torneo_autor_creado_idx'),
+            # Torneos cercanos: rangos de geocelda y, dentro del índice, el recorte por lat/lng
+            models.Index(fields=['geocelda', 'lugar_lat', 'lugar_lng'], name='torneo_geocelda_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        # bulk_create y update() no pasan por acá: quien los use calcula geocelda
+        self.geocelda = geo.codificar(self.lugar_lat, self.lugar_lng)
+        campos = kwargs.get('update_fields')
+        if campos is not None and {'lugar_lat', 'lugar_lng'} & set(campos):
+            kwargs['update_fields'] = {*campos, 'geocelda'}
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return self.nombre
 
@@ -33,6 +69,15 @@ class Equipo(models.Model):
     speakers_total = models.IntegerField(default=0)
     speakers_prom = models.FloatField(default=0.0)
 
+    class Meta:
+        indexes = [
+            # Tabla de posiciones / emparejamiento (orden oficial, ver cache.ORDEN_TABLA)
+            models.Index(
+                fields=['torneo', '-puntos', '-speakers_total', '-speakers_prom', 'id'],
+                name='equipo_ranking_idx',
+            ),
+        ]
+
     def __str__(self):
         return self.nombre
 
@@ -51,6 +96,12 @@ class Ronda(models.Model):
     emparejada = models.BooleanField(default=False)
     cerrada = models.BooleanField(default=False)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['torneo', 'numero'], name='ronda_torneo_numero_idx'),
+            models.Index(fields=['torneo', 'cerrada', 'numero'], name='ronda_torneo_cerrada_idx'),
+        ]
+
     def __str__(self):
         return f'Ronda {self.numero} – {self.torneo.nombre}'
 
@@ -58,6 +109,15 @@ class Ronda(models.Model):
 class Sala(models.Model):
     ronda = models.ForeignKey(Ronda, on_delete=models.CASCADE, related_name='salas')
     nombre = models.CharField(max_length=120)
+    # Lugar de la sala en su fase de eliminatorias (ver tabla/eliminatorias.py)
+    llave = models.PositiveSmallIntegerField(null=True, blank=True)
+    # Control optimista de la carga por sala: sube con cada envío de votos
+    version = models.PositiveIntegerField(default=0, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['ronda', 'llave'], name='sala_ronda_llave_idx'),
+        ]
 
     def __str__(self):
         return self.nombre
@@ -70,6 +130,12 @@ class SalaEquipo(models.Model):
 
     class Meta:
         unique_together = (('sala', 'posicion'),)
+        indexes = [
+            # Cubre el cuadro de una sala ordenado por posición sin ir a la tabla
+            models.Index(fields=['sala', 'posicion', 'equipo'], name='salaequipo_sala_pos_idx'),
+            # Historial de un equipo (subconsultas del cierre, posiciones previas)
+            models.Index(fields=['equipo', 'sala'], name='salaequipo_equipo_sala_idx'),
+        ]
 
     def __str__(self):
         return f'{self.sala} - {self.equipo} ({self.posicion})'
@@ -84,5 +150,158 @@ class ResultadoSala(models.Model):
     orador1 = models.PositiveIntegerField()
     orador2 = models.PositiveIntegerField()
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['sala_equipo', 'ranking'], name='resultado_se_ranking_idx'),
+        ]
+
     def __str__(self):
         return f'{self.sala_equipo} -> {self.ranking}'
+
+
+class PuntajeOrador(models.Model):
+    """
+    Puntaje de un debatiente en un ResultadoSala (orden 1 = orador1, 2 = orador2).
+    Los oradores de un equipo se asignan por id de Debatiente: el primero es orador1.
+    """
+    resultado = models.ForeignKey(ResultadoSala, on_delete=models.CASCADE, related_name='puntajes_orador')
+    debatiente = models.ForeignKey(Debatiente, on_delete=models.CASCADE, related_name='puntajes')
+    orden = models.PositiveSmallIntegerField()  # 1 | 2
+    puntaje = models.PositiveIntegerField()
+
+    class Meta:
+        unique_together = (('resultado', 'orden'),)
+        indexes = [
+            models.Index(fields=['debatiente', 'puntaje'], name='puntaje_debatiente_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.debatiente.nombre}: {self.puntaje}'
+
+
+class TablaRonda(models.Model):
+    """
+    Foto de la tabla de un equipo al cerrar una ronda: lo que sumó en esa ronda
+    (puntos, speakers) y cómo quedó acumulado. La escribe en bloque el cierre
+    de ronda; con ella se muestra la tabla "tras la ronda N" y se reabre una
+    ronda restando solo su delta.
+    """
+    torneo = models.ForeignKey(
+        Torneo, on_delete=models.CASCADE, related_name='tablas_ronda',
+        db_index=False,  # cubierto por tablaronda_orden_idx
+    )
+    ronda = models.ForeignKey(
+        Ronda, on_delete=models.CASCADE, related_name='tablas',
+        db_index=False,  # cubierto por unique_together (ronda, equipo)
+    )
+    numero = models.PositiveIntegerField()  # = ronda.numero, para el rango por torneo
+    equipo = models.ForeignKey(Equipo, on_delete=models.CASCADE, related_name='tablas_ronda')
+    # Delta de la ronda
+    puntos = models.IntegerField()
+    speakers = models.IntegerField()
+    # Acumulado hasta la ronda (inclusive)
+    puntos_total = models.IntegerField()
+    speakers_total = models.IntegerField()
+    speakers_prom = models.FloatField()
+    debates = models.PositiveIntegerField()
+
+    class Meta:
+        unique_together = (('ronda', 'equipo'),)
+        indexes = [
+            # La tabla tras la ronda N ya ordenada (mismo orden que ORDEN_TABLA)
+            models.Index(
+                fields=['torneo', 'numero', '-puntos_total', '-speakers_total', '-speakers_prom', 'equipo'],
+                name='tablaronda_orden_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return f'R{self.numero} {self.equipo_id}: {self.puntos_total}'
+
+
+class EventoResultado(models.Model):
+    """
+    Bitácora append-only de votos: cada carga o corrección de un ResultadoSala
+    agrega una fila; nunca se editan. Permite auditar y reconstruir la tabla.
+    """
+    CARGA = 'carga'
+    CORRECCION = 'correccion'
+    TIPOS = [(CARGA, 'Carga'), (CORRECCION, 'Corrección')]
+
+    torneo = models.ForeignKey(Torneo, on_delete=models.CASCADE, related_name='eventos_resultado')
+    ronda = models.ForeignKey(Ronda, on_delete=models.CASCADE, related_name='eventos_resultado')
+    equipo = models.ForeignKey(Equipo, on_delete=models.CASCADE, related_name='eventos_resultado')
+    sala_equipo = models.ForeignKey(
+        SalaEquipo, null=True, on_delete=models.SET_NULL, related_name='eventos'
+    )
+    tipo = models.CharField(max_length=12, choices=TIPOS)
+    ranking = models.PositiveIntegerField()
+    puntos = models.IntegerField()
+    orador1 = models.PositiveIntegerField()
+    orador2 = models.PositiveIntegerField()
+    usuario = models.ForeignKey(
+        settings.AUTH_USER_MODEL, null=True, blank=True, on_delete=models.SET_NULL
+    )
+    creado = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['torneo', 'creado'], name='evento_torneo_creado_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValueError('EventoResultado es append-only: no se puede modificar.')
+        super().save(*args, **kwargs)
+
+    def __str__(self):
+        return f'{self.get_tipo_display()} R{self.ronda_id} {self.equipo_id} -> {self.ranking}'
+
+
+class Trabajo(models.Model):
+    """
+    Tarea pesada en cola (emparejar, cerrar ronda, armar eliminatorias; ver
+    tabla/trabajos.py). Hay uno por (ronda, accion): encolar dos veces
+    devuelve el mismo.
+    """
+    EMPAREJAR = 'emparejar'
+    CERRAR = 'cerrar'
+    ELIMINATORIAS = 'eliminatorias'
+    ACCIONES = [(EMPAREJAR, 'Emparejar'), (CERRAR, 'Cerrar ronda'), (ELIMINATORIAS, 'Eliminatorias')]
+
+    PENDIENTE = 'pendiente'
+    EN_CURSO = 'en_curso'
+    HECHO = 'hecho'
+    ERROR = 'error'
+    ESTADOS = [(PENDIENTE, 'Pendiente'), (EN_CURSO, 'En curso'), (HECHO, 'Hecho'), (ERROR, 'Error')]
+
+    torneo = models.ForeignKey(Torneo, on_delete=models.CASCADE, related_name='trabajos')
+    ronda = models.ForeignKey(Ronda, on_delete=models.CASCADE, related_name='trabajos')
+    accion = models.CharField(max_length=16, choices=ACCIONES)
+    estado = models.CharField(max_length=10, choices=ESTADOS, default=PENDIENTE)
+    intentos = models.PositiveSmallIntegerField(default=0)
+    # Quién lo está corriendo y cuándo dio señales de vida por última vez
+    worker = models.CharField(max_length=100, blank=True)
+    latido = models.DateTimeField(null=True, blank=True)
+    mensaje = models.TextField(blank=True)
+    resultado = models.JSONField(null=True, blank=True)
+    usuario = models.ForeignKey(
+        settings.AUTH_USER_MODEL, null=True, blank=True, on_delete=models.SET_NULL
+    )
+    creado = models.DateTimeField(auto_now_add=True)
+    iniciado = models.DateTimeField(null=True, blank=True)
+    actualizado = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = (('ronda', 'accion'),)
+        indexes = [
+            # Cola en orden de llegada y trabajos en curso (latidos vencidos)
+            models.Index(fields=['estado', 'id'], name='trabajo_estado_idx'),
+        ]
+
+    @property
+    def terminado(self) -> bool:
+        return self.estado in (self.HECHO, self.ERROR)
+
+    def __str__(self):
+        return f'{self.get_accion_display()} R{self.ronda_id} ({self.get_estado_display()})'
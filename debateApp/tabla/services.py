@@ -1,14 +1,28 @@
 from __future__ import annotations
 
-from collections import defaultdict
-from typing import List, Tuple
+import logging
+from array import array
+from datetime import datetime
+from typing import Dict, List, NamedTuple, Optional, Tuple
 
 from django.db import transaction
-from django.db.models import F
+from django.db.models import (
+    Case, Count, F, FloatField, IntegerField, OuterRef, Prefetch, Q, Subquery, Sum, Value, When,
+)
+from django.db.models.functions import Cast, Coalesce, Greatest
 
 from .models import (
-    Torneo, Equipo, Ronda, Sala, SalaEquipo, ResultadoSala
+    Torneo, Equipo, Debatiente, Ronda, Sala, SalaEquipo, ResultadoSala, EventoResultado,
+    PuntajeOrador, TablaRonda,
 )
+from .cache import ORDEN_TABLA, invalidar_tabla, marcar_cambio, tabla_torneo
+from . import geo
+from .eliminatorias import Fase, asignar, planificar
+from .emparejamiento import obtener_motor
+from .eventos import hay_suscriptores, publicar
+from .medicion import ContadorConsultas
+
+logger = logging.getLogger(__name__)
 
 # Posiciones BP en orden y rotación por número de ronda
 POSICIONES = ['OG', 'OO', 'CG', 'CO']
@@ -40,23 +54,93 @@ def _crear_swings_si_faltan(torneo: Torneo) -> None:
     if faltan <= 0:
         return
     base = torneo.equipos.filter(es_swing=True).count()
-    for i in range(faltan):
-        Equipo.objects.create(
-            torneo=torneo,
-            nombre=f"Swing {base + i + 1}",
-            es_swing=True,
-        )
+    Equipo.objects.bulk_create([
+        Equipo(torneo=torneo, nombre=f"Swing {base + i + 1}", es_swing=True)
+        for i in range(faltan)
+    ])
+    invalidar_tabla(torneo.id)
+
+
+def _historial_posiciones(ronda: Ronda, ids: List[int]) -> array:
+    """
+    Veces que cada equipo ocupó cada posición en rondas anteriores del torneo,
+    como array plano de 4*n alineado con `ids` (una consulta agregada).
+    """
+    indice = {eq_id: i for i, eq_id in enumerate(ids)}
+    col = {p: i for i, p in enumerate(POSICIONES)}
+    historial = array('l', [0]) * (4 * len(ids))
+    filas = (
+        SalaEquipo.objects
+        .filter(sala__ronda__torneo_id=ronda.torneo_id, sala__ronda__numero__lt=ronda.numero)
+        .values_list('equipo_id', 'posicion')
+    )
+    # Se cuenta en memoria: un GROUP BY aquí obliga a SQLite a ordenar en un B-tree temporal
+    for eq_id, pos in filas:
+        if eq_id in indice and pos in col:
+            historial[4 * indice[eq_id] + col[pos]] += 1
+    return historial
+
+
+def _limpiar_salas(ronda: Ronda) -> None:
+    """Borra las salas de la ronda (y sus participaciones) con un par de DELETE."""
+    SalaEquipo.objects.filter(sala__ronda=ronda).delete()
+    if Sala.objects.filter(ronda=ronda).delete()[0]:
+        marcar_cambio(ronda.torneo_id)
 
 
-def _asignar_posiciones_rotando(ronda: Ronda, equipos: List[Equipo]) -> List[Tuple[Equipo, str]]:
+def _materializar_salas(ronda: Ronda, salas: List[Tuple[str, List[Tuple[int, str]]]],
+                        con_llave: bool = False) -> None:
     """
-    Asigna OG/OO/CG/CO rotando por número de ronda.
-    Por seguridad, si llegan menos de 4 (no debería), asigna a los que existan.
+    Escribe un cuadro completo con un número fijo de sentencias.
+    `salas` es una lista de (nombre, [(equipo_id, posicion), ...]); con
+    `con_llave` cada sala guarda su lugar (1..n) en la fase de eliminatorias.
     """
-    rot = (ronda.numero - 1) % 4
-    pos = POSICIONES[rot:] + POSICIONES[:rot]
-    m = min(4, len(equipos))
-    return [(equipos[i], pos[i]) for i in range(m)]
+    creadas = Sala.objects.bulk_create([
+        Sala(ronda=ronda, nombre=nombre, llave=i if con_llave else None)
+        for i, (nombre, _) in enumerate(salas, start=1)
+    ])
+    if creadas and creadas[0].pk is None:
+        # Backends sin RETURNING en inserts masivos: recuperar ids por nombre
+        ids = dict(Sala.objects.filter(ronda=ronda).values_list('nombre', 'id'))
+        for sala in creadas:
+            sala.pk = ids[sala.nombre]
+    SalaEquipo.objects.bulk_create([
+        SalaEquipo(sala_id=sala.pk, equipo_id=equipo_id, posicion=pos)
+        for sala, (_, asignaciones) in zip(creadas, salas)
+        for equipo_id, pos in asignaciones
+    ])
+
+
+# ------------------------- equipos -------------------------
+
+@transaction.atomic
+def crear_equipos_en_bloque(torneo: Torneo, filas: List[Tuple[str, str, str]], lote: int = 500) -> int:
+    """
+    Reemplaza los equipos (no swing) del torneo por `filas` =
+    [(nombre_equipo, integrante1, integrante2), ...], con bulk_create por lotes.
+    """
+    Equipo.objects.filter(torneo=torneo, es_swing=False).delete()
+    for inicio in range(0, len(filas), lote):
+        bloque = filas[inicio:inicio + lote]
+        equipos = Equipo.objects.bulk_create([
+            Equipo(torneo=torneo, nombre=nombre) for nombre, _, _ in bloque
+        ])
+        if equipos and equipos[0].pk is None:
+            # Backends sin RETURNING en inserts masivos: recuperar ids por nombre
+            ids = dict(
+                Equipo.objects
+                .filter(torneo=torneo, nombre__in=[e.nombre for e in equipos])
+                .values_list('nombre', 'id')
+            )
+            for equipo in equipos:
+                equipo.pk = ids[equipo.nombre]
+        Debatiente.objects.bulk_create([
+            Debatiente(equipo_id=equipo.pk, nombre=integrante)
+            for equipo, (_, integrante1, integrante2) in zip(equipos, bloque)
+            for integrante in (integrante1, integrante2)
+        ])
+    invalidar_tabla(torneo.id)
+    return len(filas)
 
 
 # ------------------------- emparejamiento -------------------------
@@ -64,11 +148,12 @@ def _asignar_posiciones_rotando(ronda: Ronda, equipos: List[Equipo]) -> List[Tup
 @transaction.atomic
 def generar_emparejamientos(ronda: Ronda) -> None:
     """
-    Emparejamiento simple (power-pairing clásico):
+    Emparejamiento por power-pairing:
       1) Asegura múltiplo de 4 creando swings SOLO si faltan para completar.
       2) Ordena equipos por ranking actual: puntos, speakers_total, speakers_prom, id.
-      3) Parte consecutivamente en bloques de 4, sin restricciones adicionales.
-      4) Asigna OG/OO/CG/CO rotando por ronda.
+      3) Arma salas de 4 y asigna OG/OO/CG/CO con el motor configurado
+         (ver tabla.emparejamiento: óptimo con balance de posiciones, o greedy).
+      4) Escribe el cuadro en bloque.
 
     Idempotente: si la ronda ya tiene salas, solo marca 'emparejada' (por si quedó false).
     """
@@ -84,76 +169,797 @@ def generar_emparejamientos(ronda: Ronda) -> None:
     # 1) Múltiplo de 4 (único momento en que se crean swings)
     _crear_swings_si_faltan(torneo)
 
-    # 2) Orden por ranking actual
-    equipos = list(
-        torneo.equipos.order_by('-puntos', '-speakers_total', '-speakers_prom', 'id')
+    # 2) Orden por ranking actual (solo ids y puntos; el cuadro se arma en memoria)
+    filas = list(
+        torneo.equipos
+        .order_by(*ORDEN_TABLA)
+        .values_list('id', 'puntos')
     )
+    ids = [eq_id for eq_id, _ in filas]
+    puntos = array('l', (pts for _, pts in filas))
+
+    # 3) Armar salas de 4 y asignar posiciones con el motor configurado
+    motor = obtener_motor()
+    historial = (
+        _historial_posiciones(ronda, ids) if motor.usa_historial
+        else array('l', [0]) * (4 * len(ids))
+    )
+    salas = motor.emparejar(puntos, historial, ronda.numero)
 
-    # 3) Partir en grupos de 4
-    grupos = [equipos[i:i + 4] for i in range(0, len(equipos), 4)]
-
-    # 4) Crear salas y posiciones
-    for idx, grupo in enumerate(grupos, start=1):
-        sala = Sala.objects.create(ronda=ronda, nombre=f"Sala {idx}")
-        for equipo, pos in _asignar_posiciones_rotando(ronda, grupo):
-            SalaEquipo.objects.create(sala=sala, equipo=equipo, posicion=pos)
+    # 4) Crear salas y posiciones en bloque
+    _materializar_salas(ronda, [
+        (f"Sala {idx}", [(ids[i], POSICIONES[p]) for i, p in sala])
+        for idx, sala in enumerate(salas, start=1)
+    ])
 
     ronda.emparejada = True
     ronda.save(update_fields=['emparejada'])
+    marcar_cambio(torneo.id)
+    publicar(torneo.id, 'cuadro', {'ronda': ronda.numero, 'salas': len(salas)})
+
+
+# ------------------------- resultados -------------------------
+
+def salas_con_participaciones(ronda: Ronda) -> List[Tuple[Sala, List[SalaEquipo]]]:
+    """
+    Salas de la ronda con sus participaciones ordenadas por posición (y el
+    resultado ya cargado, si lo hay). Dos consultas en total, sin N+1.
+    """
+    salas = (
+        ronda.salas
+        .order_by('id')
+        .prefetch_related(Prefetch(
+            'participaciones',
+            queryset=SalaEquipo.objects.select_related('equipo', 'resultado').order_by('sala_id', 'posicion'),
+        ))
+    )
+    return [(sala, list(sala.participaciones.all())) for sala in salas]
+
+
+def guardar_resultados(ronda: Ronda, valores: List[Tuple[SalaEquipo, int, int, int]],
+                       usuario=None, marcar: bool = True) -> None:
+    """
+    Inserta o actualiza los ResultadoSala de `valores` = [(se, ranking, or1, or2), ...]
+    (todos de `ronda`) con un único upsert masivo, y deja constancia de cada
+    voto en la bitácora EventoResultado (carga o corrección).
+
+    Con `marcar=False` no se toca la fila del torneo (marcar_cambio): el
+    llamador la marca fuera de su transacción.
+    """
+    previos = set(
+        ResultadoSala.objects.filter(
+            sala_equipo__in=[se.pk for se, *_ in valores]
+        ).values_list('sala_equipo_id', flat=True)
+    )
+    resultados = ResultadoSala.objects.bulk_create(
+        [
+            ResultadoSala(
+                sala_equipo=se, ranking=ranking, puntos=_puntos_por_ranking(ranking),
+                orador1=or1, orador2=or2,
+            )
+            for se, ranking, or1, or2 in valores
+        ],
+        update_conflicts=True,
+        unique_fields=['sala_equipo'],
+        update_fields=['ranking', 'puntos', 'orador1', 'orador2'],
+    )
+    _guardar_puntajes_oradores(resultados, [se.equipo_id for se, *_ in valores])
+    EventoResultado.objects.bulk_create([
+        EventoResultado(
+            torneo_id=ronda.torneo_id, ronda=ronda, equipo_id=se.equipo_id, sala_equipo=se,
+            tipo=EventoResultado.CORRECCION if se.pk in previos else EventoResultado.CARGA,
+            ranking=ranking, puntos=_puntos_por_ranking(ranking),
+            orador1=or1, orador2=or2, usuario=usuario,
+        )
+        for se, ranking, or1, or2 in valores
+    ])
+    if marcar:
+        marcar_cambio(ronda.torneo_id)
+    if hay_suscriptores(ronda.torneo_id):
+        avance = SalaEquipo.objects.filter(sala__ronda=ronda).aggregate(
+            total=Count('id'), cargados=Count('resultado'),
+        )
+        publicar(ronda.torneo_id, 'resultados', {'ronda': ronda.numero, **avance})
+
+
+def _oradores_por_equipo(equipo_ids: List[int]) -> dict:
+    """{equipo_id: [debatiente_id, ...]} en orden de id (el primero es orador1)."""
+    oradores = {}
+    for equipo_id, deb_id in (
+        Debatiente.objects.filter(equipo_id__in=equipo_ids)
+        .order_by('equipo_id', 'id').values_list('equipo_id', 'id')
+    ):
+        oradores.setdefault(equipo_id, []).append(deb_id)
+    return oradores
+
+
+def anotar_oradores(ses: List[SalaEquipo]) -> None:
+    """
+    Pone en cada participación `oradores`: los nombres de quienes reciben
+    orador1 y orador2 (el orden de _oradores_por_equipo), en una consulta.
+    """
+    nombres = {}
+    for equipo_id, nombre in (
+        Debatiente.objects.filter(equipo_id__in={se.equipo_id for se in ses})
+        .order_by('equipo_id', 'id').values_list('equipo_id', 'nombre')
+    ):
+        nombres.setdefault(equipo_id, []).append(nombre)
+    for se in ses:
+        propios = nombres.get(se.equipo_id, [])
+        se.oradores = [propios[i] if i < len(propios) else f'Orador {i + 1}' for i in range(2)]
+
+
+def _guardar_puntajes_oradores(resultados: List[ResultadoSala], equipo_ids: List[int]) -> None:
+    """Upsert de PuntajeOrador para `resultados` (alineados con `equipo_ids`)."""
+    if resultados and resultados[0].pk is None:
+        # Backends sin RETURNING en upserts masivos: recuperar ids por participación
+        ids = dict(
+            ResultadoSala.objects
+            .filter(sala_equipo__in=[r.sala_equipo_id for r in resultados])
+            .values_list('sala_equipo_id', 'id')
+        )
+        for r in resultados:
+            r.pk = ids[r.sala_equipo_id]
+    oradores = _oradores_por_equipo(equipo_ids)
+    PuntajeOrador.objects.bulk_create(
+        [
+            PuntajeOrador(resultado_id=r.pk, debatiente_id=deb_id, orden=orden, puntaje=puntaje)
+            for r, equipo_id in zip(resultados, equipo_ids)
+            for orden, (deb_id, puntaje) in enumerate(
+                zip(oradores.get(equipo_id, []), (r.orador1, r.orador2)), start=1
+            )
+        ],
+        update_conflicts=True,
+        unique_fields=['resultado', 'orden'],
+        update_fields=['debatiente', 'puntaje'],
+    )
 
 
 # ------------------------- cierre de ronda y ranking -------------------------
 
+class RondaYaCerrada(ValueError):
+    """Se intentó cerrar (o cargar votos en) una ronda que ya está cerrada."""
+
+
+class ResumenCierre(NamedTuple):
+    """Lo que costó cerrar una ronda (para logs y benchmarks)."""
+    equipos: int
+    consultas: int
+    segundos: float
+
+
 @transaction.atomic
-def cerrar_ronda_y_actualizar_tabla(ronda: Ronda) -> None:
+def cerrar_ronda_y_actualizar_tabla(ronda: Ronda) -> ResumenCierre:
     """
+    0) Marca la ronda como cerrada con un UPDATE condicional: si otra petición
+       ya la cerró, lanza RondaYaCerrada (los puntos nunca se suman dos veces).
+       Sube la versión de todas sus salas: un voto por sala en vuelo queda obsoleto.
     1) Verifica que todas las participaciones (SalaEquipo) tengan ResultadoSala.
-       - Usa related_name='resultado' (ajusta aquí si tu modelo usa otro nombre).
-    2) Suma puntos y speakers de la ronda a cada equipo.
-    3) Recalcula speakers_prom = speakers_total / (2 * debates_jugados).
-    4) Marca la ronda como cerrada.
-    """
-    # 1) Validación: que no falten resultados en esta ronda
-    #    Si tu ForeignKey ResultadoSala(sala_equipo=...) NO usa related_name='resultado',
-    #    cambia 'resultado__isnull=True' por el nombre correcto (p.ej. 'resultadosala__isnull=True').
-    faltantes = (
-        SalaEquipo.objects
-        .filter(sala__ronda=ronda, resultado__isnull=True)
-        .count()
+    2) Suma puntos y speakers de la ronda a cada equipo (un UPDATE con subconsultas).
+    3) Recalcula speakers_prom = speakers_total / (2 * debates_jugados) (otro UPDATE).
+    4) Guarda la foto de la tabla tras la ronda (TablaRonda, un INSERT masivo).
+
+    El número de consultas no depende de la cantidad de equipos.
+    """
+    with ContadorConsultas() as medicion:
+        # 0) Reclamar el cierre
+        if not Ronda.objects.filter(pk=ronda.pk, cerrada=False).update(cerrada=True):
+            raise RondaYaCerrada("La ronda ya está cerrada.")
+        Sala.objects.filter(ronda=ronda).update(version=F('version') + 1)
+
+        # 1) Validación: que no falten resultados en esta ronda
+        faltantes = (
+            SalaEquipo.objects
+            .filter(sala__ronda=ronda, resultado__isnull=True)
+            .count()
+        )
+        if faltantes:
+            raise ValueError("Faltan resultados en una o más salas.")
+
+        # 2) Sumar puntos y speakers de esta ronda
+        de_la_ronda = ResultadoSala.objects.filter(
+            sala_equipo__sala__ronda=ronda,
+            sala_equipo__equipo=OuterRef('pk'),
+        )
+        equipos = Equipo.objects.filter(
+            id__in=SalaEquipo.objects.filter(sala__ronda=ronda).values('equipo_id')
+        )
+        actualizados = equipos.update(
+            puntos=F('puntos') + _suma_por_equipo(de_la_ronda, F('puntos')),
+            speakers_total=F('speakers_total') + _suma_por_equipo(
+                de_la_ronda, F('orador1') + F('orador2')
+            ),
+        )
+
+        # 3) Recalcular speakers_prom (promedio por orador)
+        _recalcular_promedios(equipos)
+
+        # 4) Foto de la tabla tras esta ronda
+        _guardar_foto(ronda, equipos)
+
+        invalidar_tabla(ronda.torneo_id)
+        ronda.cerrada = True
+        publicar(ronda.torneo_id, 'tabla', {'ronda': ronda.numero})
+
+    resumen = ResumenCierre(actualizados, medicion.consultas, medicion.segundos)
+    logger.info(
+        "Ronda %s cerrada: %d equipos, %d consultas, %.3fs",
+        ronda.pk, resumen.equipos, resumen.consultas, resumen.segundos,
+    )
+    return resumen
+
+
+def _suma_por_equipo(resultados, expresion) -> Coalesce:
+    """Subconsulta escalar: suma de `expresion` sobre `resultados` de un equipo."""
+    return Coalesce(
+        Subquery(
+            resultados
+            .values('sala_equipo__equipo')
+            .annotate(s=Sum(expresion))
+            .values('s')
+        ),
+        0,
     )
-    if faltantes:
-        raise ValueError("Faltan resultados en una o más salas.")
 
-    # 2) Sumar puntos y speakers de esta ronda
-    resultados = (
+
+def _debates_cerrados() -> Subquery:
+    """
+    Subconsulta escalar: debates jugados por el equipo OuterRef('pk') en rondas
+    cerradas (cada ResultadoSala es un debate del equipo).
+    """
+    return Subquery(
         ResultadoSala.objects
-        .filter(sala_equipo__sala__ronda=ronda)
-        .select_related('sala_equipo', 'sala_equipo__equipo')
+        .filter(sala_equipo__equipo=OuterRef('pk'), sala_equipo__sala__ronda__cerrada=True)
+        .values('sala_equipo__equipo')
+        .annotate(n=Count('id'))
+        .values('n')
+    )
+
+
+def _recalcular_promedios(equipos) -> None:
+    """speakers_prom = speakers_total / (2 * debates en rondas cerradas), en un UPDATE."""
+    equipos.update(
+        speakers_prom=Cast('speakers_total', FloatField()) / Greatest(
+            Coalesce(_debates_cerrados(), 0) * 2, 1  # 2 oradores por debate; evita división por 0
+        ),
+    )
+
+
+def _guardar_foto(ronda: Ronda, equipos) -> None:
+    """
+    Escribe TablaRonda de `ronda` (ya sumada a `equipos`). Si hay rondas
+    posteriores cerradas (se reabrió y volvió a cerrar esta), el acumulado
+    tras esta ronda es el actual menos lo que sumaron aquellas, y a sus fotos
+    se les suma el delta nuevo.
+    """
+    deltas = {
+        equipo_id: (puntos, speakers)
+        for equipo_id, puntos, speakers in
+        ResultadoSala.objects.filter(sala_equipo__sala__ronda=ronda)
+        .values_list('sala_equipo__equipo', 'puntos', F('orador1') + F('orador2'))
+    }
+    # Casi siempre vacío (se cierra la última ronda): se suma en Python, sin GROUP BY
+    posteriores = {}
+    for equipo_id, puntos, speakers in (
+        TablaRonda.objects.filter(torneo_id=ronda.torneo_id, numero__gt=ronda.numero)
+        .values_list('equipo', 'puntos', 'speakers')
+    ):
+        p, s, d = posteriores.get(equipo_id, (0, 0, 0))
+        posteriores[equipo_id] = (p + puntos, s + speakers, d + 1)
+    fotos = []
+    for equipo_id, puntos, speakers, debates in (
+        equipos.annotate(debates=Coalesce(_debates_cerrados(), 0))
+        .values_list('id', 'puntos', 'speakers_total', 'debates')
+    ):
+        p_post, s_post, d_post = posteriores.get(equipo_id, (0, 0, 0))
+        delta_p, delta_s = deltas.get(equipo_id, (0, 0))
+        speakers, debates = speakers - s_post, debates - d_post
+        fotos.append(TablaRonda(
+            torneo_id=ronda.torneo_id, ronda=ronda, numero=ronda.numero, equipo_id=equipo_id,
+            puntos=delta_p, speakers=delta_s, puntos_total=puntos - p_post,
+            speakers_total=speakers, speakers_prom=speakers / max(debates * 2, 1), debates=debates,
+        ))
+    TablaRonda.objects.bulk_create(fotos)
+    if posteriores:
+        _desplazar_posteriores(ronda, 1)
+
+
+def _desplazar_posteriores(ronda: Ronda, signo: int) -> None:
+    """Suma (signo=1) o resta (signo=-1) el delta de `ronda` a las fotos de las rondas siguientes."""
+    delta = TablaRonda.objects.filter(ronda=ronda, equipo=OuterRef('equipo'))
+    posteriores = TablaRonda.objects.filter(
+        torneo_id=ronda.torneo_id, numero__gt=ronda.numero,
+        equipo__in=TablaRonda.objects.filter(ronda=ronda).values('equipo'),
+    )
+    posteriores.update(
+        puntos_total=F('puntos_total') + signo * Subquery(delta.values('puntos')),
+        speakers_total=F('speakers_total') + signo * Subquery(delta.values('speakers')),
+        debates=F('debates') + signo,
     )
+    _recalcular_promedios_fotos(posteriores)
+
 
-    add_puntos = defaultdict(int)
-    add_speakers = defaultdict(int)
+def _recalcular_promedios_fotos(fotos) -> None:
+    fotos.update(speakers_prom=Cast('speakers_total', FloatField()) / Greatest(F('debates') * 2, 1))
 
-    for r in resultados:
-        eq_id = r.sala_equipo.equipo_id
-        add_puntos[eq_id] += int(r.puntos)
-        add_speakers[eq_id] += int(r.orador1) + int(r.orador2)
 
-    for eq_id, pts in add_puntos.items():
-        Equipo.objects.filter(id=eq_id).update(
-            puntos=F('puntos') + pts,
-            speakers_total=F('speakers_total') + add_speakers[eq_id],
+@transaction.atomic
+def reabrir_ronda(ronda: Ronda) -> int:
+    """
+    Deshace el cierre de `ronda` para corregir sus votos: a cada equipo le resta
+    solo lo que sumó en ella (su TablaRonda), sin recalcular el torneo. Al volver
+    a cerrarla se suma el delta corregido. Devuelve los equipos actualizados.
+
+    No se reabre una ronda de la que ya depende otra fase: una eliminatoria
+    con la fase siguiente armada, ni una clasificatoria después del break.
+    """
+    n_rondas = Torneo.objects.values_list('n_rondas', flat=True).get(pk=ronda.torneo_id)
+    if Ronda.objects.filter(torneo_id=ronda.torneo_id, numero__gt=max(ronda.numero, n_rondas)).exists():
+        raise ValueError("La fase siguiente ya está armada: no se puede reabrir la ronda.")
+    if not Ronda.objects.filter(pk=ronda.pk, cerrada=True).update(cerrada=False):
+        raise ValueError("La ronda no está cerrada.")
+    fotos = TablaRonda.objects.filter(ronda=ronda)
+    if not fotos.exists():
+        raise ValueError("La ronda no tiene foto de la tabla: usa reconstruir_tabla.")
+    # Los formularios de votos abiertos antes de reabrir quedan obsoletos
+    Sala.objects.filter(ronda=ronda).update(version=F('version') + 1)
+
+    foto = fotos.filter(equipo=OuterRef('pk'))
+    equipos = Equipo.objects.filter(id__in=fotos.values('equipo'))
+    actualizados = equipos.update(
+        puntos=F('puntos') - Subquery(foto.values('puntos')),
+        speakers_total=F('speakers_total') - Subquery(foto.values('speakers')),
+    )
+    _recalcular_promedios(equipos)
+    _desplazar_posteriores(ronda, -1)
+    fotos.delete()
+
+    invalidar_tabla(ronda.torneo_id)
+    ronda.cerrada = False
+    publicar(ronda.torneo_id, 'tabla', {'ronda': ronda.numero, 'reabierta': True})
+    logger.info("Ronda %s reabierta: %d equipos", ronda.pk, actualizados)
+    return actualizados
+
+
+# ------------------------- carga de votos por sala -------------------------
+
+class VersionObsoleta(Exception):
+    """Los votos de la sala cambiaron desde que se abrió el formulario."""
+
+
+def registrar_votos_sala(sala: Sala, version: int, valores: List[Tuple[SalaEquipo, int, int, int]],
+                         usuario=None) -> bool:
+    """
+    Guarda los votos de una sola sala (lo que envía cada juez), en paralelo
+    con las demás salas de la ronda.
+
+    Control optimista: `version` es la que tenía la sala al abrir el
+    formulario; si cambió, lanza VersionObsoleta. Solo se bloquea la fila de
+    la sala. Si con esta sala la ronda quedó completa, la cierra.
+    Devuelve True si esta llamada cerró la ronda.
+    """
+    with transaction.atomic():
+        if not Sala.objects.filter(pk=sala.pk, version=version).update(version=F('version') + 1):
+            raise VersionObsoleta(f"Los votos de {sala.nombre} cambiaron mientras cargabas. Revisa y vuelve a enviar.")
+        ronda = Ronda.objects.get(pk=sala.ronda_id)
+        if ronda.cerrada:
+            raise RondaYaCerrada("La ronda ya está cerrada.")
+        guardar_resultados(ronda, valores, usuario=usuario, marcar=False)
+        sala.version = version + 1
+
+    # Fuera de la transacción: las salas que se cargan a la vez no hacen cola
+    # en la fila del torneo, y dos últimas salas simultáneas ven los votos de
+    # la otra (el cierre condicional deja pasar solo a una).
+    marcar_cambio(ronda.torneo_id)
+    return cerrar_ronda_si_completa(ronda)
+
+
+class ResumenCorreccion(NamedTuple):
+    """Lo que cambió al corregir los votos de una sala de una ronda cerrada."""
+    deltas: Dict[int, Tuple[int, int]]  # equipo_id -> (puntos, speakers)
+    desactualizadas: List[Ronda]        # rondas siguientes emparejadas con la tabla vieja
+
+
+@transaction.atomic
+def corregir_votos_sala(sala: Sala, version: int, valores: List[Tuple[SalaEquipo, int, int, int]],
+                        usuario=None) -> ResumenCorreccion:
+    """
+    Corrige los votos de una sala de una ronda ya cerrada sin recalcular el
+    torneo: solo se tocan los 4 equipos de la sala (bloqueados con SELECT ...
+    FOR UPDATE), sus fotos de TablaRonda desde esta ronda, la bitácora y los
+    puntajes de orador. El costo no depende del tamaño del torneo.
+
+    Si la tabla cambió, las rondas clasificatorias siguientes ya emparejadas
+    no se tocan: se devuelven en `desactualizadas` para avisar al tab. Una
+    clasificatoria no se corrige si el break ya está armado.
+    """
+    if not Sala.objects.filter(pk=sala.pk, version=version).update(version=F('version') + 1):
+        raise VersionObsoleta(f"Los votos de {sala.nombre} cambiaron mientras cargabas. Revisa y vuelve a enviar.")
+    ronda = Ronda.objects.select_related('torneo').get(pk=sala.ronda_id)
+    torneo = ronda.torneo
+    if not ronda.cerrada:
+        raise ValueError("La ronda sigue abierta: carga los votos normalmente.")
+    # Como en reabrir_ronda: con el break armado, la tabla clasificatoria queda fija
+    if ronda.numero <= torneo.n_rondas and torneo.rondas.filter(numero__gt=torneo.n_rondas).exists():
+        raise ValueError("La fase siguiente ya está armada: no se puede corregir la ronda.")
+
+    # Orden fijo de bloqueo: dos correcciones simultáneas no se trancan entre sí
+    list(
+        Equipo.objects.select_for_update()
+        .filter(id__in=[se.equipo_id for se, *_ in valores]).order_by('id').values_list('id')
+    )
+    previos = {
+        equipo_id: (puntos, or1, or2, ranking)
+        for equipo_id, puntos, or1, or2, ranking in
+        ResultadoSala.objects.filter(sala_equipo__sala=sala)
+        .values_list('sala_equipo__equipo', 'puntos', 'orador1', 'orador2', 'ranking')
+    }
+    deltas = {}
+    cambian_oradores = False
+    for se, ranking, or1, or2 in valores:
+        puntos, previo1, previo2, _ = previos[se.equipo_id]
+        delta = (_puntos_por_ranking(ranking) - puntos, or1 + or2 - previo1 - previo2)
+        if delta != (0, 0):
+            deltas[se.equipo_id] = delta
+        # Un cambio entre orador1 y orador2 no mueve la tabla de equipos pero sí la de oradores
+        cambian_oradores |= (or1, or2) != (previo1, previo2)
+
+    if ronda.numero > torneo.n_rondas:
+        antes = next(eq for eq, (*_, ranking) in previos.items() if ranking == 1)
+        ahora = next(se.equipo_id for se, ranking, *_ in valores if ranking == 1)
+        if antes != ahora and torneo.rondas.filter(numero__gt=ronda.numero).exists():
+            raise ValueError(f"Cambia el ganador de {sala.nombre} y la fase siguiente ya está armada.")
+
+    guardar_resultados(ronda, valores, usuario=usuario)
+    sala.version = version + 1
+    if not deltas:
+        if cambian_oradores:
+            invalidar_tabla(torneo.id)
+            publicar(torneo.id, 'tabla', {'ronda': ronda.numero, 'correccion': sala.nombre})
+        return ResumenCorreccion({}, [])
+
+    _aplicar_deltas(ronda, deltas)
+    if torneo.cerrado and es_final(torneo, ronda):
+        coronar_campeon(torneo, ronda)
+    invalidar_tabla(torneo.id)
+    desactualizadas = _rondas_emparejadas_despues(ronda)
+    publicar(torneo.id, 'tabla', {'ronda': ronda.numero, 'correccion': sala.nombre})
+    logger.info("Sala %s corregida: %d equipos, %d rondas emparejadas con la tabla vieja",
+                sala.pk, len(deltas), len(desactualizadas))
+    return ResumenCorreccion(deltas, desactualizadas)
+
+
+def _por_equipo(deltas: Dict[int, Tuple[int, int]], indice: int, campo: str = 'pk') -> Case:
+    """CASE campo WHEN equipo THEN delta ...: el delta de cada equipo en una sola expresión."""
+    return Case(
+        *[When(**{campo: equipo_id}, then=Value(delta[indice])) for equipo_id, delta in deltas.items()],
+        default=Value(0), output_field=IntegerField(),
+    )
+
+
+def _aplicar_deltas(ronda: Ronda, deltas: Dict[int, Tuple[int, int]]) -> None:
+    """Suma `deltas` a Equipo y a las fotos de TablaRonda desde `ronda` (un UPDATE por tabla y campo)."""
+    equipos = Equipo.objects.filter(id__in=deltas)
+    equipos.update(
+        puntos=F('puntos') + _por_equipo(deltas, 0),
+        speakers_total=F('speakers_total') + _por_equipo(deltas, 1),
+    )
+    _recalcular_promedios(equipos)
+
+    fotos = TablaRonda.objects.filter(
+        torneo_id=ronda.torneo_id, numero__gte=ronda.numero, equipo__in=list(deltas),
+    )
+    fotos.filter(ronda=ronda).update(
+        puntos=F('puntos') + _por_equipo(deltas, 0, 'equipo'),
+        speakers=F('speakers') + _por_equipo(deltas, 1, 'equipo'),
+    )
+    fotos.update(
+        puntos_total=F('puntos_total') + _por_equipo(deltas, 0, 'equipo'),
+        speakers_total=F('speakers_total') + _por_equipo(deltas, 1, 'equipo'),
+    )
+    _recalcular_promedios_fotos(fotos)
+
+
+def _rondas_emparejadas_despues(ronda: Ronda) -> List[Ronda]:
+    """
+    Rondas clasificatorias posteriores a `ronda`, abiertas y ya emparejadas con
+    la tabla vieja. No se tocan (los equipos pueden tener ya sus salas): solo
+    se informan para que el tab decida si reemparejarlas.
+    """
+    return list(Ronda.objects.filter(
+        torneo_id=ronda.torneo_id, numero__gt=ronda.numero,
+        numero__lte=ronda.torneo.n_rondas, cerrada=False, emparejada=True,
+    ).order_by('numero'))
+
+
+def cerrar_ronda_si_completa(ronda: Ronda) -> bool:
+    """Cierra la ronda (y corona al campeón si era la final) cuando ya no faltan votos."""
+    if SalaEquipo.objects.filter(sala__ronda=ronda, resultado__isnull=True).exists():
+        return False
+    with transaction.atomic():
+        try:
+            cerrar_ronda_y_actualizar_tabla(ronda)
+        except RondaYaCerrada:
+            return False
+        torneo = Torneo.objects.get(pk=ronda.torneo_id)
+        if es_final(torneo, ronda):
+            coronar_campeon(torneo, ronda)
+    return True
+
+
+def es_final(torneo: Torneo, ronda: Ronda) -> bool:
+    """Eliminatoria con una sola sala."""
+    return ronda.numero > torneo.n_rondas and ronda.salas.count() == 1
+
+
+def coronar_campeon(torneo: Torneo, ronda: Ronda) -> Optional[Equipo]:
+    """Cierra el torneo con el ganador (ranking 1) de la final `ronda`; None si no hay."""
+    se = (
+        SalaEquipo.objects.select_related('equipo')
+        .filter(sala__ronda=ronda, resultado__ranking=1).first()
+    )
+    if se is None:
+        return None
+    torneo.ganador = se.equipo
+    torneo.cerrado = True
+    torneo.save(update_fields=['ganador', 'cerrado', 'actualizado'])
+    return se.equipo
+
+
+# ------------------------- eliminatorias -------------------------
+
+@transaction.atomic
+def crear_fase_eliminatoria(torneo: Torneo, numero: int, fase: Fase, por_semilla: List[int]) -> Ronda:
+    """
+    Crea la ronda `numero` con las salas de `fase`; `por_semilla[i]` es el
+    equipo con semilla i+1. Salas y participaciones van en dos inserciones masivas.
+    """
+    ronda = Ronda.objects.create(torneo=torneo, numero=numero, emparejada=True, cerrada=False)
+    _materializar_salas(ronda, asignar(fase, por_semilla), con_llave=True)
+    marcar_cambio(torneo.id)
+    publicar(torneo.id, 'cuadro', {'ronda': numero, 'salas': len(fase.salas)})
+    return ronda
+
+
+def ganadores_por_llave(ronda: Ronda) -> List[int]:
+    """Equipo con ranking 1 de cada sala de `ronda`, en orden de llave."""
+    return list(
+        SalaEquipo.objects
+        .filter(sala__ronda=ronda, resultado__ranking=1)
+        .order_by('sala__llave')
+        .values_list('equipo_id', flat=True)
+    )
+
+
+@transaction.atomic
+def avanzar_eliminatorias(torneo: Torneo) -> Optional[Tuple[Ronda, Fase]]:
+    """
+    Arma la próxima fase del break: la primera desde la tabla final, las
+    siguientes con el ganador de cada llave de la última fase cerrada.
+    Si la última fase era la final corona al campeón y devuelve None.
+    Lanza ValueError si el cuadro no se puede armar.
+    """
+    try:
+        fases = planificar(torneo.n_clasificados)
+    except ValueError as e:
+        # Torneos creados antes de validar los clasificados en el formulario
+        raise ValueError(f'No se puede armar el break con {torneo.n_clasificados} clasificados. {e} '
+                         'Corrígelo en "Editar torneo".') from e
+    base = torneo.n_rondas
+    ultima = torneo.rondas.filter(numero__gt=base).order_by('-numero').first()
+
+    if ultima is None:
+        clasificados = [fila.id for fila in tabla_torneo(torneo)[:torneo.n_clasificados]]
+        if len(clasificados) < torneo.n_clasificados:
+            raise ValueError('No hay suficientes equipos para completar el break.')
+        return crear_fase_eliminatoria(torneo, base + 1, fases[0], clasificados), fases[0]
+
+    if not ultima.cerrada:
+        raise ValueError(f'La ronda {ultima.numero} todavía no está cerrada.')
+
+    indice = ultima.numero - base - 1
+    fase_actual = fases[min(indice, len(fases) - 1)]
+    ganadores = ganadores_por_llave(ultima)
+    if len(ganadores) != len(fase_actual.salas):
+        raise ValueError('Cada sala de la eliminatoria debe tener exactamente un ganador. Revisa resultados.')
+
+    if len(ganadores) == 1:
+        torneo.ganador = Equipo.objects.get(pk=ganadores[0])
+        torneo.cerrado = True
+        torneo.save(update_fields=['ganador', 'cerrado', 'actualizado'])
+        return None
+
+    siguiente = fases[indice + 1]
+    return crear_fase_eliminatoria(torneo, ultima.numero + 1, siguiente, ganadores), siguiente
+
+
+# ------------------------- panel de inicio -------------------------
+
+TORNEOS_POR_PAGINA = 25
+
+
+def _contar(qs) -> Coalesce:
+    """Subconsulta escalar: COUNT(*) de `qs` (ya filtrado por OuterRef('pk'))."""
+    return Coalesce(
+        Subquery(qs.order_by().values('torneo').annotate(n=Count('id')).values('n')), 0
+    )
+
+
+def cursor_torneo(torneo: Torneo) -> str:
+    return f'{torneo.creado.isoformat()}_{torneo.pk}'
+
+
+def _leer_cursor(cursor: str) -> Optional[Tuple[datetime, int]]:
+    try:
+        creado, pk = cursor.rsplit('_', 1)
+        return datetime.fromisoformat(creado), int(pk)
+    except (AttributeError, ValueError):
+        return None
+
+
+def pagina_torneos(cursor: Optional[str] = None, usuario=None,
+                   tamano: int = TORNEOS_POR_PAGINA) -> Tuple[List[Torneo], Optional[str]]:
+    """
+    Una página del panel: torneos del más nuevo al más viejo, paginados por
+    clave (creado, id) a partir de `cursor` (el de la página anterior).
+    Cantidad de equipos, rondas cerradas, ronda actual y ganador salen en la
+    misma consulta. Devuelve (torneos, cursor de la página siguiente o None).
+    """
+    qs = (
+        Torneo.objects
+        .annotate(
+            equipos_cargados=_contar(Equipo.objects.filter(torneo=OuterRef('pk'), es_swing=False)),
+            rondas_cerradas=_contar(Ronda.objects.filter(
+                torneo=OuterRef('pk'), cerrada=True, numero__lte=OuterRef('n_rondas'),
+            )),
+            ronda_actual=Subquery(
+                Ronda.objects.filter(torneo=OuterRef('pk'), cerrada=False)
+                .order_by('numero').values('numero')[:1]
+            ),
+            ganador_nombre=F('ganador__nombre'),
         )
+        .order_by('-creado', '-id')
+    )
+    if usuario is not None:
+        qs = qs.filter(creado_por=usuario)
+    desde = _leer_cursor(cursor) if cursor else None
+    if desde:
+        creado, pk = desde
+        qs = qs.filter(Q(creado__lt=creado) | Q(creado=creado, id__lt=pk))
+
+    torneos = list(qs[:tamano + 1])
+    siguiente = cursor_torneo(torneos[tamano - 1]) if len(torneos) > tamano else None
+    return torneos[:tamano], siguiente
+
+
+# ------------------------- búsqueda por ubicación -------------------------
+
+TORNEOS_CERCANOS = 50
+# Candidatos que se traen como mucho por búsqueda (zonas muy grandes o muy pobladas)
+MAX_CANDIDATOS = 5000
+
+
+class TorneoCercano(NamedTuple):
+    id: int
+    nombre: str
+    lugar_nombre: str
+    lat: float
+    lng: float
+    cerrado: bool
+    distancia_km: float  # al punto buscado (o al centro de la zona)
 
-    # 3) Recalcular speakers_prom (promedio por orador)
-    #    debates_jugados = cantidad de ResultadoSala del equipo (cada resultado = debate por equipo)
-    for equipo in Equipo.objects.filter(id__in=add_puntos.keys()):
-        debates = ResultadoSala.objects.filter(sala_equipo__equipo=equipo).count()
-        denom = max(debates * 2, 1)  # 2 oradores por debate; evita división por 0
-        equipo.refresh_from_db(fields=['speakers_total'])
-        equipo.speakers_prom = equipo.speakers_total / denom
-        equipo.save(update_fields=['speakers_prom'])
-
-    # 4) Marcar ronda cerrada
-    ronda.cerrada = True
-    ronda.save(update_fields=['cerrada'])
+
+def _candidatos_en(zona: geo.Zona) -> Tuple[List[tuple], bool]:
+    """
+    (id, nombre, lugar_nombre, lat, lng, cerrado) de los torneos dentro de
+    `zona`: rangos de geocelda más el recorte por lat/lng, todo sobre
+    torneo_geocelda_idx. El bool indica si se cortó en MAX_CANDIDATOS.
+    """
+    filtro = Q()
+    for sur, oeste, norte, este in geo.partir_antimeridiano(zona):
+        # Sin rangos la zona es del tamaño del mundo: sirve cualquier geocelda
+        celdas = Q(geocelda__gt='')
+        rangos = geo.rangos((sur, oeste, norte, este))
+        if rangos:
+            celdas = Q(*[Q(geocelda__gte=d, geocelda__lt=h) for d, h in rangos], _connector=Q.OR)
+        filtro |= celdas & Q(lugar_lat__range=(sur, norte), lugar_lng__range=(oeste, este))
+    filas = list(
+        Torneo.objects.filter(filtro)
+        .values_list('id', 'nombre', 'lugar_nombre', 'lugar_lat', 'lugar_lng', 'cerrado')
+        [:MAX_CANDIDATOS + 1]
+    )
+    return filas[:MAX_CANDIDATOS], len(filas) > MAX_CANDIDATOS
+
+
+def _por_distancia(filas: List[tuple], lat: float, lng: float,
+                   radio_km: Optional[float], limite: int) -> List[TorneoCercano]:
+    cercanos = []
+    for fila in filas:
+        distancia = geo.distancia_km(lat, lng, fila[3], fila[4])
+        if radio_km is None or distancia <= radio_km:
+            cercanos.append(TorneoCercano(*fila, round(distancia, 3)))
+    cercanos.sort(key=lambda t: (t.distancia_km, t.id))
+    return cercanos[:limite]
+
+
+def torneos_cerca(lat: float, lng: float, radio_km: float,
+                  limite: int = TORNEOS_CERCANOS) -> Tuple[List[TorneoCercano], bool]:
+    """
+    Torneos a menos de `radio_km` de (lat, lng), del más cercano al más lejano.
+    Devuelve (torneos, truncado): truncado si hubo más de MAX_CANDIDATOS en la
+    zona que encierra el círculo (el resultado puede no ser el más cercano).
+    """
+    filas, truncado = _candidatos_en(geo.zona_alrededor(lat, lng, radio_km))
+    return _por_distancia(filas, lat, lng, radio_km, limite), truncado
+
+
+def torneos_en_zona(zona: geo.Zona,
+                    limite: int = TORNEOS_CERCANOS) -> Tuple[List[TorneoCercano], bool]:
+    """
+    Torneos dentro de `zona` (sur, oeste, norte, este; oeste > este cruza el
+    antimeridiano), del más cercano al centro de la zona al más lejano.
+    """
+    sur, oeste, norte, este = zona
+    este_continuo = este if oeste <= este else este + 360
+    centro_lng = (oeste + este_continuo) / 2
+    if centro_lng > 180:
+        centro_lng -= 360
+    filas, truncado = _candidatos_en(zona)
+    return _por_distancia(filas, (sur + norte) / 2, centro_lng, None, limite), truncado
+
+
+# ------------------------- reconstrucción de agregados -------------------------
+
+class DerivaEquipo(NamedTuple):
+    """Equipo cuyos contadores guardados no coinciden con sus ResultadoSala."""
+    equipo_id: int
+    nombre: str
+    guardado: Tuple[int, int, float]
+    calculado: Tuple[int, int, float]
+
+
+def reconstruir_agregados(torneo_id: int, aplicar: bool = True) -> List[DerivaEquipo]:
+    """
+    Recalcula puntos, speakers_total y speakers_prom de todos los equipos del
+    torneo a partir de los ResultadoSala de sus rondas cerradas (una sola
+    consulta agrupada) y los compara con lo guardado en Equipo.
+
+    Devuelve los equipos con diferencias; con `aplicar=True` además los corrige
+    con un bulk_update e invalida la tabla. Lectura y escritura van en la misma
+    transacción con el torneo bloqueado: un voto cargado entre medio no se pisa
+    con sumas viejas.
+    """
+    with transaction.atomic():
+        if aplicar:
+            Torneo.objects.select_for_update().only('id').get(pk=torneo_id)
+        sumas = {
+            fila['sala_equipo__equipo']: fila
+            for fila in ResultadoSala.objects
+            .filter(sala_equipo__sala__ronda__torneo_id=torneo_id,
+                    sala_equipo__sala__ronda__cerrada=True)
+            .values('sala_equipo__equipo')
+            .annotate(pts=Sum('puntos'), spk=Sum(F('orador1') + F('orador2')), debates=Count('id'))
+            .order_by()
+        }
+
+        derivas, corregidos = [], []
+        for equipo in Equipo.objects.filter(torneo_id=torneo_id).only(
+            'id', 'nombre', 'puntos', 'speakers_total', 'speakers_prom'
+        ):
+            fila = sumas.get(equipo.id)
+            pts, spk, debates = (fila['pts'], fila['spk'], fila['debates']) if fila else (0, 0, 0)
+            calculado = (pts, spk, spk / max(debates * 2, 1))
+            guardado = (equipo.puntos, equipo.speakers_total, equipo.speakers_prom)
+            if guardado[:2] != calculado[:2] or abs(guardado[2] - calculado[2]) > 1e-9:
+                derivas.append(DerivaEquipo(equipo.id, equipo.nombre, guardado, calculado))
+                equipo.puntos, equipo.speakers_total, equipo.speakers_prom = calculado
+                corregidos.append(equipo)
+
+        if aplicar and corregidos:
+            Equipo.objects.bulk_update(
+                corregidos, ['puntos', 'speakers_total', 'speakers_prom'], batch_size=500
+            )
+            invalidar_tabla(torneo_id)
+    if aplicar and corregidos:
+        logger.warning("Torneo %s: %d equipos reconstruidos", torneo_id, len(corregidos))
+    return derivas
@@ -0,0 +1,64 @@
+"""
+Marca el torneo como cambiado (cache.marcar_cambio) cuando se guarda algo que
+se ve en sus páginas públicas: equipos, debatientes, rondas, salas,
+participaciones y resultados. La clave de esas páginas sale de la marca en la base, así que
+vale para todos los procesos.
+
+bulk_create, update() y los DELETE masivos no emiten señales; los servicios
+que los usan ya llaman a marcar_cambio. Por eso no hay receptores de
+post_delete para Sala, SalaEquipo ni ResultadoSala: con ellos Django dejaría
+de borrarlos con un solo DELETE (_limpiar_salas).
+"""
+from typing import Optional
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .cache import invalidar_tabla, marcar_cambio
+from .models import Debatiente, Equipo, ResultadoSala, Ronda, Sala, SalaEquipo, Torneo
+
+
+def _torneo_de(instancia) -> Optional[int]:
+    if isinstance(instancia, (Equipo, Ronda)):
+        return instancia.torneo_id
+    if isinstance(instancia, Debatiente):
+        return Equipo.objects.filter(pk=instancia.equipo_id).values_list('torneo_id', flat=True).first()
+    if isinstance(instancia, Sala):
+        filtro = {'pk': instancia.ronda_id}
+    elif isinstance(instancia, SalaEquipo):
+        filtro = {'salas': instancia.sala_id}
+    else:
+        filtro = {'salas__participaciones': instancia.sala_equipo_id}
+    return Ronda.objects.filter(**filtro).values_list('torneo_id', flat=True).first()
+
+
+@receiver(post_save, sender=Torneo)
+def torneo_guardado(sender, instance, update_fields=None, raw=False, **kwargs):
+    # `actualizado` es auto_now: solo falta marcarlo si update_fields lo dejó afuera
+    if not raw and update_fields is not None and 'actualizado' not in update_fields:
+        marcar_cambio(instance.pk)
+
+
+@receiver(post_save, sender=Equipo)
+@receiver(post_save, sender=Debatiente)
+@receiver(post_save, sender=Ronda)
+@receiver(post_save, sender=Sala)
+@receiver(post_save, sender=SalaEquipo)
+@receiver(post_save, sender=ResultadoSala)
+@receiver(post_delete, sender=Equipo)
+@receiver(post_delete, sender=Debatiente)
+@receiver(post_delete, sender=Ronda)
+def marcar_torneo(sender, instance, signal, raw=False, origin=None, **kwargs):
+    if raw:  # loaddata
+        return
+    if signal is post_delete and (isinstance(origin, Torneo) or getattr(origin, 'model', None) is Torneo):
+        return  # se borra el torneo entero: nada que marcar
+    torneo_id = _torneo_de(instance)
+    if torneo_id is None:
+        return
+    if sender in (Equipo, Debatiente):
+        # Nombres y contadores del equipo están en la tabla en caché; los de
+        # los debatientes, en la tabla de oradores
+        invalidar_tabla(torneo_id)
+    else:
+        marcar_cambio(torneo_id)
@@ -0,0 +1,151 @@
+"""
+Simulador Monte Carlo de clasificación al break.
+
+Parte de la tabla actual y juega las rondas clasificatorias que faltan miles
+de veces, en lotes vectorizados con NumPy (una fila por simulación):
+
+- Emparejamiento por potencia como generar_emparejamientos: salas de 4
+  consecutivas en el orden oficial de la tabla (puntos, speakers). Si la
+  próxima ronda ya está emparejada, se usan sus salas reales.
+- Cada sala reparte 3/2/1/0 al azar (todos los órdenes igual de probables).
+- Speakers: para emparejar, el promedio actual del equipo; para el orden
+  final, además ruido normal (solo desempata igualdades de puntos).
+
+Devuelve, por equipo, la probabilidad de terminar entre los n_clasificados.
+NumPy es opcional: sin él, `disponible()` es False.
+"""
+from __future__ import annotations
+
+import time
+from itertools import permutations
+from typing import List, NamedTuple, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - dependencia opcional
+    np = None
+
+from .cache import FilaTabla, _cache, _timeout, tabla_torneo
+from .models import SalaEquipo, Torneo
+
+SIMULACIONES = 20000
+# Lo que acepta la vista (?simulaciones=): corre dentro del request, así que el
+# tope es el valor por defecto, y pocas opciones son pocas claves en la caché
+SIMULACIONES_PERMITIDAS = (1000, 5000, SIMULACIONES)
+LOTE = 5000
+DESVIO_ORADOR = 4.0  # desvío por orador y ronda
+
+
+class ResultadoSimulacion(NamedTuple):
+    filas: List[Tuple[FilaTabla, float]]  # equipos no swing, en orden de tabla
+    simulaciones: int
+    rondas_restantes: int
+    segundos: float
+
+
+def disponible() -> bool:
+    return np is not None
+
+
+def _rondas_restantes(torneo: Torneo) -> Tuple[int, Optional[List[Tuple[int, int]]]]:
+    """(rondas clasificatorias sin cerrar, [(sala_id, equipo_id)] de la próxima si ya está emparejada)."""
+    abiertas = list(
+        torneo.rondas.filter(numero__lte=torneo.n_rondas, cerrada=False)
+        .order_by('numero').values_list('id', 'emparejada')
+    )
+    if not abiertas:
+        return 0, None
+    ronda_id, emparejada = abiertas[0]
+    salas = None
+    if emparejada:
+        salas = list(
+            SalaEquipo.objects.filter(sala__ronda_id=ronda_id)
+            .order_by('sala_id', 'posicion').values_list('sala_id', 'equipo_id')
+        )
+    return len(abiertas), salas
+
+
+def simular_break(torneo: Torneo, simulaciones: int = SIMULACIONES,
+                  semilla: Optional[int] = None) -> ResultadoSimulacion:
+    """
+    Probabilidad de break de cada equipo. Con la misma tabla (version_tabla),
+    las mismas salas fijas y la misma semilla el resultado es el mismo, así que
+    se guarda en caché. Emparejar una ronda no cambia version_tabla pero sí
+    `actualizado` (marcar_cambio), por eso va en la clave.
+    """
+    if np is None:
+        raise RuntimeError('El simulador de break necesita NumPy (pip install numpy).')
+    semilla = torneo.version_tabla if semilla is None else semilla
+    marca = torneo.actualizado.timestamp() if torneo.actualizado else 0
+    clave = f'break:{torneo.pk}:{torneo.version_tabla}:{marca}:{simulaciones}:{semilla}'
+    cache = _cache()
+    guardado = cache.get(clave)
+    if guardado is not None:
+        return guardado
+
+    inicio = time.perf_counter()
+    tabla = tabla_torneo(torneo)
+    rondas, salas_fijas = _rondas_restantes(torneo)
+    conteo = _simular(tabla, torneo.n_clasificados, rondas, salas_fijas, simulaciones, semilla)
+    resultado = ResultadoSimulacion(
+        filas=[(fila, float(c) / simulaciones) for fila, c in zip(tabla, conteo) if not fila.es_swing],
+        simulaciones=simulaciones,
+        rondas_restantes=rondas,
+        segundos=time.perf_counter() - inicio,
+    )
+    cache.set(clave, resultado, _timeout())
+    return resultado
+
+
+def _simular(tabla: List[FilaTabla], n_clasificados: int, rondas: int,
+             salas_fijas: Optional[List[Tuple[int, int]]], simulaciones: int, semilla: int):
+    """Veces que cada fila de `tabla` quedó entre los n_clasificados."""
+    n = len(tabla)
+    relleno = -n % 4  # swings virtuales si todavía no se crearon
+    total = n + relleno
+
+    puntos0 = np.zeros(total)
+    speakers0 = np.zeros(total)
+    puntos0[:n] = [f.puntos for f in tabla]
+    speakers0[:n] = [f.speakers_total for f in tabla]
+    elegible = np.zeros(total, dtype=bool)
+    elegible[:n] = [not f.es_swing for f in tabla]
+
+    # Speakers esperados por ronda (2 oradores); sin rondas jugadas, la media del torneo
+    por_ronda = np.array([2 * f.speakers_prom for f in tabla] + [0.0] * relleno)
+    media = por_ronda[por_ronda > 0].mean() if (por_ronda > 0).any() else 150.0
+    por_ronda[por_ronda <= 0] = media
+
+    fijas = None
+    if salas_fijas:
+        indice = {f.id: i for i, f in enumerate(tabla)}
+        fijas = np.array([indice[eq] for _, eq in salas_fijas], dtype=np.intp)
+        if fijas.size != total:
+            fijas = None  # cuadro a medio armar: emparejar como las demás
+
+    k = min(n_clasificados, int(elegible.sum()))
+    # Las 24 formas de repartir 3/2/1/0 en una sala
+    repartos = 3 - np.array(list(permutations(range(4))), dtype=np.float64)
+    rng = np.random.default_rng(semilla)
+    conteo = np.zeros(total, dtype=np.int64)
+    hechas = 0
+    while hechas < simulaciones:
+        s = min(LOTE, simulaciones - hechas)
+        puntos = np.repeat(puntos0[None, :], s, axis=0)
+        for r in range(rondas):
+            if r == 0 and fijas is not None:
+                orden = np.broadcast_to(fijas, (s, total))
+            else:
+                orden = np.argsort(-(puntos * 1e6 + speakers0 + r * por_ronda), axis=1)
+            ganados = repartos[rng.integers(0, 24, (s, total // 4))].reshape(s, total)
+            np.put_along_axis(puntos, orden, np.take_along_axis(puntos, orden, 1) + ganados, axis=1)
+
+        speakers = speakers0 + rondas * por_ronda + rng.normal(
+            0.0, DESVIO_ORADOR * np.sqrt(2 * rondas) if rondas else 0.0, (s, total)
+        )
+        clave = np.where(elegible, puntos * 1e6 + speakers, -np.inf)
+        if k > 0:
+            arriba = np.argpartition(-clave, k - 1, axis=1)[:, :k]
+            conteo += np.bincount(arriba.ravel(), minlength=total)
+        hechas += s
+    return conteo[:n]
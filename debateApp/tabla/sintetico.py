@@ -0,0 +1,56 @@
+"""
+Torneos sintéticos deterministas (benchmarks y pruebas de carga).
+
+Con la misma semilla se generan siempre los mismos equipos, oradores y votos.
+"""
+from __future__ import annotations
+
+import random
+from typing import Dict, List, Tuple
+
+from .models import Torneo, Ronda, SalaEquipo
+from .services import crear_equipos_en_bloque
+
+
+def crear_torneo_sintetico(n_equipos: int, n_rondas: int = 5, n_clasificados: int = 16,
+                           semilla: int = 0) -> Torneo:
+    """Torneo con `n_equipos` equipos (2 oradores c/u) y sus rondas clasificatorias."""
+    torneo = Torneo.objects.create(
+        nombre=f'Sintético {n_equipos} (semilla {semilla})',
+        responsable='bench',
+        n_equipos=n_equipos,
+        n_clasificados=n_clasificados,
+        n_rondas=n_rondas,
+    )
+    crear_equipos_en_bloque(torneo, [
+        (f'Equipo {i:04d}', f'Oradora {i:04d}-A', f'Orador {i:04d}-B')
+        for i in range(1, n_equipos + 1)
+    ])
+    Ronda.objects.bulk_create([Ronda(torneo=torneo, numero=n) for n in range(1, n_rondas + 1)])
+    return torneo
+
+
+def _votos_sala(rnd: random.Random, n: int) -> List[Tuple[int, int, int]]:
+    rankings = list(range(1, n + 1))
+    rnd.shuffle(rankings)
+    return [(r, rnd.randint(60, 90), rnd.randint(60, 90)) for r in rankings]
+
+
+def votos_aleatorios(paquetes, rnd: random.Random) -> List[Tuple[SalaEquipo, int, int, int]]:
+    """Valores para guardar_resultados a partir de salas_con_participaciones()."""
+    valores = []
+    for _, ses in paquetes:
+        valores += [(se, *voto) for se, voto in zip(ses, _votos_sala(rnd, len(ses)))]
+    return valores
+
+
+def post_votos(paquetes, rnd: random.Random) -> Dict[str, int]:
+    """Datos de POST para ronda_view (mismos nombres de campo que ronda.html)."""
+    datos = {}
+    for sala, ses in paquetes:
+        for idx, (ranking, or1, or2) in enumerate(_votos_sala(rnd, len(ses))):
+            prefix = f's{sala.id}_{idx}_'
+            datos[prefix + 'ranking'] = ranking
+            datos[prefix + 'orador1'] = or1
+            datos[prefix + 'orador2'] = or2
+    return datos
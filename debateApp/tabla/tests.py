@@ -1,3 +1,1578 @@
-from django.test import TestCase
+import json
+import os
+import random
+import re
+import tempfile
+from array import array
+from datetime import timedelta
+from io import BytesIO, StringIO
 
-# Create your tests here.
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.contrib.auth.models import User
+from django.core.cache import cache, caches
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.db.backends.sqlite3.base import DatabaseWrapper as SqliteDatabaseWrapper
+from django.http import HttpResponse
+from django.test import SimpleTestCase, TestCase
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.utils import timezone
+from unittest import mock, skipUnless
+
+from .cache import invalidar_tabla, tabla_oradores, tabla_torneo, tabla_tras_ronda
+from .eliminatorias import planificar, serpentina, validar_clasificados
+from .emparejamiento import MotorGreedy, MotorOptimo
+from . import geo, simulacion, trabajos
+from .eventos import canal_torneo, flujo_sse, hay_suscriptores, obtener_backend, publicar
+from .forms import TorneoForm
+from .importar import leer_equipos
+from .middleware import InstrumentacionMiddleware, PresupuestoConsultasExcedido
+from .models import (
+    Torneo, Equipo, Debatiente, Ronda, Sala, SalaEquipo, ResultadoSala, EventoResultado, Trabajo,
+)
+from .services import (
+    PUNTOS_POR_RANKING,
+    RondaYaCerrada,
+    VersionObsoleta,
+    avanzar_eliminatorias,
+    generar_emparejamientos,
+    cerrar_ronda_y_actualizar_tabla,
+    corregir_votos_sala,
+    crear_equipos_en_bloque,
+    cursor_torneo,
+    guardar_resultados,
+    reabrir_ronda,
+    reconstruir_agregados,
+    registrar_votos_sala,
+    salas_con_participaciones,
+    torneos_cerca,
+    torneos_en_zona,
+)
+
+
+# Un plan es sospechoso si recorre una tabla completa o si ordena en un B-tree temporal
+TABLA_COMPLETA = r'^SCAN (TABLE )?tabla_'
+PLAN_PROHIBIDO = re.compile(TABLA_COMPLETA + '|TEMP B-TREE')
+# El panel pagina por clave: recorre el índice de Torneo en orden y corta con LIMIT
+PLAN_PANEL = re.compile(r'^SCAN (TABLE )?tabla_(?!torneo USING (COVERING )?INDEX )|TEMP B-TREE')
+
+
+@skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN es específico de SQLite')
+class PlanesDeConsultaTests(TestCase):
+    """
+    Corre las consultas calientes de views.py/services.py contra ~10k equipos
+    y verifica con EXPLAIN QUERY PLAN que todas usan índices.
+    """
+    N_TORNEOS = 25
+    EQUIPOS_POR_TORNEO = 400
+
+    @classmethod
+    def setUpTestData(cls):
+        rnd = random.Random(2024)
+        for k in range(cls.N_TORNEOS):
+            torneo = Torneo.objects.create(
+                nombre=f'Torneo {k}', responsable='Tab',
+                n_equipos=cls.EQUIPOS_POR_TORNEO, n_clasificados=16, n_rondas=3,
+            )
+            Equipo.objects.bulk_create([
+                Equipo(torneo=torneo, nombre=f'Equipo {i}')
+                for i in range(cls.EQUIPOS_POR_TORNEO)
+            ])
+            Ronda.objects.bulk_create([Ronda(torneo=torneo, numero=n) for n in (1, 2, 3)])
+            for numero in (1, 2):
+                ronda = torneo.rondas.get(numero=numero)
+                generar_emparejamientos(ronda)
+                resultados = []
+                for _, ses in salas_con_participaciones(ronda):
+                    rankings = [1, 2, 3, 4]
+                    rnd.shuffle(rankings)
+                    resultados += [
+                        ResultadoSala(
+                            sala_equipo=se, ranking=r, puntos=PUNTOS_POR_RANKING[r],
+                            orador1=rnd.randint(60, 90), orador2=rnd.randint(60, 90),
+                        )
+                        for se, r in zip(ses, rankings)
+                    ]
+                ResultadoSala.objects.bulk_create(resultados)
+                if numero == 1:
+                    cerrar_ronda_y_actualizar_tabla(ronda)
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        cls.torneo = Torneo.objects.get(nombre='Torneo 7')
+        cls.user = User.objects.create_user('tab', password='x')
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def assertPlanesConIndices(self, funcion, prohibido=PLAN_PROHIBIDO):
+        with CaptureQueriesContext(connection) as consultas:
+            funcion()
+        revisadas = 0
+        for consulta in consultas.captured_queries:
+            sql = consulta['sql']
+            if not sql.startswith(('SELECT', 'UPDATE', 'DELETE')) or 'tabla_' not in sql:
+                continue
+            with connection.cursor() as cursor:
+                cursor.execute('EXPLAIN QUERY PLAN ' + sql)
+                plan = [fila[-1] for fila in cursor.fetchall()]
+            malos = [paso for paso in plan if prohibido.search(paso)]
+            self.assertFalse(malos, f'{sql}\n' + '\n'.join(plan))
+            revisadas += 1
+        self.assertGreater(revisadas, 0)
+
+    def test_tabla_de_posiciones(self):
+        self.assertPlanesConIndices(lambda: tabla_torneo(self.torneo))
+
+    def test_tabla_de_oradores(self):
+        # Ordenar por agregados exige un B-tree temporal; el resultado queda en caché
+        self.assertPlanesConIndices(lambda: tabla_oradores(self.torneo), re.compile(TABLA_COMPLETA))
+
+    def test_generar_emparejamientos(self):
+        ronda = self.torneo.rondas.get(numero=3)
+        self.assertPlanesConIndices(lambda: generar_emparejamientos(ronda))
+
+    def test_cerrar_ronda(self):
+        ronda = self.torneo.rondas.get(numero=2)
+        self.assertPlanesConIndices(lambda: cerrar_ronda_y_actualizar_tabla(ronda))
+
+    def test_tabla_tras_ronda_y_reabrir(self):
+        self.assertPlanesConIndices(lambda: self.client.get(f'/torneo/{self.torneo.id}/tabla/', {'ronda': 1}))
+        ronda = self.torneo.rondas.get(numero=1)
+        self.assertPlanesConIndices(lambda: reabrir_ronda(ronda))
+
+    def test_corregir_votos_sala(self):
+        sala, ses = salas_con_participaciones(self.torneo.rondas.get(numero=1))[0]
+        valores = [(se, 5 - se.resultado.ranking, se.resultado.orador1, 90) for se in ses]
+        self.assertPlanesConIndices(lambda: corregir_votos_sala(sala, sala.version, valores))
+
+    def test_ronda_view_get(self):
+        self.assertPlanesConIndices(
+            lambda: self.client.get(f'/torneo/{self.torneo.id}/ronda/2/')
+        )
+
+    def test_torneo_tabla_y_entre_rondas(self):
+        self.assertPlanesConIndices(lambda: (
+            self.client.get(f'/torneo/{self.torneo.id}/tabla/'),
+            self.client.get(f'/torneo/{self.torneo.id}/entre/1/'),
+        ))
+
+    def test_panel_de_inicio(self):
+        self.assertPlanesConIndices(lambda: self.client.get('/'), PLAN_PANEL)
+        self.assertPlanesConIndices(lambda: self.client.get('/?mios=1'), PLAN_PANEL)
+        cursor = cursor_torneo(Torneo.objects.order_by('-creado', '-id')[10])
+        self.assertPlanesConIndices(lambda: self.client.get('/', {'cursor': cursor}), PLAN_PANEL)
+
+    def test_torneo_continuar(self):
+        self.assertPlanesConIndices(
+            lambda: self.client.get(f'/torneo/{self.torneo.id}/continuar/')
+        )
+
+
+@skipUnless(
+    connection.vendor == 'sqlite' and 'DATABASE_URL' not in os.environ,
+    'Ajustes del SQLite local de settings.py',
+)
+class AjustesSqliteTests(SimpleTestCase):
+    """Los PRAGMA de settings.py se aplican a cada conexión nueva (la base de tests está en memoria)."""
+
+    def test_pragmas(self):
+        with tempfile.TemporaryDirectory() as directorio:
+            ajustes = {**connection.settings_dict, 'NAME': os.path.join(directorio, 'ajustes.sqlite3')}
+            conexion = SqliteDatabaseWrapper(ajustes, alias='ajustes')
+            try:
+                with conexion.cursor() as cursor:
+                    for pragma, esperado in (
+                        ('journal_mode', 'wal'), ('busy_timeout', 20000), ('synchronous', 1),
+                        ('temp_store', 2), ('cache_size', -20000), ('mmap_size', 134217728),
+                    ):
+                        cursor.execute(f'PRAGMA {pragma}')
+                        self.assertEqual(cursor.fetchone()[0], esperado, pragma)
+                self.assertEqual(conexion.transaction_mode, 'IMMEDIATE')
+            finally:
+                conexion.close()
+
+
+class MotorEmparejamientoTests(TestCase):
+    """El motor óptimo arma las mismas salas que el greedy y solo mejora las posiciones."""
+
+    def _salas(self, motor, puntos, historial=None, ronda=1):
+        historial = historial or array('l', [0]) * (4 * len(puntos))
+        return motor.emparejar(array('l', puntos), historial, ronda)
+
+    def _dispersion(self, puntos, salas):
+        return sum(max(puntos[i] for i, _ in sala) - min(puntos[i] for i, _ in sala) for sala in salas)
+
+    def test_respeta_los_bloques_con_arrastres(self):
+        puntos = [9, 6, 6, 6, 6, 3, 3, 3]
+        salas = self._salas(MotorOptimo(), puntos)
+        self.assertEqual([sorted(puntos[i] for i, _ in sala) for sala in salas],
+                         [[6, 6, 6, 9], [3, 3, 3, 6]])
+
+    def test_misma_dispersion_que_el_greedy(self):
+        rnd = random.Random(4)
+        for _ in range(50):
+            puntos = sorted((rnd.randint(0, 15) for _ in range(4 * rnd.randint(2, 20))), reverse=True)
+            historial = array('l', (rnd.randint(0, 3) for _ in range(4 * len(puntos))))
+            optimo = self._salas(MotorOptimo(), puntos, historial)
+            greedy = self._salas(MotorGreedy(), puntos, historial)
+            self.assertEqual([sorted(i for i, _ in s) for s in optimo], [sorted(i for i, _ in s) for s in greedy])
+            self.assertEqual(self._dispersion(puntos, optimo), self._dispersion(puntos, greedy))
+            for sala in optimo:
+                self.assertEqual(sorted(p for _, p in sala), [0, 1, 2, 3])
+
+    def test_balancea_posiciones(self):
+        # Orden de tabla al azar en cada ronda: el óptimo nunca queda peor que la rotación fija
+        rnd = random.Random(9)
+        n = 32
+        desbalance = {}
+        for motor in (MotorGreedy(), MotorOptimo()):
+            historial = array('l', [0]) * (4 * n)
+            orden = list(range(n))
+            for ronda in range(1, 9):
+                rnd.shuffle(orden)
+                local = array('l', (historial[4 * e + p] for e in orden for p in range(4)))
+                for sala in motor.emparejar(array('l', [0] * n), local, ronda):
+                    for i, p in sala:
+                        historial[4 * orden[i] + p] += 1
+            desbalance[type(motor)] = sum(
+                max(historial[4 * e:4 * e + 4]) - min(historial[4 * e:4 * e + 4]) for e in range(n)
+            )
+        self.assertLess(desbalance[MotorOptimo], desbalance[MotorGreedy])
+
+    def test_misma_sala_cuatro_rondas_cubre_todas_las_posiciones(self):
+        historial = array('l', [0]) * 16
+        for ronda in range(1, 5):
+            for sala in self._salas(MotorOptimo(), [3, 2, 1, 0], historial, ronda):
+                for i, p in sala:
+                    historial[4 * i + p] += 1
+        self.assertEqual(list(historial), [1] * 16)
+
+
+class CostoConstanteTests(TestCase):
+    """Las operaciones por ronda hacen las mismas consultas con 16 o con 160 equipos."""
+
+    def _torneo(self, n_equipos):
+        torneo = Torneo.objects.create(
+            nombre=f'Costo {n_equipos}', responsable='Tab',
+            n_equipos=n_equipos, n_clasificados=4, n_rondas=3,
+        )
+        equipos = Equipo.objects.bulk_create([
+            Equipo(torneo=torneo, nombre=f'E{i:03d}') for i in range(n_equipos)
+        ])
+        Debatiente.objects.bulk_create([
+            Debatiente(equipo=e, nombre=f'{e.nombre}-{k}') for e in equipos for k in (1, 2)
+        ])
+        Ronda.objects.bulk_create([Ronda(torneo=torneo, numero=n) for n in (1, 2, 3)])
+        return torneo
+
+    def _consultas(self, funcion):
+        with CaptureQueriesContext(connection) as consultas:
+            funcion()
+        return len(consultas.captured_queries)
+
+    def test_generar_emparejamientos(self):
+        costos = []
+        for n in (16, 160):
+            ronda = self._torneo(n).rondas.get(numero=1)
+            costos.append(self._consultas(lambda: generar_emparejamientos(ronda)))
+            self.assertEqual(SalaEquipo.objects.filter(sala__ronda=ronda).count(), n)
+        self.assertEqual(costos[0], costos[1])
+
+    def test_cerrar_ronda(self):
+        resumenes = []
+        for n in (16, 160):
+            ronda = self._torneo(n).rondas.get(numero=1)
+            generar_emparejamientos(ronda)
+            guardar_resultados(ronda, [
+                (se, r, 75, 75) for _, ses in salas_con_participaciones(ronda)
+                for r, se in enumerate(ses, start=1)
+            ])
+            with CaptureQueriesContext(connection) as consultas:
+                resumen = cerrar_ronda_y_actualizar_tabla(ronda)
+            # ResumenCierre cuenta lo mismo que se ejecutó (sin los SAVEPOINT del atomic)
+            self.assertEqual(
+                resumen.consultas,
+                sum(1 for q in consultas.captured_queries if 'SAVEPOINT' not in q['sql']),
+            )
+            self.assertEqual(resumen.equipos, n)
+            resumenes.append(resumen)
+        self.assertEqual(resumenes[0].consultas, resumenes[1].consultas)
+
+    @override_settings(TABLA_TRABAJOS_EN_LINEA=False)
+    def test_carga_de_toda_la_ronda(self):
+        self.client.force_login(User.objects.create_user('tab', password='x'))
+        costos = []
+        for n in (16, 160):
+            torneo = self._torneo(n)
+            ronda = torneo.rondas.get(numero=1)
+            generar_emparejamientos(ronda)
+            datos = {}
+            for sala, ses in salas_con_participaciones(ronda):
+                for i, se in enumerate(ses):
+                    datos.update({
+                        f's{sala.id}_{i}_ranking': i + 1,
+                        f's{sala.id}_{i}_orador1': 75, f's{sala.id}_{i}_orador2': 75,
+                    })
+            costos.append(self._consultas(lambda: self.client.post(f'/torneo/{torneo.id}/ronda/1/', datos)))
+            self.assertEqual(ResultadoSala.objects.filter(sala_equipo__sala__ronda=ronda).count(), n)
+        self.assertEqual(costos[0], costos[1])
+
+
+class ReconstruccionTablaTests(TestCase):
+    """Bitácora de votos y comando reconstruir_tabla."""
+
+    def setUp(self):
+        self.torneo = Torneo.objects.create(
+            nombre='Reconstrucción', responsable='Tab', n_equipos=8, n_clasificados=4, n_rondas=2,
+        )
+        Equipo.objects.bulk_create([
+            Equipo(torneo=self.torneo, nombre=f'Equipo {i}') for i in range(8)
+        ])
+        self.ronda = Ronda.objects.create(torneo=self.torneo, numero=1)
+        generar_emparejamientos(self.ronda)
+        self.valores = [
+            (se, r, 70 + r, 80 - r)
+            for _, ses in salas_con_participaciones(self.ronda)
+            for se, r in zip(ses, (1, 2, 3, 4))
+        ]
+
+    def test_bitacora_registra_cargas_y_correcciones(self):
+        guardar_resultados(self.ronda, self.valores)
+        guardar_resultados(self.ronda, self.valores[:4])
+        tipos = list(EventoResultado.objects.values_list('tipo', flat=True).order_by('id'))
+        self.assertEqual(tipos, [EventoResultado.CARGA] * 8 + [EventoResultado.CORRECCION] * 4)
+
+        evento = EventoResultado.objects.first()
+        evento.ranking = 4
+        with self.assertRaises(ValueError):
+            evento.save()
+
+    def test_reconstruir_detecta_y_corrige_derivas(self):
+        guardar_resultados(self.ronda, self.valores)
+        cerrar_ronda_y_actualizar_tabla(self.ronda)
+        esperado = dict(Equipo.objects.values_list('id', 'puntos'))
+
+        salida = StringIO()
+        call_command('reconstruir_tabla', procesos=1, stdout=salida)
+        self.assertIn('0 equipos corregidos', salida.getvalue())
+
+        # Simula un cierre duplicado sobre un equipo
+        equipo = Equipo.objects.filter(torneo=self.torneo, puntos__gt=0).first()
+        Equipo.objects.filter(pk=equipo.pk).update(puntos=equipo.puntos * 2)
+
+        salida = StringIO()
+        call_command('reconstruir_tabla', procesos=1, dry_run=True, stdout=salida)
+        self.assertIn(f'(id {equipo.pk})', salida.getvalue())
+        self.assertEqual(Equipo.objects.get(pk=equipo.pk).puntos, equipo.puntos * 2)
+
+        version = Torneo.objects.get(pk=self.torneo.pk).version_tabla
+        call_command('reconstruir_tabla', torneo=[self.torneo.pk], procesos=1, stdout=StringIO())
+        self.assertEqual(dict(Equipo.objects.values_list('id', 'puntos')), esperado)
+        self.assertEqual(Torneo.objects.get(pk=self.torneo.pk).version_tabla, version + 1)
+
+    def test_lee_y_corrige_en_una_sola_transaccion(self):
+        guardar_resultados(self.ronda, self.valores)
+        cerrar_ronda_y_actualizar_tabla(self.ronda)
+        esperado = dict(Equipo.objects.values_list('id', 'puntos'))
+        Equipo.objects.filter(torneo=self.torneo).update(puntos=0)
+
+        with CaptureQueriesContext(connection) as consultas:
+            derivas = reconstruir_agregados(self.torneo.id)
+        sql = [q['sql'] for q in consultas.captured_queries]
+        self.assertTrue(derivas)
+        # Todo entre el primer SAVEPOINT y su RELEASE: lectura del torneo, sumas y escritura
+        self.assertTrue(sql[0].startswith('SAVEPOINT'))
+        self.assertIn('"tabla_torneo"', sql[1])
+        liberado = next(i for i, q in enumerate(sql) if q.startswith('RELEASE SAVEPOINT'))
+        self.assertTrue(any(q.startswith('UPDATE "tabla_equipo"') for q in sql[:liberado]))
+        self.assertEqual(dict(Equipo.objects.values_list('id', 'puntos')), esperado)
+
+
+class TablaEnCacheTests(TestCase):
+    """tabla_torneo en caché por versión: se invalida al cerrar una ronda o editar un equipo."""
+
+    def setUp(self):
+        cache.clear()
+        self.torneo = Torneo.objects.create(
+            nombre='Caché', responsable='Tab', n_equipos=4, n_clasificados=4, n_rondas=1,
+        )
+        Equipo.objects.bulk_create([Equipo(torneo=self.torneo, nombre=f'E{i}') for i in range(4)])
+        self.ronda = Ronda.objects.create(torneo=self.torneo, numero=1)
+
+    def test_la_segunda_lectura_sale_de_la_cache(self):
+        with self.assertNumQueries(1):
+            primera = tabla_torneo(self.torneo)
+        with self.assertNumQueries(0):
+            self.assertEqual(tabla_torneo(self.torneo), primera)
+
+    def test_cerrar_ronda_invalida(self):
+        generar_emparejamientos(self.ronda)
+        _, ses = salas_con_participaciones(self.ronda)[0]
+        guardar_resultados(self.ronda, [(se, r, 75, 75) for r, se in enumerate(ses, start=1)])
+        self.assertEqual({f.puntos for f in tabla_torneo(self.torneo)}, {0})
+
+        cerrar_ronda_y_actualizar_tabla(self.ronda)
+        self.torneo.refresh_from_db()
+        self.assertEqual(tabla_torneo(self.torneo)[0].puntos, PUNTOS_POR_RANKING[1])
+
+    def test_editar_equipo_invalida(self):
+        self.assertNotIn('Renombrado', [f.nombre for f in tabla_torneo(self.torneo)])
+        equipo = self.torneo.equipos.first()
+        self.client.force_login(User.objects.create_user('tab', password='x'))
+        self.client.post(f'/equipo/{equipo.id}/editar/', {'nombre': 'Renombrado', 'es_swing': ''})
+
+        self.torneo.refresh_from_db()
+        self.assertIn('Renombrado', [f.nombre for f in tabla_torneo(self.torneo)])
+
+
+class EliminatoriasTests(TestCase):
+    """Cuadro precalculado y avance de ganadores por llave."""
+
+    def test_plan_del_break(self):
+        for n in (4, 16, 64, 256):
+            validar_clasificados(n)
+        for n in (0, 8, 12, 32, 48):
+            with self.assertRaises(ValueError):
+                validar_clasificados(n)
+
+        self.assertEqual(serpentina(16), [(1, 8, 9, 16), (2, 7, 10, 15), (3, 6, 11, 14), (4, 5, 12, 13)])
+        self.assertEqual(
+            [(f.nombre, f.equipos, len(f.salas)) for f in planificar(64)],
+            [('Cuartos', 64, 16), ('Semifinal', 16, 4), ('Final', 4, 1)],
+        )
+
+    def test_break_completo_hasta_el_campeon(self):
+        torneo = Torneo.objects.create(
+            nombre='Break', responsable='Tab', n_equipos=16, n_clasificados=16, n_rondas=1,
+        )
+        Equipo.objects.bulk_create([
+            Equipo(torneo=torneo, nombre=f'Equipo {i:02d}', puntos=100 - i) for i in range(16)
+        ])
+        semillas = list(torneo.equipos.order_by('-puntos').values_list('id', flat=True))
+        Ronda.objects.create(torneo=torneo, numero=1, emparejada=True, cerrada=True)
+        self.client.force_login(User.objects.create_user('tab', password='x'))
+        url = f'/torneo/{torneo.id}/eliminatorias/'
+
+        def jugar(numero, gana):
+            ronda = torneo.rondas.get(numero=numero)
+            valores = []
+            for _, ses in salas_con_participaciones(ronda):
+                ranking = {se.equipo_id: r for r, se in enumerate(gana(ses), start=1)}
+                valores += [(se, ranking[se.equipo_id], 70, 70) for se in ses]
+            guardar_resultados(ronda, valores)
+            cerrar_ronda_y_actualizar_tabla(ronda)
+
+        self.client.get(url)
+        semis = torneo.rondas.get(numero=2)
+        self.assertEqual(
+            list(semis.salas.order_by('llave').values_list('llave', 'nombre')),
+            [(1, 'Semifinal 1'), (2, 'Semifinal 2'), (3, 'Semifinal 3'), (4, 'Semifinal 4')],
+        )
+        primera = semis.salas.get(llave=1).participaciones.order_by('posicion')
+        self.assertEqual(
+            sorted(primera.values_list('equipo_id', flat=True)),
+            sorted(semillas[i - 1] for i in (1, 8, 9, 16)),
+        )
+
+        # En semifinales gana la peor semilla de cada sala (CO)
+        jugar(2, lambda ses: sorted(ses, key=lambda se: se.posicion != 'CO'))
+        self.client.get(url)
+        final = torneo.rondas.get(numero=3)
+        self.assertEqual(
+            list(final.salas.get().participaciones.order_by('posicion')
+                 .values_list('posicion', 'equipo_id')),
+            sorted(zip(['OG', 'OO', 'CG', 'CO'], [semillas[i - 1] for i in (16, 15, 14, 13)])),
+        )
+
+        # En la final gana OG (ganador de la llave 1)
+        jugar(3, lambda ses: sorted(ses, key=lambda se: se.posicion != 'OG'))
+        self.client.get(url)
+        torneo.refresh_from_db()
+        self.assertTrue(torneo.cerrado)
+        self.assertEqual(torneo.ganador_id, semillas[15])
+
+    def test_clasificados_de_torneos_anteriores(self):
+        datos = {'nombre': 'Viejo', 'responsable': 'Tab', 'n_equipos': 16, 'n_rondas': 1}
+        form = TorneoForm({**datos, 'n_clasificados': 8})
+        self.assertIn('Los más cercanos a 8: 4 o 16.', form.errors['n_clasificados'][0])
+
+        # Los torneos creados antes de la validación conservan su valor: el
+        # break avisa al armarse y no crea nada
+        viejo = Torneo.objects.create(n_clasificados=12, **datos)
+        Equipo.objects.bulk_create([Equipo(torneo=viejo, nombre=f'E{i}') for i in range(16)])
+        Ronda.objects.create(torneo=viejo, numero=1, emparejada=True, cerrada=True)
+        with self.assertRaisesMessage(ValueError, 'No se puede armar el break con 12 clasificados.'):
+            avanzar_eliminatorias(viejo)
+        self.assertFalse(viejo.rondas.filter(numero=2).exists())
+        self.assertEqual(Torneo.objects.get(pk=viejo.pk).n_clasificados, 12)
+
+        # Con el break ya empezado (de antes) se puede seguir editando sin tocar ese campo
+        con_break = Torneo.objects.create(n_clasificados=8, **datos)
+        Ronda.objects.create(torneo=con_break, numero=2, emparejada=True)
+        form = TorneoForm({**datos, 'nombre': 'Renombrado', 'n_clasificados': 8}, instance=con_break)
+        self.assertTrue(form.is_valid(), form.errors)
+        form = TorneoForm({**datos, 'n_clasificados': 32}, instance=con_break)
+        self.assertFalse(form.is_valid())
+        # La página pública nombra sus fases por las salas que tienen
+        con_break.publico = True
+        con_break.save()
+        self.assertContains(self.client.get(f'/publico/torneo/{con_break.id}/eliminatorias/'), 'Viejo')
+
+
+class TablaOradoresTests(TestCase):
+    """Puntajes vinculados a Debatiente y tabla de oradores en caché."""
+
+    def test_tabla_de_oradores(self):
+        torneo = Torneo.objects.create(
+            nombre='Oradores', responsable='Tab', n_equipos=4, n_clasificados=4, n_rondas=2,
+        )
+        crear_equipos_en_bloque(torneo, [(f'E{i}', f'A{i}', f'B{i}') for i in range(4)])
+        for numero, base in ((1, 70), (2, 80)):
+            ronda = Ronda.objects.create(torneo=torneo, numero=numero)
+            generar_emparejamientos(ronda)
+            _, ses = salas_con_participaciones(ronda)[0]
+            guardar_resultados(ronda, [
+                (se, r, base + 2 * int(se.equipo.nombre[1]), base + 2 * int(se.equipo.nombre[1]) + 1)
+                for r, se in enumerate(ses, start=1)
+            ])
+            cerrar_ronda_y_actualizar_tabla(ronda)
+
+        torneo.refresh_from_db()
+        cache.clear()
+        oradores = tabla_oradores(torneo)
+        self.assertEqual(len(oradores), 8)
+        # B3 habló 77 y 87: primer lugar
+        primero = oradores[0]
+        self.assertEqual((primero.nombre, primero.equipo, primero.total, primero.rondas), ('B3', 'E3', 164, 2))
+        self.assertAlmostEqual(primero.promedio, 82.0)
+        self.assertAlmostEqual(primero.desvio, 5.0, places=4)
+        self.assertEqual([o.nombre for o in oradores[-2:]], ['B0', 'A0'])
+
+        with self.assertNumQueries(0):
+            tabla_oradores(torneo)
+
+    def _torneo_jugado(self):
+        torneo = Torneo.objects.create(
+            nombre='Miembros', responsable='Tab', n_equipos=4, n_clasificados=4, n_rondas=1,
+        )
+        crear_equipos_en_bloque(torneo, [(f'E{i}', f'A{i}', f'B{i}') for i in range(4)])
+        ronda = Ronda.objects.create(torneo=torneo, numero=1)
+        generar_emparejamientos(ronda)
+        sala, ses = salas_con_participaciones(ronda)[0]
+        guardar_resultados(ronda, [(se, r, 70 + r, 80) for r, se in enumerate(ses, start=1)])
+        cerrar_ronda_y_actualizar_tabla(ronda)
+        torneo.refresh_from_db()
+        self.client.force_login(User.objects.create_user('tab', password='x'))
+        return torneo, sala
+
+    def test_editar_o_borrar_debatientes_invalida_la_tabla(self):
+        torneo, _ = self._torneo_jugado()
+        self.assertIn('A0', [o.nombre for o in tabla_oradores(torneo)])
+        a0 = Debatiente.objects.get(equipo__torneo=torneo, nombre='A0')
+        self.client.post(f'/miembro/{a0.id}/editar/', {'nombre': 'Ana'})
+        torneo.refresh_from_db()
+        nombres = [o.nombre for o in tabla_oradores(torneo)]
+        self.assertIn('Ana', nombres)
+        self.assertNotIn('A0', nombres)
+
+        self.client.post(f'/miembro/{a0.id}/eliminar/')
+        torneo.refresh_from_db()
+        self.assertNotIn('Ana', [o.nombre for o in tabla_oradores(torneo)])
+
+    def test_cada_puntaje_muestra_su_orador(self):
+        torneo, sala = self._torneo_jugado()
+        respuesta = self.client.get(f'/torneo/{torneo.id}/sala/{sala.id}/votos/')
+        for se in sala.participaciones.select_related('equipo'):
+            numero = se.equipo.nombre[1:]
+            self.assertContains(respuesta, f'_orador1">A{numero}</label>')
+            self.assertContains(respuesta, f'_orador2">B{numero}</label>')
+        self.assertContains(self.client.get(f'/torneo/{torneo.id}/ronda/1/'), '_orador2">B0</label>')
+
+
+class TablaPorRondaTests(TestCase):
+    """Fotos de la tabla por ronda: historial y reapertura por delta."""
+
+    def setUp(self):
+        self.torneo = Torneo.objects.create(
+            nombre='Fotos', responsable='Tab', n_equipos=8, n_clasificados=4, n_rondas=3,
+        )
+        Equipo.objects.bulk_create([Equipo(torneo=self.torneo, nombre=f'E{i}') for i in range(8)])
+        Ronda.objects.bulk_create([Ronda(torneo=self.torneo, numero=n) for n in (1, 2, 3)])
+
+    def _jugar(self, numero, invertir=False):
+        ronda = self.torneo.rondas.get(numero=numero)
+        generar_emparejamientos(ronda)
+        valores = []
+        for _, ses in salas_con_participaciones(ronda):
+            orden = sorted(ses, key=lambda se: se.equipo.nombre, reverse=invertir)
+            valores += [(se, r, 70 + r + numero, 75) for r, se in enumerate(orden, start=1)]
+        guardar_resultados(ronda, valores)
+        cerrar_ronda_y_actualizar_tabla(ronda)
+        self.torneo.refresh_from_db()
+        return ronda
+
+    def test_historial_y_reapertura(self):
+        ronda1 = self._jugar(1)
+        tras_1 = tabla_torneo(self.torneo)
+        self._jugar(2)
+        self.assertEqual(tabla_tras_ronda(self.torneo, 1), tras_1)
+        self.assertEqual(tabla_tras_ronda(self.torneo, 2), tabla_torneo(self.torneo))
+
+        # Corregir la ronda 1 (con la 2 ya cerrada): el resultado es el mismo que recalcular todo
+        reabrir_ronda(ronda1)
+        self.assertFalse(Ronda.objects.get(pk=ronda1.pk).cerrada)
+        self.assertFalse(ronda1.tablas.exists())
+        with self.assertRaises(ValueError):
+            reabrir_ronda(ronda1)
+        self.torneo.refresh_from_db()
+        valores = [
+            (se, 5 - se.resultado.ranking, se.resultado.orador1, 80)
+            for _, ses in salas_con_participaciones(ronda1) for se in ses
+        ]
+        guardar_resultados(ronda1, valores)
+        cerrar_ronda_y_actualizar_tabla(ronda1)
+        self.torneo.refresh_from_db()
+
+        self.assertEqual(reconstruir_agregados(self.torneo.id, aplicar=False), [])
+        self.assertEqual(tabla_tras_ronda(self.torneo, 2), tabla_torneo(self.torneo))
+        por_equipo = {f.id: f for f in tabla_tras_ronda(self.torneo, 1)}
+        for _, ses in salas_con_participaciones(ronda1):
+            for se in ses:
+                fila = por_equipo[se.equipo_id]
+                self.assertEqual(fila.puntos, se.resultado.puntos)
+                self.assertEqual(fila.speakers_total, se.resultado.orador1 + 80)
+
+        self.client.force_login(User.objects.create_user('tab', password='x'))
+        self.assertContains(self.client.get(f'/torneo/{self.torneo.id}/tabla/', {'ronda': 2}), 'Tras ronda 2')
+
+    def test_no_reabre_con_la_fase_siguiente_armada(self):
+        ronda3 = [self._jugar(n) for n in (1, 2, 3)][-1]
+        cuartos = Ronda.objects.create(torneo=self.torneo, numero=4, emparejada=True, cerrada=True)
+        # Clasificatoria después del break
+        with self.assertRaises(ValueError):
+            reabrir_ronda(ronda3)
+        self.assertTrue(Ronda.objects.get(pk=ronda3.pk).cerrada)
+        # Eliminatoria con la fase siguiente armada
+        Ronda.objects.create(torneo=self.torneo, numero=5, emparejada=True)
+        with self.assertRaises(ValueError):
+            reabrir_ronda(cuartos)
+        self.assertTrue(Ronda.objects.get(pk=cuartos.pk).cerrada)
+
+
+class CorreccionVotosTests(TestCase):
+    """Corrección de una sala de una ronda cerrada aplicando solo su delta."""
+
+    def _torneo(self, n_equipos, oradores=False):
+        torneo = Torneo.objects.create(
+            nombre=f'Corrección {n_equipos}', responsable='Tab',
+            n_equipos=n_equipos, n_clasificados=4, n_rondas=3,
+        )
+        equipos = Equipo.objects.bulk_create([Equipo(torneo=torneo, nombre=f'E{i:02d}') for i in range(n_equipos)])
+        if oradores:
+            Debatiente.objects.bulk_create([
+                Debatiente(equipo=e, nombre=f'{e.nombre}-{n}') for e in equipos for n in (1, 2)
+            ])
+        Ronda.objects.bulk_create([Ronda(torneo=torneo, numero=n) for n in (1, 2, 3)])
+        ronda = torneo.rondas.get(numero=1)
+        generar_emparejamientos(ronda)
+        guardar_resultados(ronda, [
+            (se, r, 70 + r, 75) for _, ses in salas_con_participaciones(ronda)
+            for r, se in enumerate(ses, start=1)
+        ])
+        cerrar_ronda_y_actualizar_tabla(ronda)
+        generar_emparejamientos(torneo.rondas.get(numero=2))
+        torneo.refresh_from_db()
+        return torneo, ronda
+
+    def _corregir(self, ronda):
+        sala, ses = salas_con_participaciones(ronda)[0]
+        valores = [(se, 5 - se.resultado.ranking, se.resultado.orador1, 80) for se in ses]
+        with CaptureQueriesContext(connection) as consultas:
+            resumen = corregir_votos_sala(sala, sala.version, valores)
+        return sala, resumen, len(consultas.captured_queries)
+
+    def test_correccion_incremental(self):
+        torneo, ronda = self._torneo(8)
+        sala, resumen, consultas = self._corregir(ronda)
+
+        self.assertEqual(len(resumen.deltas), 4)
+        self.assertEqual(sum(p for p, _ in resumen.deltas.values()), 0)
+        self.assertEqual(reconstruir_agregados(torneo.id, aplicar=False), [])
+        torneo.refresh_from_db()
+        self.assertEqual(tabla_tras_ronda(torneo, 1), tabla_torneo(torneo))
+        self.assertEqual(
+            EventoResultado.objects.filter(sala_equipo__sala=sala, tipo=EventoResultado.CORRECCION).count(), 4,
+        )
+        # La ronda 2 estaba emparejada con la tabla vieja: se informa, no se toca
+        self.assertEqual([r.numero for r in resumen.desactualizadas], [2])
+        ronda2 = torneo.rondas.get(numero=2)
+        self.assertTrue(ronda2.emparejada)
+        self.assertEqual(ronda2.salas.count(), 2)
+
+        # Con versión vieja o con la ronda abierta no hay corrección
+        with self.assertRaises(VersionObsoleta):
+            corregir_votos_sala(sala, sala.version - 1, [])
+        abierta = ronda2.salas.first()
+        with self.assertRaises(ValueError):
+            corregir_votos_sala(abierta, abierta.version, [])
+
+        # El costo no depende del tamaño del torneo
+        _, _, consultas_grande = self._corregir(self._torneo(64)[1])
+        self.assertEqual(consultas_grande, consultas)
+
+    def test_solo_cambian_los_oradores(self):
+        torneo, ronda = self._torneo(8, oradores=True)
+        antes = {fila[1]: fila[4] for fila in tabla_oradores(torneo)}
+        sala, ses = salas_con_participaciones(ronda)[0]
+        # Mismo ranking y misma suma: la tabla de equipos no se mueve
+        valores = [(se, se.resultado.ranking, se.resultado.orador2, se.resultado.orador1) for se in ses]
+        resumen = corregir_votos_sala(sala, sala.version, valores)
+
+        self.assertEqual(resumen.deltas, {})
+        torneo.refresh_from_db()
+        despues = {fila[1]: fila[4] for fila in tabla_oradores(torneo)}
+        for se in ses:
+            nombre = se.equipo.nombre
+            self.assertEqual(despues[f'{nombre}-1'], antes[f'{nombre}-2'])
+            self.assertEqual(despues[f'{nombre}-2'], antes[f'{nombre}-1'])
+
+    def test_no_corrige_clasificatorias_con_el_break_armado(self):
+        torneo, ronda = self._torneo(8)
+        Ronda.objects.create(torneo=torneo, numero=torneo.n_rondas + 1, emparejada=True)
+        sala = salas_con_participaciones(ronda)[0][0]
+        antes = dict(Equipo.objects.values_list('id', 'puntos'))
+        with self.assertRaisesMessage(ValueError, 'La fase siguiente ya está armada'):
+            self._corregir(ronda)
+        self.assertEqual(dict(Equipo.objects.values_list('id', 'puntos')), antes)
+        self.assertEqual(Sala.objects.get(pk=sala.pk).version, sala.version)
+
+    def test_vista_de_correccion(self):
+        torneo, ronda = self._torneo(8)
+        sala, ses = salas_con_participaciones(ronda)[0]
+        self.client.force_login(User.objects.create_user('tab', password='x'))
+        url = f'/torneo/{torneo.id}/sala/{sala.id}/votos/'
+        self.assertContains(self.client.get(url), 'Corregir votos')
+        salas_ronda2 = list(torneo.rondas.get(numero=2).salas.values_list('id', flat=True))
+        datos = {'version': sala.version}
+        for i, se in enumerate(ses):
+            datos.update({
+                f's{sala.id}_{i}_ranking': 5 - se.resultado.ranking,
+                f's{sala.id}_{i}_orador1': 75, f's{sala.id}_{i}_orador2': 75,
+            })
+        respuesta = self.client.post(url, datos, follow=True)
+        self.assertRedirects(respuesta, url)
+        self.assertContains(respuesta, 'Emparejadas con la tabla anterior (no se modificaron): ronda 2.')
+        # El cuadro de la ronda 2 sigue igual
+        ronda2 = torneo.rondas.get(numero=2)
+        self.assertTrue(ronda2.emparejada)
+        self.assertEqual(list(ronda2.salas.values_list('id', flat=True)), salas_ronda2)
+        self.assertEqual(reconstruir_agregados(torneo.id, aplicar=False), [])
+
+
+class ImportarEquiposTests(TestCase):
+    """Carga de equipos desde CSV/TSV: lectura, errores por línea y la vista."""
+
+    def test_separadores_encabezado_y_bom(self):
+        for separador in (',', ';', '\t'):
+            with self.subTest(separador=repr(separador)):
+                texto = '\n'.join(
+                    separador.join(fila) for fila in
+                    [('Equipo', 'Integrante 1', 'Integrante 2'), ('Ñandú', 'Inés', 'José'), ('Otro', 'A', 'B')]
+                )
+                filas, errores = leer_equipos(BytesIO(('\ufeff' + texto + '\r\n\r\n').encode()))
+                self.assertEqual(errores, [])
+                self.assertEqual(filas, [('Ñandú', 'Inés', 'José'), ('Otro', 'A', 'B')])
+
+    def test_filas_invalidas(self):
+        texto = '\n'.join([
+            'Uno,A,B',
+            'Dos,A',
+            'Tres,A,',
+            f'{"x" * 121},A,B',
+            'UNO,C,D',
+        ])
+        filas, errores = leer_equipos(BytesIO(texto.encode()))
+        self.assertEqual(len(errores), 4)
+        self.assertTrue(errores[0].startswith('Línea 2:'))
+        self.assertTrue(errores[1].startswith('Línea 3:'))
+        self.assertIn('120 caracteres', errores[2])
+        self.assertEqual(errores[3], 'Línea 5: el equipo "UNO" ya aparece en la línea 1.')
+
+    def test_codificacion_y_archivo_sin_equipos(self):
+        self.assertEqual(
+            leer_equipos(BytesIO('Peña,A,B\n'.encode('latin-1'))),
+            ([], ['El archivo debe estar codificado en UTF-8.']),
+        )
+        self.assertEqual(
+            leer_equipos(BytesIO(b'equipo,integrante1,integrante2\n')),
+            ([], ['El archivo no contiene equipos.']),
+        )
+
+    def test_vista(self):
+        torneo = Torneo.objects.create(
+            nombre='Import', responsable='Tab', n_equipos=2, n_clasificados=4, n_rondas=1,
+        )
+        Ronda.objects.create(torneo=torneo, numero=1)
+        self.client.force_login(User.objects.create_user('tab', password='x'))
+        url = f'/torneo/{torneo.id}/equipos/carga/'
+
+        def subir(nombre, contenido):
+            return self.client.post(url, {'archivo': SimpleUploadedFile(nombre, contenido)}, follow=True)
+
+        respuesta = subir('equipos.csv', b'Uno,A,B\nDos,A\n')
+        self.assertContains(respuesta, 'Línea 2: se esperaban 3 columnas')
+        self.assertFalse(torneo.equipos.exists())
+
+        respuesta = subir('vacio.csv', b'')
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertContains(respuesta, 'The submitted file is empty.')
+        self.assertFalse(torneo.equipos.exists())
+
+        respuesta = subir('equipos.tsv', 'Uno\tAna\tBea\nDos\tCar\tDan\n'.encode())
+        self.assertRedirects(respuesta, f'/torneo/{torneo.id}/ronda/1/')
+        importados = torneo.equipos.filter(es_swing=False)
+        self.assertEqual(sorted(importados.values_list('nombre', flat=True)), ['Dos', 'Uno'])
+        self.assertEqual(Debatiente.objects.filter(equipo__in=importados).count(), 4)
+
+
+class ApiCondicionalTests(TestCase):
+    """api_tabla / api_cuadro / api_estado: ETag y Last-Modified de ida y vuelta."""
+    RUTAS = ('tabla', 'cuadro', 'estado')
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.torneo = Torneo.objects.create(
+            nombre='API', responsable='Tab', n_equipos=4, n_clasificados=4, n_rondas=1,
+        )
+        Equipo.objects.bulk_create([Equipo(torneo=cls.torneo, nombre=f'E{i}') for i in range(4)])
+        Ronda.objects.create(torneo=cls.torneo, numero=1)
+        cls.user = User.objects.create_user('tab', password='x')
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)  # api_tabla deja la tabla en caché; los ids se reusan entre tests
+        self.client.force_login(self.user)
+        # Marca en un segundo anterior: Last-Modified tiene resolución de segundos
+        Torneo.objects.filter(pk=self.torneo.pk).update(actualizado=timezone.now() - timedelta(hours=1))
+
+    def _url(self, ruta):
+        return f'/api/torneos/{self.torneo.id}/{ruta}/'
+
+    def test_if_none_match(self):
+        for ruta in self.RUTAS:
+            with self.subTest(ruta=ruta):
+                respuesta = self.client.get(self._url(ruta))
+                self.assertEqual(respuesta.status_code, 200)
+                etag = respuesta['ETag']
+                respuesta = self.client.get(self._url(ruta), HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(respuesta.status_code, 304)
+                self.assertEqual(respuesta['ETag'], etag)
+                self.assertEqual(respuesta.content, b'')
+                self.assertIn('no-cache', respuesta['Cache-Control'])
+
+    def test_if_modified_since(self):
+        for ruta in self.RUTAS:
+            with self.subTest(ruta=ruta):
+                ultima = self.client.get(self._url(ruta))['Last-Modified']
+                respuesta = self.client.get(self._url(ruta), HTTP_IF_MODIFIED_SINCE=ultima)
+                self.assertEqual(respuesta.status_code, 304)
+
+    def test_un_cambio_invalida_ambos(self):
+        validadores = {ruta: self.client.get(self._url(ruta)) for ruta in self.RUTAS}
+        invalidar_tabla(self.torneo.id)
+        for ruta, previa in validadores.items():
+            with self.subTest(ruta=ruta):
+                respuesta = self.client.get(self._url(ruta), HTTP_IF_NONE_MATCH=previa['ETag'])
+                self.assertEqual(respuesta.status_code, 200)
+                self.assertNotEqual(respuesta['ETag'], previa['ETag'])
+                respuesta = self.client.get(self._url(ruta), HTTP_IF_MODIFIED_SINCE=previa['Last-Modified'])
+                self.assertEqual(respuesta.status_code, 200)
+
+    def test_torneo_inexistente(self):
+        for ruta in self.RUTAS:
+            with self.subTest(ruta=ruta):
+                respuesta = self.client.get(f'/api/torneos/999999/{ruta}/', HTTP_IF_NONE_MATCH='*')
+                self.assertEqual(respuesta.status_code, 404)
+
+
+class InstrumentacionTests(TestCase):
+    """InstrumentacionMiddleware: Server-Timing, log y presupuesto de consultas (WSGI y ASGI)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.torneo = Torneo.objects.create(
+            nombre='Medido', responsable='Tab', n_equipos=4, n_clasificados=4, n_rondas=1,
+        )
+        cls.user = User.objects.create_user('tab', password='x')
+
+    def setUp(self):
+        cache.clear()
+        self.url = f'/api/torneos/{self.torneo.id}/tabla/'
+
+    def _consultas(self, respuesta):
+        return int(re.search(r'desc="(\d+) consultas"', respuesta['Server-Timing']).group(1))
+
+    def test_server_timing_y_log(self):
+        self.client.force_login(self.user)
+        with self.assertLogs('tabla.rendimiento', 'INFO') as logs:
+            respuesta = self.client.get(self.url)
+        self.assertRegex(
+            respuesta['Server-Timing'],
+            r'^db;dur=[\d.]+;desc="\d+ consultas", vista;dur=[\d.]+, total;dur=[\d.]+$',
+        )
+        self.assertGreater(self._consultas(respuesta), 0)
+        registro = logs.records[-1]
+        self.assertEqual((registro.vista, registro.estado), ('api_tabla', 200))
+        self.assertEqual(registro.consultas, self._consultas(respuesta))
+
+    async def test_bajo_asgi_corre_asincrono_y_cuenta_consultas(self):
+        async def vista(request):
+            return HttpResponse()
+        self.assertTrue(iscoroutinefunction(InstrumentacionMiddleware(vista)))
+
+        await self.async_client.aforce_login(self.user)
+        respuesta = await self.async_client.get(self.url)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertGreater(self._consultas(respuesta), 0)
+
+    @override_settings(TABLA_PRESUPUESTO_CONSULTAS={'api_tabla': 1}, TABLA_PRESUPUESTO_ACCION='log')
+    def test_presupuesto_excedido_se_registra(self):
+        self.client.force_login(self.user)
+        with self.assertLogs('tabla.rendimiento', 'WARNING') as logs:
+            self.assertEqual(self.client.get(self.url).status_code, 200)
+        self.assertIn('api_tabla:', logs.records[-1].getMessage())
+        self.assertIn('(presupuesto 1)', logs.records[-1].getMessage())
+
+    @override_settings(TABLA_PRESUPUESTO_ACCION='raise')
+    def test_los_presupuestos_de_settings_cubren_la_carga_de_votos(self):
+        torneo = Torneo.objects.create(
+            nombre='Presupuesto', responsable='Tab', n_equipos=160, n_clasificados=16, n_rondas=2,
+        )
+        crear_equipos_en_bloque(torneo, [(f'E{i}', f'A{i}', f'B{i}') for i in range(160)])
+        Ronda.objects.bulk_create([Ronda(torneo=torneo, numero=n) for n in (1, 2)])
+        self.client.force_login(self.user)
+        url = f'/torneo/{torneo.id}/ronda/1/'
+        self.assertEqual(self.client.get(url).status_code, 200)  # empareja en línea
+        paquetes = salas_con_participaciones(torneo.rondas.get(numero=1))
+        sala, ses = paquetes[0]
+        datos = {'version': sala.version}
+        for i, se in enumerate(ses):
+            datos.update({f's{sala.id}_{i}_ranking': i + 1, f's{sala.id}_{i}_orador1': 75,
+                          f's{sala.id}_{i}_orador2': 75})
+        self.client.post(f'/torneo/{torneo.id}/sala/{sala.id}/votos/', datos)
+        for sala, ses in paquetes:
+            for i, se in enumerate(ses):
+                datos.update({f's{sala.id}_{i}_ranking': i + 1, f's{sala.id}_{i}_orador1': 75,
+                              f's{sala.id}_{i}_orador2': 75})
+        # Carga de toda la ronda con el cierre en línea: dentro del presupuesto
+        self.assertEqual(self.client.post(url, datos).status_code, 302)
+        self.assertTrue(torneo.rondas.get(numero=1).cerrada)
+
+    @override_settings(TABLA_PRESUPUESTO_CONSULTAS={'*': 1}, TABLA_PRESUPUESTO_ACCION='raise')
+    def test_presupuesto_excedido_falla(self):
+        self.client.force_login(self.user)
+        with self.assertRaises(PresupuestoConsultasExcedido):
+            self.client.get(self.url)
+        with override_settings(TABLA_PRESUPUESTO_CONSULTAS={'*': 1, 'api_tabla': 100}):
+            self.assertEqual(self.client.get(self.url).status_code, 200)
+
+
+class ExportarTests(TestCase):
+    """Exportación en streaming (CSV / NDJSON)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.torneo = Torneo.objects.create(
+            nombre='Export', responsable='Tab', n_equipos=8, n_clasificados=4, n_rondas=1,
+        )
+        Equipo.objects.bulk_create([Equipo(torneo=cls.torneo, nombre=f'E{i}', puntos=i) for i in range(8)])
+        cls.user = User.objects.create_user('tab', password='x')
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def _bajar(self, recurso, formato):
+        respuesta = self.client.get(f'/torneo/{self.torneo.id}/exportar/{recurso}.{formato}')
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertTrue(respuesta.streaming)
+        return respuesta, b''.join(respuesta.streaming_content).decode()
+
+    def test_tabla_en_csv(self):
+        respuesta, contenido = self._bajar('tabla', 'csv')
+        self.assertEqual(respuesta['Content-Type'], 'text/csv; charset=utf-8')
+        self.assertEqual(
+            respuesta['Content-Disposition'], f'attachment; filename="torneo-{self.torneo.id}-tabla.csv"',
+        )
+        lineas = contenido.splitlines()
+        self.assertEqual(lineas[0], 'posicion,equipo_id,equipo,es_swing,puntos,speakers_total,speakers_prom')
+        self.assertEqual([linea.split(',')[2] for linea in lineas[1:]], [f'E{i}' for i in range(7, -1, -1)])
+        self.assertEqual([linea.split(',')[0] for linea in lineas[1:]], [str(i) for i in range(1, 9)])
+
+    def test_resultados_en_ndjson(self):
+        ronda = Ronda.objects.create(torneo=self.torneo, numero=1)
+        generar_emparejamientos(ronda)
+        guardar_resultados(ronda, [
+            (se, r, 70 + r, 75) for _, ses in salas_con_participaciones(ronda)
+            for r, se in enumerate(ses, start=1)
+        ])
+        respuesta, contenido = self._bajar('resultados', 'ndjson')
+        self.assertEqual(respuesta['Content-Type'], 'application/x-ndjson')
+        filas = [json.loads(linea) for linea in contenido.splitlines()]
+        self.assertEqual(len(filas), 8)
+        self.assertEqual(
+            list(filas[0]),
+            ['ronda', 'sala_id', 'sala', 'posicion', 'equipo_id', 'equipo',
+             'ranking', 'puntos', 'orador1', 'orador2'],
+        )
+        self.assertEqual({f['ranking']: f['orador1'] for f in filas}, {1: 71, 2: 72, 3: 73, 4: 74})
+        self.assertEqual(sum(f['puntos'] for f in filas), 2 * sum(PUNTOS_POR_RANKING.values()))
+
+    def test_recurso_o_formato_desconocido(self):
+        for ruta in ('equipos.csv', 'tabla.xlsx', 'tabla.CSV'):
+            with self.subTest(ruta=ruta):
+                self.assertEqual(
+                    self.client.get(f'/torneo/{self.torneo.id}/exportar/{ruta}').status_code, 404,
+                )
+        self.assertEqual(self.client.get('/torneo/999999/exportar/tabla.csv').status_code, 404)
+
+    async def test_bajo_asgi_el_stream_es_asincrono(self):
+        await self.async_client.aforce_login(self.user)
+        respuesta = await self.async_client.get(f'/torneo/{self.torneo.id}/exportar/tabla.csv')
+        self.assertEqual(respuesta.status_code, 200)
+        # Un iterador síncrono Django lo juntaría entero en memoria antes de enviarlo
+        self.assertTrue(respuesta.is_async)
+        contenido = b''.join([parte async for parte in respuesta.streaming_content]).decode()
+        lineas = contenido.splitlines()
+        self.assertEqual(lineas[0], 'posicion,equipo_id,equipo,es_swing,puntos,speakers_total,speakers_prom')
+        self.assertEqual(len(lineas), 9)
+        self.assertTrue(lineas[1].startswith('1,') and ',E7,' in lineas[1])
+
+
+class EventosTests(TestCase):
+    """Eventos en vivo: publicar al confirmar y stream SSE (solo bajo ASGI)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.torneo = Torneo.objects.create(
+            nombre='Vivo', responsable='Tab', n_equipos=8, n_clasificados=4, n_rondas=1,
+        )
+        cls.user = User.objects.create_user('tab', password='x')
+
+    async def test_flujo_recibe_lo_publicado_al_confirmar(self):
+        flujo = flujo_sse(self.torneo.id, latido=0.05)
+        self.assertEqual(await flujo.__anext__(), 'retry: 3000\n\n')
+        self.assertTrue(hay_suscriptores(self.torneo.id))
+
+        def publicar_y_confirmar():
+            with self.captureOnCommitCallbacks(execute=True) as pendientes:
+                publicar(self.torneo.id, 'tabla', {'version': 3})
+            self.assertEqual(len(pendientes), 1)  # se entregó al confirmar, no antes
+
+        await sync_to_async(publicar_y_confirmar)()
+        self.assertEqual(await flujo.__anext__(), 'event: tabla\ndata: {"version": 3}\n\n')
+        self.assertEqual(await flujo.__anext__(), ': latido\n\n')
+        # Otro torneo no llega a este stream
+        obtener_backend().publicar(canal_torneo(self.torneo.id + 1), {'tipo': 'tabla', 'datos': {}})
+        self.assertEqual(await flujo.__anext__(), ': latido\n\n')
+        await flujo.aclose()
+        self.assertFalse(hay_suscriptores(self.torneo.id))
+
+    async def test_stream_bajo_asgi(self):
+        await self.async_client.aforce_login(self.user)
+        pagina = await self.async_client.get(f'/torneo/{self.torneo.id}/tabla/')
+        self.assertContains(pagina, 'EventSource')
+        respuesta = await self.async_client.get(f'/api/torneos/{self.torneo.id}/eventos/')
+        self.assertEqual(respuesta['Content-Type'], 'text/event-stream')
+        partes = respuesta.streaming_content
+        self.assertEqual(await partes.__anext__(), b'retry: 3000\n\n')
+        await partes.aclose()
+
+    def test_sin_asgi_no_se_abre_el_stream(self):
+        self.client.force_login(self.user)
+        self.assertNotContains(self.client.get(f'/torneo/{self.torneo.id}/tabla/'), 'EventSource')
+        self.assertEqual(self.client.get(f'/api/torneos/{self.torneo.id}/eventos/').status_code, 204)
+        self.assertEqual(self.client.get('/api/torneos/999999/eventos/').status_code, 404)
+
+
+class VotosPorSalaTests(TestCase):
+    """Carga de votos sala por sala con control optimista de versión."""
+
+    def setUp(self):
+        self.torneo = Torneo.objects.create(
+            nombre='Salas', responsable='Tab', n_equipos=8, n_clasificados=4, n_rondas=2,
+        )
+        Equipo.objects.bulk_create([Equipo(torneo=self.torneo, nombre=f'E{i}') for i in range(8)])
+        self.ronda = Ronda.objects.create(torneo=self.torneo, numero=1)
+        generar_emparejamientos(self.ronda)
+        self.salas = salas_con_participaciones(self.ronda)
+
+    def _votos(self, ses):
+        return [(se, r, 75, 75) for r, se in enumerate(ses, start=1)]
+
+    def test_version_obsoleta(self):
+        sala, ses = self.salas[0]
+        registrar_votos_sala(sala, 0, self._votos(ses))
+        # Otro juez con el formulario abierto antes del primer envío
+        with self.assertRaises(VersionObsoleta):
+            registrar_votos_sala(sala, 0, self._votos(reversed(ses)))
+        rankings = ResultadoSala.objects.filter(sala_equipo__sala=sala).order_by('ranking')
+        self.assertEqual([r.sala_equipo_id for r in rankings], [se.id for se in ses])
+
+    def test_la_ultima_sala_cierra_la_ronda(self):
+        (s1, ses1), (s2, ses2) = self.salas
+        self.assertFalse(registrar_votos_sala(s1, s1.version, self._votos(ses1)))
+        self.ronda.refresh_from_db()
+        self.assertFalse(self.ronda.cerrada)
+        self.assertTrue(registrar_votos_sala(s2, s2.version, self._votos(ses2)))
+        self.ronda.refresh_from_db()
+        self.assertTrue(self.ronda.cerrada)
+        self.assertEqual(sorted(Equipo.objects.values_list('puntos', flat=True)), [0, 0, 1, 1, 2, 2, 3, 3])
+        # Un voto en vuelo tras el cierre queda obsoleto
+        with self.assertRaises(VersionObsoleta):
+            registrar_votos_sala(s1, s1.version, self._votos(ses1))
+
+    def test_no_se_cierra_dos_veces(self):
+        for sala, ses in self.salas:
+            guardar_resultados(self.ronda, self._votos(ses))
+        cerrar_ronda_y_actualizar_tabla(self.ronda)
+        with self.assertRaises(RondaYaCerrada):
+            cerrar_ronda_y_actualizar_tabla(Ronda.objects.get(pk=self.ronda.pk))
+        self.assertEqual(sum(Equipo.objects.values_list('puntos', flat=True)), 12)
+
+    def test_vista_de_sala(self):
+        sala, ses = self.salas[0]
+        self.client.force_login(User.objects.create_user('juez', password='x'))
+        url = f'/torneo/{self.torneo.id}/sala/{sala.id}/votos/'
+        self.assertContains(self.client.get(url), 'name="version" value="0"')
+        datos = {'version': 0}
+        for i, se in enumerate(ses):
+            datos.update({f's{sala.id}_{i}_ranking': i + 1, f's{sala.id}_{i}_orador1': 75, f's{sala.id}_{i}_orador2': 75})
+        self.assertEqual(self.client.post(url, datos).status_code, 302)
+        self.assertContains(self.client.post(url, datos), 'cambiaron')
+
+    def test_la_fila_del_torneo_se_marca_fuera_de_la_transaccion(self):
+        sala, ses = self.salas[0]
+        with CaptureQueriesContext(connection) as consultas:
+            registrar_votos_sala(sala, sala.version, self._votos(ses))
+        sqls = [q['sql'] for q in consultas.captured_queries]
+        liberada = next(i for i, sql in enumerate(sqls) if sql.startswith('RELEASE SAVEPOINT'))
+        marcas = [i for i, sql in enumerate(sqls) if sql.startswith('UPDATE "tabla_torneo"')]
+        self.assertTrue(marcas)
+        self.assertGreater(min(marcas), liberada)
+
+    @override_settings(TABLA_TRABAJOS_EN_LINEA=False)
+    def test_la_carga_de_toda_la_ronda_invalida_los_formularios_por_sala(self):
+        self.client.force_login(User.objects.create_user('tab', password='x'))
+        datos = {}
+        for sala, ses in self.salas:
+            for i, se in enumerate(ses):
+                datos.update({
+                    f's{sala.id}_{i}_ranking': i + 1,
+                    f's{sala.id}_{i}_orador1': 80, f's{sala.id}_{i}_orador2': 80,
+                })
+        self.client.post(f'/torneo/{self.torneo.id}/ronda/1/', datos)
+        # Un juez con el formulario de su sala abierto desde antes no pisa la carga del tab
+        sala, ses = self.salas[0]
+        with self.assertRaises(VersionObsoleta):
+            registrar_votos_sala(sala, sala.version, self._votos(reversed(ses)))
+        self.assertEqual(
+            list(ResultadoSala.objects.filter(sala_equipo__sala=sala).values_list('orador1', flat=True)),
+            [80] * 4,
+        )
+
+
+@override_settings(TABLA_TRABAJOS_EN_LINEA=False)
+class TrabajosTests(TestCase):
+    """Cola de trabajos en la base: idempotencia, worker y recuperación."""
+
+    def setUp(self):
+        self.torneo = Torneo.objects.create(
+            nombre='Cola', responsable='Tab', n_equipos=8, n_clasificados=4, n_rondas=2,
+        )
+        Equipo.objects.bulk_create([Equipo(torneo=self.torneo, nombre=f'E{i}') for i in range(8)])
+        self.ronda = Ronda.objects.create(torneo=self.torneo, numero=1)
+
+    def _procesar(self):
+        call_command('procesar_trabajos', '--una-vez', '--nombre', 'test', stdout=StringIO())
+
+    def test_doble_encolado_y_worker(self):
+        primero = trabajos.encolar(self.ronda, Trabajo.EMPAREJAR)
+        self.assertEqual(trabajos.encolar(self.ronda, Trabajo.EMPAREJAR).pk, primero.pk)
+        self.assertEqual(primero.estado, Trabajo.PENDIENTE)
+        self.assertFalse(Ronda.objects.get(pk=self.ronda.pk).emparejada)
+
+        self._procesar()
+        primero.refresh_from_db()
+        self.assertEqual((primero.estado, primero.intentos, primero.worker), (Trabajo.HECHO, 1, 'test'))
+        self.assertEqual(self.ronda.salas.count(), 2)
+
+        # Cerrar sin votos falla y queda registrado; al volver a encolar se reintenta
+        cierre = trabajos.encolar(self.ronda, Trabajo.CERRAR)
+        self._procesar()
+        cierre.refresh_from_db()
+        self.assertEqual(cierre.estado, Trabajo.ERROR)
+        self.assertIn('Faltan resultados', cierre.mensaje)
+        self.assertFalse(Ronda.objects.get(pk=self.ronda.pk).cerrada)
+        self.assertEqual(trabajos.encolar(self.ronda, Trabajo.CERRAR).estado, Trabajo.PENDIENTE)
+
+    def test_worker_caido(self):
+        trabajo = Trabajo.objects.create(
+            torneo=self.torneo, ronda=self.ronda, accion=Trabajo.EMPAREJAR,
+            estado=Trabajo.EN_CURSO, worker='caido', intentos=1,
+            latido=timezone.now() - timedelta(minutes=5),
+        )
+        retomado = trabajos.tomar('otro')
+        self.assertEqual((retomado.pk, retomado.worker, retomado.intentos), (trabajo.pk, 'otro', 2))
+        # El worker caído ya no puede marcarlo como suyo
+        trabajo = trabajos.ejecutar(trabajo)
+        self.assertEqual(trabajo.worker, 'otro')
+        self.assertEqual(trabajo.estado, Trabajo.EN_CURSO)
+        self.assertFalse(Ronda.objects.get(pk=self.ronda.pk).emparejada)
+
+        self.assertEqual(trabajos.ejecutar(retomado).estado, Trabajo.HECHO)
+        self.assertTrue(Ronda.objects.get(pk=self.ronda.pk).emparejada)
+
+        Trabajo.objects.filter(pk=trabajo.pk).update(
+            estado=Trabajo.EN_CURSO, intentos=trabajos.MAX_INTENTOS,
+            latido=timezone.now() - timedelta(minutes=5),
+        )
+        self.assertIsNone(trabajos.tomar('otro'))
+        self.assertEqual(Trabajo.objects.get(pk=trabajo.pk).estado, Trabajo.ERROR)
+
+    def test_pantalla_de_espera(self):
+        self.client.force_login(User.objects.create_user('tab', password='x'))
+        respuesta = self.client.get(f'/torneo/{self.torneo.id}/ronda/1/')
+        trabajo = Trabajo.objects.get()
+        espera = f'/torneo/{self.torneo.id}/trabajo/{trabajo.id}/'
+        self.assertRedirects(respuesta, espera)
+        self.assertContains(self.client.get(espera), 'En cola')
+        estado = self.client.get(f'/api/trabajos/{trabajo.id}/').json()
+        self.assertEqual((estado['accion'], estado['estado'], estado['terminado']), ('emparejar', 'pendiente', False))
+
+        self._procesar()
+        self.assertRedirects(self.client.get(espera), f'/torneo/{self.torneo.id}/ronda/1/')
+        self.assertTrue(self.client.get(f'/api/trabajos/{trabajo.id}/').json()['terminado'])
+
+
+class TorneosCercanosTests(TestCase):
+    """Búsqueda por ubicación: geohash + recorte lat/lng + haversine, igual a la fuerza bruta."""
+    N_TORNEOS = 20000
+    CIUDADES = [(-34.60, -58.38), (-33.45, -70.67), (40.42, -3.70), (14.60, 120.98), (-17.8, 179.4)]
+
+    @classmethod
+    def setUpTestData(cls):
+        rnd = random.Random(7)
+        torneos = []
+        for i in range(cls.N_TORNEOS):
+            if i % 50 == 0:
+                lat = lng = None  # sin ubicación
+            elif i % 2:
+                lat, lng = rnd.uniform(-85, 85), rnd.uniform(-180, 180)
+            else:
+                c_lat, c_lng = rnd.choice(cls.CIUDADES)
+                lat, lng = c_lat + rnd.gauss(0, 0.5), (c_lng + rnd.gauss(0, 0.5) + 540) % 360 - 180
+            # bulk_create no pasa por save(): la geocelda se calcula acá
+            torneos.append(Torneo(
+                nombre=f'Torneo {i}', responsable='Tab', n_equipos=8, n_clasificados=4, n_rondas=1,
+                lugar_lat=lat, lugar_lng=lng, geocelda=geo.codificar(lat, lng),
+            ))
+        Torneo.objects.bulk_create(torneos, batch_size=2000)
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        cls.todos = list(Torneo.objects.exclude(lugar_lat=None).values_list('id', 'lugar_lat', 'lugar_lng'))
+        cls.user = User.objects.create_user('tab', password='x')
+
+    def _fuerza_bruta_cerca(self, lat, lng, radio_km):
+        return sorted(
+            (round(geo.distancia_km(lat, lng, t_lat, t_lng), 3), pk) for pk, t_lat, t_lng in self.todos
+            if geo.distancia_km(lat, lng, t_lat, t_lng) <= radio_km
+        )
+
+    def test_cerca_igual_a_fuerza_bruta(self):
+        casos = [(lat, lng, r) for (lat, lng) in self.CIUDADES for r in (1, 25, 300)]
+        casos += [(0, 0, 1500), (89.5, 10, 200), (-17.8, -179.9, 80), (45, 90, 5000)]
+        for lat, lng, radio in casos:
+            torneos, truncado = torneos_cerca(lat, lng, radio, limite=10 ** 6)
+            if truncado:
+                continue
+            self.assertEqual([(t.distancia_km, t.id) for t in torneos],
+                             self._fuerza_bruta_cerca(lat, lng, radio), (lat, lng, radio))
+
+    def test_zona_igual_a_fuerza_bruta(self):
+        zonas = [(-35, -59, -34, -58), (40, -4, 41, -3), (-20, 178, -15, -178), (-1, -1, 1, 1)]
+        for sur, oeste, norte, este in zonas:
+            torneos, truncado = torneos_en_zona((sur, oeste, norte, este), limite=10 ** 6)
+            self.assertFalse(truncado)
+            esperado = {
+                pk for pk, lat, lng in self.todos
+                if sur <= lat <= norte and (oeste <= lng <= este if oeste <= este else lng >= oeste or lng <= este)
+            }
+            self.assertEqual({t.id for t in torneos}, esperado, (sur, oeste, norte, este))
+        # La que cruza el antimeridiano trae torneos de los dos lados
+        torneos, _ = torneos_en_zona((-20, 178, -15, -178))
+        self.assertEqual({t.lng > 0 for t in torneos}, {True, False})
+
+    def test_limite_y_truncado(self):
+        torneos, truncado = torneos_cerca(-34.60, -58.38, 30, limite=5)
+        self.assertEqual(len(torneos), 5)
+        self.assertFalse(truncado)
+        self.assertEqual([t.distancia_km for t in torneos], sorted(t.distancia_km for t in torneos))
+        _, truncado = torneos_en_zona((-90, -180, 90, 180))
+        self.assertTrue(truncado)
+
+    @skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN es específico de SQLite')
+    def test_usa_el_indice(self):
+        for buscar in (lambda: torneos_cerca(40.42, -3.70, 50), lambda: torneos_en_zona((-20, 178, -15, -178))):
+            with CaptureQueriesContext(connection) as consultas:
+                buscar()
+            self.assertEqual(len(consultas), 1)
+            with connection.cursor() as cursor:
+                cursor.execute('EXPLAIN QUERY PLAN ' + consultas[0]['sql'])
+                plan = [fila[-1] for fila in cursor.fetchall()]
+            self.assertFalse([paso for paso in plan if PLAN_PROHIBIDO.search(paso)], '\n'.join(plan))
+            self.assertTrue(any('torneo_geocelda_idx' in paso for paso in plan), '\n'.join(plan))
+
+    def test_save_mantiene_la_geocelda(self):
+        torneo = Torneo.objects.create(nombre='Nuevo', responsable='Tab', n_equipos=8, n_clasificados=4,
+                                       n_rondas=1, lugar_lat=-34.6, lugar_lng=-58.38)
+        self.assertEqual(torneo.geocelda, geo.codificar(-34.6, -58.38))
+        torneo.lugar_lat, torneo.lugar_lng = 40.42, -3.70
+        torneo.save(update_fields=['lugar_lat', 'lugar_lng'])
+        torneo.refresh_from_db()
+        self.assertEqual(torneo.geocelda, geo.codificar(40.42, -3.70))
+        self.assertIn(torneo.id, [t.id for t in torneos_cerca(40.42, -3.70, 1)[0]])
+        torneo.lugar_lat = None
+        torneo.save()
+        self.assertEqual(Torneo.objects.get(pk=torneo.pk).geocelda, '')
+
+    def test_api(self):
+        self.client.force_login(self.user)
+        respuesta = self.client.get('/api/torneos/cerca/', {'lat': 40.42, 'lng': -3.70, 'radio_km': 20, 'limite': 3})
+        self.assertEqual(respuesta.status_code, 200)
+        datos = respuesta.json()
+        self.assertEqual(len(datos['torneos']), 3)
+        self.assertEqual(set(datos['torneos'][0]),
+                         {'id', 'nombre', 'lugar_nombre', 'lat', 'lng', 'cerrado', 'distancia_km'})
+        respuesta = self.client.get('/api/torneos/zona/', {'sur': -20, 'oeste': 178, 'norte': -15, 'este': -178})
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertTrue(respuesta.json()['torneos'])
+        for params in ({'lat': 91, 'lng': 0, 'radio_km': 5}, {'lat': 'x', 'lng': 0, 'radio_km': 5}, {}):
+            self.assertEqual(self.client.get('/api/torneos/cerca/', params).status_code, 400)
+        self.assertEqual(
+            self.client.get('/api/torneos/zona/', {'sur': 10, 'oeste': 0, 'norte': 0, 'este': 1}).status_code, 400
+        )
+
+
+class PaginasPublicasTests(TestCase):
+    """Tabla, cuadro y eliminatorias sin login, desde la caché hasta el próximo cambio."""
+
+    def setUp(self):
+        cache.clear()
+        self.torneo = Torneo.objects.create(
+            nombre='Abierto', responsable='Tab', n_equipos=8, n_clasificados=4, n_rondas=1, publico=True,
+        )
+        Equipo.objects.bulk_create([Equipo(torneo=self.torneo, nombre=f'E{i}') for i in range(8)])
+        self.ronda = Ronda.objects.create(torneo=self.torneo, numero=1)
+        self.url = f'/publico/torneo/{self.torneo.id}/tabla/'
+
+    def _cerrar_ronda(self):
+        generar_emparejamientos(self.ronda)
+        guardar_resultados(self.ronda, [
+            (se, r, 70 + r, 75) for _, ses in salas_con_participaciones(self.ronda)
+            for r, se in enumerate(ses, start=1)
+        ])
+        cerrar_ronda_y_actualizar_tabla(self.ronda)
+
+    def test_solo_torneos_publicos(self):
+        self.torneo.publico = False
+        self.torneo.save()
+        with mock.patch.object(caches['default'], 'set') as guardar:
+            for vista in ('tabla', 'cuadro', 'eliminatorias'):
+                self.assertEqual(self.client.get(f'/publico/torneo/{self.torneo.id}/{vista}/').status_code, 404)
+            self.assertEqual(self.client.get('/publico/torneo/999999/tabla/').status_code, 404)
+        # Ids inexistentes o privados no dejan nada en la caché
+        guardar.assert_not_called()
+        self.torneo.publico = True
+        self.torneo.save()
+        self.assertContains(self.client.get(self.url), 'E7')
+
+    def test_desde_la_cache_con_una_consulta(self):
+        primera = self.client.get(self.url)
+        self.assertEqual(primera.status_code, 200)
+        self.assertIn('public', primera['Cache-Control'])
+        self.assertIn('s-maxage=30', primera['Cache-Control'])
+        self.assertNotIn('Cookie', primera.get('Vary', ''))
+        # Solo la marca del torneo (por PK); ni sesión ni tabla
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get(self.url).content, primera.content)
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=primera['ETag']).status_code, 304)
+
+    def test_senales_invalidan(self):
+        self.client.get(self.url)
+        equipo = self.torneo.equipos.get(nombre='E3')
+        equipo.nombre = 'Renombrado'
+        equipo.save()
+        self.assertContains(self.client.get(self.url), 'Renombrado')
+
+    def test_la_marca_sale_de_la_base(self):
+        # Otro proceso (el worker, otro web) solo puede cambiar la base, no esta caché
+        self.client.get(self.url)
+        Equipo.objects.filter(torneo=self.torneo, nombre='E3').update(nombre='Desde otro proceso')
+        self.assertNotContains(self.client.get(self.url), 'Desde otro proceso')
+        invalidar_tabla(self.torneo.id)
+        self.assertContains(self.client.get(self.url), 'Desde otro proceso')
+
+    def test_cambios_masivos_invalidan(self):
+        cuadro = f'/publico/torneo/{self.torneo.id}/cuadro/'
+        self.assertContains(self.client.get(cuadro), 'Todavía no hay cuadro')
+        etag = self.client.get(self.url)['ETag']
+        self._cerrar_ronda()
+        self.assertNotContains(self.client.get(cuadro), 'Todavía no hay cuadro')
+        respuesta = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertContains(respuesta, '<td>3</td>')
+
+    def test_eliminatorias(self):
+        url = f'/publico/torneo/{self.torneo.id}/eliminatorias/'
+        self.assertContains(self.client.get(url), 'todavía no empezaron')
+        self._cerrar_ronda()
+        avanzar_eliminatorias(Torneo.objects.get(pk=self.torneo.pk))
+        self.assertContains(self.client.get(url), 'Final')
+
+
+class AdminTests(TestCase):
+    """Cada página del admin cuesta un número fijo de consultas, sin contar tablas enteras."""
+    SALAS = 2600  # 10.400 participaciones y resultados
+
+    @classmethod
+    def setUpTestData(cls):
+        Torneo.objects.bulk_create([
+            Torneo(nombre=f'Torneo {i}', responsable='Tab', n_equipos=8, n_clasificados=4, n_rondas=1)
+            for i in range(30)
+        ])
+        cls.torneo = Torneo.objects.order_by('-id').first()
+        equipos = Equipo.objects.bulk_create([Equipo(torneo=cls.torneo, nombre=f'E{i}') for i in range(40)])
+        Debatiente.objects.bulk_create([Debatiente(equipo=e, nombre=f'D{e.nombre}') for e in equipos])
+        ronda = Ronda.objects.create(torneo=cls.torneo, numero=1)
+        salas = Sala.objects.bulk_create([Sala(ronda=ronda, nombre=f'Sala {i}') for i in range(cls.SALAS)])
+        ses = SalaEquipo.objects.bulk_create([
+            SalaEquipo(sala=sala, equipo=equipos[(4 * i + p) % 40], posicion=pos)
+            for i, sala in enumerate(salas) for p, pos in enumerate(['OG', 'OO', 'CG', 'CO'])
+        ])
+        ResultadoSala.objects.bulk_create([
+            ResultadoSala(sala_equipo=se, ranking=i % 4 + 1, puntos=3 - i % 4, orador1=75, orador2=75)
+            for i, se in enumerate(ses)
+        ])
+        cls.admin = User.objects.create_superuser('admin', password='x')
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def _consultas(self, url, **params):
+        with CaptureQueriesContext(connection) as ctx:
+            respuesta = self.client.get(url, params)
+        self.assertEqual(respuesta.status_code, 200, url)
+        for q in ctx.captured_queries:
+            if 'COUNT(' in q['sql']:
+                self.assertIn('LIMIT', q['sql'], 'COUNT sin tope')
+        return len(ctx.captured_queries)
+
+    def test_changelists_con_costo_fijo(self):
+        for modelo in ('torneo', 'equipo', 'debatiente', 'ronda', 'sala', 'salaequipo',
+                       'resultadosala', 'eventoresultado', 'trabajo'):
+            url = f'/admin/tabla/{modelo}/'
+            base = self._consultas(url)
+            self.assertLessEqual(base, 10, url)
+            # Otra página, filtrada por torneo, cuesta lo mismo
+            self.assertEqual(self._consultas(url, p=2, torneo=self.torneo.pk) if modelo != 'torneo'
+                             else self._consultas(url, cerrado__exact=0), base, url)
+
+    def test_autocompletado(self):
+        url = '/admin/autocomplete/'
+        n = self._consultas(url, app_label='tabla', model_name='resultadosala', field_name='sala_equipo')
+        self.assertEqual(
+            self._consultas(url, app_label='tabla', model_name='resultadosala', field_name='sala_equipo',
+                            term='Sala 1', page=2),
+            n,
+        )
+
+    def test_filtro_de_torneo_solo_recientes(self):
+        respuesta = self.client.get('/admin/tabla/salaequipo/')
+        self.assertContains(respuesta, 'Torneo 29')
+        self.assertNotContains(respuesta, '>Torneo 0<')
+        primero = Torneo.objects.get(nombre='Torneo 0')
+        self.assertContains(self.client.get('/admin/tabla/equipo/', {'torneo': primero.pk}), '>Torneo 0<')
+
+
+@skipUnless(simulacion.disponible(), 'El simulador de break necesita NumPy')
+class SimulacionBreakTests(TestCase):
+    """Probabilidades de break por Monte Carlo."""
+
+    def setUp(self):
+        self.torneo = Torneo.objects.create(
+            nombre='Break', responsable='Tab', n_equipos=16, n_clasificados=4, n_rondas=2,
+        )
+        Equipo.objects.bulk_create([Equipo(torneo=self.torneo, nombre=f'E{i:02d}') for i in range(16)])
+        Ronda.objects.bulk_create([Ronda(torneo=self.torneo, numero=n) for n in (1, 2)])
+        ronda = self.torneo.rondas.get(numero=1)
+        generar_emparejamientos(ronda)
+        guardar_resultados(ronda, [
+            (se, r, 75, 75)
+            for _, ses in salas_con_participaciones(ronda)
+            for r, se in enumerate(ses, start=1)
+        ])
+        cerrar_ronda_y_actualizar_tabla(ronda)
+        self.torneo.refresh_from_db()
+
+    def test_probabilidades(self):
+        r = simulacion.simular_break(self.torneo, simulaciones=4000, semilla=1)
+        self.assertEqual(r.rondas_restantes, 1)
+        probs = {fila.puntos: [] for fila, _ in r.filas}
+        for fila, prob in r.filas:
+            probs[fila.puntos].append(prob)
+        self.assertAlmostEqual(sum(p for _, p in r.filas), 4.0)
+        # Con una ronda por jugar, un equipo con 3 puntos casi siempre clasifica
+        # y uno con 0 solo si gana y los desempates lo favorecen
+        self.assertGreater(min(probs[3]), 0.5)
+        self.assertLess(max(probs[0]), 0.3)
+
+    def test_emparejar_la_ronda_siguiente_invalida_la_cache(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        with mock.patch.object(simulacion, '_simular', wraps=simulacion._simular) as simular:
+            simulacion.simular_break(self.torneo, simulaciones=1000, semilla=1)
+            simulacion.simular_break(self.torneo, simulaciones=1000, semilla=1)
+            self.assertEqual(simular.call_count, 1)
+
+            # Emparejar no cambia la tabla, pero la simulación pasa a usar las salas reales
+            generar_emparejamientos(self.torneo.rondas.get(numero=2))
+            self.torneo.refresh_from_db()
+            simulacion.simular_break(self.torneo, simulaciones=1000, semilla=1)
+        self.assertEqual(simular.call_count, 2)
+        self.assertEqual(len(simular.call_args.args[3]), 16)
+
+    def test_sin_rondas_restantes_es_la_tabla(self):
+        ronda = self.torneo.rondas.get(numero=2)
+        generar_emparejamientos(ronda)
+        guardar_resultados(ronda, [
+            (se, r, 70 + r, 70) for _, ses in salas_con_participaciones(ronda)
+            for r, se in enumerate(ses, start=1)
+        ])
+        cerrar_ronda_y_actualizar_tabla(ronda)
+        self.torneo.refresh_from_db()
+        r = simulacion.simular_break(self.torneo, simulaciones=500)
+        self.assertEqual([p for _, p in r.filas], [1.0] * 4 + [0.0] * 12)
+
+        self.client.force_login(User.objects.create_user('tab', password='x'))
+        self.assertContains(self.client.get(f'/torneo/{self.torneo.id}/break/'), 'Ya no quedan rondas')
+
+    def test_la_vista_acota_las_simulaciones(self):
+        self.client.force_login(User.objects.create_user('tab', password='x'))
+        url = f'/torneo/{self.torneo.id}/break/'
+        for pedidas, corridas in (('5000', 5000), ('100000', 20000), ('7', 20000), ('x', 20000), (None, 20000)):
+            with self.subTest(pedidas=pedidas):
+                respuesta = self.client.get(url, {'simulaciones': pedidas} if pedidas else {})
+                self.assertEqual(respuesta.context['resultado'].simulaciones, corridas)
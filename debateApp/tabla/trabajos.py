@@ -0,0 +1,227 @@
+"""
+Trabajos en segundo plano: emparejar, cerrar ronda y armar eliminatorias.
+
+La cola es la propia base (modelo Trabajo), sin broker externo. La vista
+encola con `encolar(ronda, accion)` y responde enseguida; el worker
+(`manage.py procesar_trabajos`) toma los pendientes con un UPDATE condicional,
+así dos workers nunca corren el mismo.
+
+- Un Trabajo por (ronda, accion): un doble clic devuelve el que ya está en
+  cola o en curso. Uno terminado (hecho o con error) se vuelve a encolar; las
+  acciones revisan el estado de la ronda, así repetirlas no duplica nada.
+- La acción y la marca de "hecho" se confirman en la misma transacción: si
+  el worker muere a mitad de camino no queda nada a medias.
+- Mientras corre, un hilo renueva `latido`. Un trabajo en curso con el latido
+  vencido (worker caído) lo retoma otro worker, hasta MAX_INTENTOS veces.
+
+Con settings.TABLA_TRABAJOS_EN_LINEA (por defecto) `encolar` lo ejecuta en el
+momento, dentro del request: no hace falta levantar el worker.
+"""
+from __future__ import annotations
+
+import logging
+import threading
+from contextlib import contextmanager
+from datetime import timedelta
+from typing import Optional, Tuple
+
+from django.conf import settings
+from django.db import DatabaseError, connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Ronda, Torneo, Trabajo
+from .services import (
+    avanzar_eliminatorias,
+    cerrar_ronda_y_actualizar_tabla,
+    coronar_campeon,
+    es_final,
+    generar_emparejamientos,
+    _limpiar_salas,
+)
+
+logger = logging.getLogger(__name__)
+
+EN_LINEA = 'en-linea'
+MAX_INTENTOS = 3
+LATIDO = 5  # segundos entre latidos del worker
+
+
+class TrabajoPerdido(Exception):
+    """Otro worker retomó el trabajo (este se dio por caído): se deshace lo hecho."""
+
+
+def en_linea() -> bool:
+    return getattr(settings, 'TABLA_TRABAJOS_EN_LINEA', True)
+
+
+def _vencimiento() -> timedelta:
+    """Tiempo sin latido para dar por caído al worker de un trabajo en curso."""
+    return timedelta(seconds=getattr(settings, 'TABLA_TRABAJOS_VENCIMIENTO', 60))
+
+
+# ------------------------- acciones -------------------------
+
+def _emparejar(trabajo: Trabajo) -> Tuple[str, dict]:
+    ronda = trabajo.ronda
+    if not ronda.emparejada:
+        _limpiar_salas(ronda)
+        generar_emparejamientos(ronda)
+    return f'Ronda {ronda.numero} emparejada.', {'ronda': ronda.numero}
+
+
+def _cerrar(trabajo: Trabajo) -> Tuple[str, dict]:
+    ronda = trabajo.ronda
+    resumen = cerrar_ronda_y_actualizar_tabla(ronda)
+    resultado = {'ronda': ronda.numero, 'equipos': resumen.equipos}
+    torneo = Torneo.objects.get(pk=ronda.torneo_id)
+    if es_final(torneo, ronda):
+        campeon = coronar_campeon(torneo, ronda)
+        if campeon is not None:
+            resultado['campeon'] = campeon.nombre
+    return f'Ronda {ronda.numero} cerrada.', resultado
+
+
+def _eliminatorias(trabajo: Trabajo) -> Tuple[str, dict]:
+    torneo = Torneo.objects.get(pk=trabajo.torneo_id)
+    creada = avanzar_eliminatorias(torneo)
+    if creada is None:
+        return (f'🏆 ¡{torneo.ganador.nombre} es el campeón de {torneo.nombre}!',
+                {'campeon': torneo.ganador.nombre})
+    ronda, fase = creada
+    return f'{fase.nombre} creadas. Ingresa resultados.', {'ronda': ronda.numero}
+
+
+ACCIONES = {
+    Trabajo.EMPAREJAR: _emparejar,
+    Trabajo.CERRAR: _cerrar,
+    Trabajo.ELIMINATORIAS: _eliminatorias,
+}
+
+
+# ------------------------- cola -------------------------
+
+def _reclamar(trabajo_id: int, worker: str, **condicion) -> bool:
+    """Pasa el trabajo a 'en curso' a nombre de `worker` si sigue cumpliendo `condicion`."""
+    ahora = timezone.now()
+    return bool(
+        Trabajo.objects.filter(pk=trabajo_id, **condicion).update(
+            estado=Trabajo.EN_CURSO, worker=worker, latido=ahora, iniciado=ahora,
+            intentos=F('intentos') + 1, actualizado=ahora,
+        )
+    )
+
+
+def encolar(ronda: Ronda, accion: str, usuario=None) -> Trabajo:
+    """
+    Encola `accion` sobre `ronda` (o devuelve el trabajo que ya está en cola o
+    en curso). En línea lo ejecuta antes de devolverlo.
+    """
+    trabajo, creado = Trabajo.objects.get_or_create(
+        ronda=ronda, accion=accion,
+        defaults={'torneo_id': ronda.torneo_id, 'usuario': usuario},
+    )
+    abandonado = (
+        trabajo.estado == Trabajo.EN_CURSO
+        and trabajo.latido < timezone.now() - _vencimiento()
+    )
+    if not creado and (trabajo.terminado or abandonado):
+        # Condicional sobre lo leído: de dos pedidos simultáneos solo uno lo reinicia
+        Trabajo.objects.filter(pk=trabajo.pk, estado=trabajo.estado, latido=trabajo.latido).update(
+            estado=Trabajo.PENDIENTE, intentos=0, worker='', latido=None, mensaje='',
+            resultado=None, usuario=usuario, actualizado=timezone.now(),
+        )
+        trabajo.refresh_from_db()
+
+    if en_linea() and _reclamar(trabajo.pk, EN_LINEA, estado=Trabajo.PENDIENTE):
+        trabajo.refresh_from_db()
+        return ejecutar(trabajo)
+    return trabajo
+
+
+def tomar(worker: str) -> Optional[Trabajo]:
+    """
+    El próximo trabajo para `worker`: primero los abandonados por un worker
+    caído, después los pendientes en orden de llegada. None si no hay.
+    """
+    for _ in range(10):  # otro worker puede ganarnos el candidato
+        vencido = timezone.now() - _vencimiento()
+        abandonado = (
+            Trabajo.objects.filter(estado=Trabajo.EN_CURSO, latido__lt=vencido)
+            .order_by('id').values_list('pk', 'latido', 'intentos').first()
+        )
+        if abandonado is not None:
+            pk, latido, intentos = abandonado
+            if intentos >= MAX_INTENTOS:
+                Trabajo.objects.filter(pk=pk, estado=Trabajo.EN_CURSO, latido=latido).update(
+                    estado=Trabajo.ERROR, actualizado=timezone.now(),
+                    mensaje=f'El worker se cayó {intentos} veces con este trabajo.',
+                )
+                continue
+            if _reclamar(pk, worker, estado=Trabajo.EN_CURSO, latido=latido):
+                logger.warning('Trabajo %s retomado por %s (intento %d)', pk, worker, intentos + 1)
+                return Trabajo.objects.select_related('ronda').get(pk=pk)
+            continue
+
+        pk = (
+            Trabajo.objects.filter(estado=Trabajo.PENDIENTE)
+            .order_by('id').values_list('pk', flat=True).first()
+        )
+        if pk is None:
+            return None
+        if _reclamar(pk, worker, estado=Trabajo.PENDIENTE):
+            return Trabajo.objects.select_related('ronda').get(pk=pk)
+    return None
+
+
+def ejecutar(trabajo: Trabajo) -> Trabajo:
+    """Corre un trabajo ya reclamado por `trabajo.worker` y lo deja hecho o con error."""
+    mio = Trabajo.objects.filter(pk=trabajo.pk, worker=trabajo.worker, estado=Trabajo.EN_CURSO)
+    try:
+        with transaction.atomic():
+            mensaje, resultado = ACCIONES[trabajo.accion](trabajo)
+            if not mio.update(estado=Trabajo.HECHO, mensaje=mensaje, resultado=resultado,
+                              actualizado=timezone.now()):
+                raise TrabajoPerdido(f'El trabajo {trabajo.pk} ya no es de {trabajo.worker}.')
+    except TrabajoPerdido as e:
+        logger.warning('%s', e)
+    except Exception as e:  # noqa: BLE001 - queda registrado en el trabajo
+        if not isinstance(e, ValueError):
+            logger.exception('Trabajo %s (%s) falló', trabajo.pk, trabajo.accion)
+        mio.update(estado=Trabajo.ERROR, mensaje=str(e), actualizado=timezone.now())
+    trabajo.refresh_from_db()
+    return trabajo
+
+
+@contextmanager
+def latiendo(trabajo: Trabajo, cada: float = LATIDO):
+    """Renueva el latido de `trabajo` desde otro hilo mientras dura el bloque."""
+    parar = threading.Event()
+
+    def latir():
+        try:
+            while not parar.wait(cada):
+                try:
+                    Trabajo.objects.filter(
+                        pk=trabajo.pk, worker=trabajo.worker, estado=Trabajo.EN_CURSO,
+                    ).update(latido=timezone.now())
+                except DatabaseError as e:
+                    # SQLite ocupado por la propia acción: alcanza con el próximo latido
+                    logger.debug('Latido del trabajo %s demorado: %s', trabajo.pk, e)
+        finally:
+            connection.close()
+
+    hilo = threading.Thread(target=latir, name=f'latido-{trabajo.pk}', daemon=True)
+    hilo.start()
+    try:
+        yield
+    finally:
+        parar.set()
+        hilo.join()
+
+
+def en_cola_antes(trabajo: Trabajo) -> int:
+    """Cuántos pendientes hay delante de `trabajo` (0 si ya no está pendiente)."""
+    if trabajo.estado != Trabajo.PENDIENTE:
+        return 0
+    return Trabajo.objects.filter(estado=Trabajo.PENDIENTE, id__lt=trabajo.id).count()
@@ -2,24 +2,46 @@ from __future__ import annotations
 from django.contrib.auth.forms import UserCreationForm, AuthenticationForm
 from django.contrib.auth import login as auth_login, logout as auth_logout
 from django.contrib.auth.decorators import login_required
-from django.http import JsonResponse
-from django.views.decorators.http import require_GET
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import Http404, HttpResponse, JsonResponse, StreamingHttpResponse
+from django.template.loader import render_to_string
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition, require_GET, require_POST
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
 from django.db import transaction
-from django.db.models import Max
+from django.db.models import Count, F
 
 from .models import (
-    Torneo, Equipo, Debatiente, Ronda, Sala, SalaEquipo, ResultadoSala
+    Torneo, Equipo, Debatiente, Ronda, Sala, SalaEquipo, ResultadoSala, Trabajo
 )
 from .forms import (
     TorneoForm, EquipoForm, DebatienteForm,
-    EquiposFormSet
+    EquiposFormSet, ImportarEquiposForm
 )
+from .cache import invalidar_tabla, pagina_publica, tabla_oradores, tabla_torneo, tabla_tras_ronda
+from .eliminatorias import EQUIPOS_POR_SALA, nombre_fase
+from .eventos import flujo_sse
+from .exportar import FORMATOS, RECURSOS, aexportar, exportar
+from .importar import leer_equipos
+from . import simulacion
+from .trabajos import en_cola_antes, encolar
 from .services import (
-    generar_emparejamientos,
-    cerrar_ronda_y_actualizar_tabla,
-    _puntos_por_ranking,
+    anotar_oradores,
+    crear_equipos_en_bloque,
+    coronar_campeon,
+    corregir_votos_sala,
+    es_final,
+    guardar_resultados,
+    pagina_torneos,
+    reabrir_ronda,
+    registrar_votos_sala,
+    VersionObsoleta,
+    salas_con_participaciones,
+    TORNEOS_CERCANOS,
+    torneos_cerca,
+    torneos_en_zona,
 )
 
 
@@ -72,8 +94,17 @@ def logout_view(request):
 # =========================
 @login_required
 def home(request):
-    torneos = Torneo.objects.order_by('-creado')
-    return render(request, 'home.html', {'torneos': torneos})
+    mios = request.GET.get('mios') == '1'
+    torneos, siguiente = pagina_torneos(
+        cursor=request.GET.get('cursor'),
+        usuario=request.user if mios else None,
+    )
+    return render(request, 'home.html', {
+        'torneos': torneos,
+        'siguiente': siguiente,
+        'mios': mios,
+        'es_primera': not request.GET.get('cursor'),
+    })
 
 
 # =========================
@@ -85,7 +116,9 @@ def torneo_nuevo(request):
     if request.method == 'POST':
         form = TorneoForm(request.POST)
         if form.is_valid():
-            torneo = form.save()
+            torneo = form.save(commit=False)
+            torneo.creado_por = request.user
+            torneo.save()
             # crear rondas clasificatorias 1..N
             for n in range(1, torneo.n_rondas + 1):
                 Ronda.objects.create(torneo=torneo, numero=n)
@@ -123,36 +156,55 @@ def torneo_eliminar(request, pk):
 # ===========================================
 # Paso 2: Carga MASIVA de equipos (exactamente N)
 # ===========================================
+# Más allá de esto el formulario uno-por-equipo es inmanejable: solo se ofrece el archivo
+MAX_FORMULARIOS_EQUIPOS = 100
+
+
 @login_required
 @transaction.atomic
 def torneo_equipos(request, torneo_id: int):
     torneo = get_object_or_404(Torneo, id=torneo_id)
     prefix = 'eq'
-    if request.method == 'POST':
-        formset = EquiposFormSet(request.POST, prefix=prefix)
-        if formset.is_valid():
-            # limpiar equipos no-swing previos (si los hubiera)
-            Equipo.objects.filter(torneo=torneo, es_swing=False).delete()
-            creados = 0
-            for f in formset:
-                data = f.cleaned_data
-                if not data or not data.get('nombre_equipo'):
-                    continue
-                equipo = Equipo.objects.create(torneo=torneo, nombre=data['nombre_equipo'])
-                Debatiente.objects.create(equipo=equipo, nombre=data['integrante1'])
-                Debatiente.objects.create(equipo=equipo, nombre=data['integrante2'])
-                creados += 1
-            if creados == 0:
-                messages.error(request, 'Debes ingresar al menos un equipo.')
-                formset = EquiposFormSet(prefix=prefix, initial=[{} for _ in range(torneo.n_equipos)])
-                return render(request, 'torneo_equipos.html', {'torneo': torneo, 'formset': formset})
-            messages.success(request, f'{creados} equipos guardados.')
-            return redirect('ronda_view', torneo_id=torneo.id, num=1)
-        else:
-            return render(request, 'torneo_equipos.html', {'torneo': torneo, 'formset': formset})
+    con_formset = torneo.n_equipos <= MAX_FORMULARIOS_EQUIPOS
+
+    def _pantalla(formset=None, importar=None):
+        if formset is None and con_formset:
+            formset = EquiposFormSet(prefix=prefix, initial=[{} for _ in range(torneo.n_equipos)])
+        return render(request, 'torneo_equipos.html', {
+            'torneo': torneo, 'formset': formset,
+            'importar': importar or ImportarEquiposForm(),
+        })
+
+    if request.method != 'POST':
+        return _pantalla()
+
+    # a) Carga por archivo CSV/TSV
+    if request.FILES:
+        importar = ImportarEquiposForm(request.POST, request.FILES)
+        if not importar.is_valid():
+            return _pantalla(importar=importar)
+        filas, errores = leer_equipos(importar.cleaned_data['archivo'])
+        if errores:
+            for error in errores:
+                messages.error(request, error)
+            return _pantalla(importar=importar)
+    # b) Formulario uno-por-equipo
     else:
-        formset = EquiposFormSet(prefix=prefix, initial=[{} for _ in range(torneo.n_equipos)])
-        return render(request, 'torneo_equipos.html', {'torneo': torneo, 'formset': formset})
+        formset = EquiposFormSet(request.POST, prefix=prefix)
+        if not formset.is_valid():
+            return _pantalla(formset=formset)
+        filas = [
+            (f.cleaned_data['nombre_equipo'], f.cleaned_data['integrante1'], f.cleaned_data['integrante2'])
+            for f in formset
+            if f.cleaned_data and f.cleaned_data.get('nombre_equipo')
+        ]
+        if not filas:
+            messages.error(request, 'Debes ingresar al menos un equipo.')
+            return _pantalla()
+
+    creados = crear_equipos_en_bloque(torneo, filas)
+    messages.success(request, f'{creados} equipos guardados.')
+    return redirect('ronda_view', torneo_id=torneo.id, num=1)
 
 
 # =========================
@@ -174,6 +226,7 @@ def equipo_nuevo(request, torneo_id):
             e = form.save(commit=False)
             e.torneo = torneo
             e.save()
+            invalidar_tabla(torneo.id)
             messages.success(request, 'Equipo creado.')
             return redirect('equipos_list', torneo_id=torneo.id)
     else:
@@ -188,6 +241,7 @@ def equipo_editar(request, pk):
         form = EquipoForm(request.POST, instance=e)
         if form.is_valid():
             form.save()
+            invalidar_tabla(e.torneo_id)
             messages.success(request, 'Equipo actualizado.')
             return redirect('equipos_list', torneo_id=e.torneo_id)
     else:
@@ -201,6 +255,7 @@ def equipo_eliminar(request, pk):
     torneo_id = e.torneo_id
     if request.method == 'POST':
         e.delete()
+        invalidar_tabla(torneo_id)
         messages.success(request, 'Equipo eliminado.')
         return redirect('equipos_list', torneo_id=torneo_id)
     return render(request, 'confirm_delete.html', {
@@ -267,8 +322,38 @@ def miembro_eliminar(request, pk):
 @login_required
 def torneo_tabla(request, torneo_id):
     torneo = get_object_or_404(Torneo, id=torneo_id)
-    equipos = torneo.equipos.order_by('-puntos', '-speakers_total', '-speakers_prom', 'id')
-    return render(request, 'torneo_tabla.html', {'torneo': torneo, 'equipos': equipos})
+    # Rondas clasificatorias cerradas: se puede ver la tabla tal como quedó tras cada una
+    cerradas = list(
+        torneo.rondas.filter(cerrada=True, numero__lte=torneo.n_rondas)
+        .order_by('numero').values_list('numero', flat=True)
+    )
+    tras = request.GET.get('ronda', '')
+    tras = int(tras) if tras.isdigit() and int(tras) in cerradas else None
+    equipos = tabla_tras_ronda(torneo, tras) if tras else tabla_torneo(torneo)
+    return render(request, 'torneo_tabla.html', {
+        'torneo': torneo, 'equipos': equipos, 'cerradas': cerradas, 'tras': tras,
+        # El stream de eventos solo se abre bajo ASGI (ver torneo_eventos)
+        'eventos_en_vivo': isinstance(request, ASGIRequest),
+    })
+
+
+@login_required
+def torneo_oradores(request, torneo_id):
+    torneo = get_object_or_404(Torneo, id=torneo_id)
+    oradores = tabla_oradores(torneo)
+    return render(request, 'torneo_oradores.html', {'torneo': torneo, 'oradores': oradores})
+
+
+@login_required
+def torneo_break(request, torneo_id):
+    torneo = get_object_or_404(Torneo, id=torneo_id)
+    if not simulacion.disponible():
+        messages.error(request, 'El simulador de break no está disponible (falta NumPy).')
+        return redirect('torneo_tabla', torneo_id=torneo.id)
+    opciones = {str(n): n for n in simulacion.SIMULACIONES_PERMITIDAS}
+    simulaciones = opciones.get(request.GET.get('simulaciones'), simulacion.SIMULACIONES)
+    resultado = simulacion.simular_break(torneo, simulaciones)
+    return render(request, 'torneo_break.html', {'torneo': torneo, 'resultado': resultado})
 
 
 @login_required
@@ -300,7 +385,7 @@ def torneo_continuar(request, torneo_id: int):
 @login_required
 def entre_rondas(request, torneo_id, num):
     torneo = get_object_or_404(Torneo, id=torneo_id)
-    equipos = torneo.equipos.order_by('-puntos', '-speakers_total', '-speakers_prom', 'id')
+    equipos = tabla_torneo(torneo)
 
     if request.method == 'POST':
         next_num = num + 1
@@ -312,12 +397,8 @@ def entre_rondas(request, torneo_id, num):
                 defaults={'emparejada': False, 'cerrada': False},
             )
             if not r.emparejada:
-                # limpiar si hubiese algo inconsistentemente creado
-                if r.salas.exists():
-                    for s in r.salas.all():
-                        s.participaciones.all().delete()
-                        s.delete()
-                generar_emparejamientos(r)
+                # Emparejar puede tardar con torneos grandes: va a la cola
+                return _seguir_trabajo(request, torneo, encolar(r, Trabajo.EMPAREJAR, request.user))
             return redirect('ronda_view', torneo_id=torneo.id, num=next_num)
         else:
             return redirect('eliminatorias', torneo_id=torneo.id)
@@ -330,6 +411,29 @@ def entre_rondas(request, torneo_id, num):
 # =========================
 # Ronda: ingreso de resultados
 # =========================
+def _leer_votos_sala(datos, sala: Sala, ses: list):
+    """
+    Lee y valida los resultados de una sala desde el POST.
+    Devuelve (valores, error): valores = [(se, ranking, orador1, orador2), ...].
+    """
+    rankings, valores = [], []
+    for idx, se in enumerate(ses):
+        prefix = f"s{sala.id}_{idx}_"
+        try:
+            ranking = int(datos.get(prefix + "ranking"))
+            or1 = int(datos.get(prefix + "orador1"))
+            or2 = int(datos.get(prefix + "orador2"))
+        except (TypeError, ValueError):
+            return [], f"Completa todos los resultados de {sala.nombre}."
+        if ranking not in (1, 2, 3, 4) or not (50 <= or1 <= 100) or not (50 <= or2 <= 100):
+            return [], f"Valores inválidos en {sala.nombre}."
+        rankings.append(ranking)
+        valores.append((se, ranking, or1, or2))
+    if set(rankings) != {1, 2, 3, 4}:
+        return [], f"En {sala.nombre}, los lugares deben ser 1, 2, 3 y 4 (sin repetir)."
+    return valores, None
+
+
 @login_required
 @transaction.atomic
 def ronda_view(request, torneo_id: int, num: int):
@@ -338,90 +442,169 @@ def ronda_view(request, torneo_id: int, num: int):
 
     # Generar emparejamientos si hace falta (idempotente)
     if not ronda.emparejada:
-        if ronda.salas.exists():
-            for s in ronda.salas.all():
-                s.participaciones.all().delete()
-                s.delete()
-        generar_emparejamientos(ronda)
+        trabajo = encolar(ronda, Trabajo.EMPAREJAR, request.user)
+        if trabajo.estado != Trabajo.HECHO:
+            return _seguir_trabajo(request, torneo, trabajo)
+        ronda.refresh_from_db()
 
-    salas = list(ronda.salas.all().order_by('id'))
+    # Todas las participaciones de la ronda en una sola consulta
+    paquetes = salas_con_participaciones(ronda)
 
     if request.method == 'POST':
-        # Guardar resultados
-        for sala in salas:
-            ses = list(sala.participaciones.order_by('posicion'))
-            rankings, valores = [], []
-            for idx, se in enumerate(ses):
-                prefix = f"s{sala.id}_{idx}_"
-                try:
-                    ranking = int(request.POST.get(prefix + "ranking"))
-                    or1 = int(request.POST.get(prefix + "orador1"))
-                    or2 = int(request.POST.get(prefix + "orador2"))
-                except (TypeError, ValueError):
-                    messages.error(request, f"Completa todos los resultados de {sala.nombre}.")
-                    return redirect('ronda_view', torneo_id=torneo.id, num=num)
-                if ranking not in (1, 2, 3, 4) or not (50 <= or1 <= 100) or not (50 <= or2 <= 100):
-                    messages.error(request, f"Valores inválidos en {sala.nombre}.")
-                    return redirect('ronda_view', torneo_id=torneo.id, num=num)
-                rankings.append(ranking)
-                valores.append((se, ranking, or1, or2))
-            if set(rankings) != {1, 2, 3, 4}:
-                messages.error(request, f"En {sala.nombre}, los lugares deben ser 1, 2, 3 y 4 (sin repetir).")
-                return redirect('ronda_view', torneo_id=torneo.id, num=num)
-
-            for se, ranking, or1, or2 in valores:
-                puntos = _puntos_por_ranking(ranking)
-                ResultadoSala.objects.update_or_create(
-                    sala_equipo=se,
-                    defaults={'ranking': ranking, 'puntos': puntos, 'orador1': or1, 'orador2': or2}
-                )
-
-        # Cerrar y actualizar tabla
-        try:
-            cerrar_ronda_y_actualizar_tabla(ronda)
-        except Exception as e:
-            messages.error(request, f"No se pudo cerrar la ronda: {e}")
+        if ronda.cerrada:
+            messages.error(request, 'La ronda ya está cerrada.')
+            return redirect('torneo_tabla', torneo_id=torneo.id)
+
+        # Validar todas las salas en memoria antes de escribir nada
+        valores, errores = [], []
+        for sala, ses in paquetes:
+            valores_sala, error = _leer_votos_sala(request.POST, sala, ses)
+            if error:
+                errores.append(error)
+            else:
+                valores.extend(valores_sala)
+        if errores:
+            for error in errores:
+                messages.error(request, error)
             return redirect('ronda_view', torneo_id=torneo.id, num=num)
 
-        # ¿Es una final? (eliminatoria con una sola sala)
-        es_eliminatoria = ronda.numero > torneo.n_rondas
-        es_final = es_eliminatoria and ronda.salas.count() == 1
+        # Guardar resultados (un único upsert masivo); los formularios por sala
+        # abiertos antes quedan obsoletos (VersionObsoleta) en vez de pisar esto
+        guardar_resultados(ronda, valores, usuario=request.user)
+        Sala.objects.filter(ronda=ronda).update(version=F('version') + 1)
 
-        if es_final:
-            sala_final = ronda.salas.first()
-            try:
-                se_ganador = sala_final.participaciones.get(resultado__ranking=1)
-            except SalaEquipo.DoesNotExist:
-                messages.warning(request, "No se encontró el ganador de la Final. Revisa los resultados.")
-                return redirect('ronda_view', torneo_id=torneo.id, num=num)
-            torneo.ganador = se_ganador.equipo
-            torneo.cerrado = True
-            torneo.save(update_fields=['ganador', 'cerrado'])
-            messages.success(request, f"🏆 ¡{torneo.ganador.nombre} es el campeón de {torneo.nombre}!")
-            return redirect('torneo_tabla', torneo_id=torneo.id)
+        # Cerrar y actualizar tabla (en la cola)
+        return _seguir_trabajo(request, torneo, encolar(ronda, Trabajo.CERRAR, request.user))
 
-        # Flujo normal: clasif o siguiente eliminatoria
-        if num < torneo.n_rondas:
-            return redirect('entre_rondas', torneo_id=torneo.id, num=num)
-        else:
-            messages.success(request, 'Rondas finalizadas. Puedes crear eliminatorias.')
-            return redirect('eliminatorias', torneo_id=torneo.id)
-
-    # GET: pintar formulario
-    paquetes = []
-    for sala in salas:
-        ses = list(sala.participaciones.order_by('posicion'))
-        paquetes.append((sala, ses))
+    # GET: pintar formulario, con el nombre de quien recibe cada puntaje de orador
+    anotar_oradores([se for _, ses in paquetes for se in ses])
     return render(request, 'ronda.html', {'torneo': torneo, 'ronda': ronda, 'paquetes': paquetes})
 
 
+@login_required
+@require_POST
+def ronda_reabrir(request, torneo_id: int, num: int):
+    """Reabre una ronda cerrada para corregir votos (resta solo lo que sumó esa ronda)."""
+    torneo = get_object_or_404(Torneo, id=torneo_id)
+    ronda = get_object_or_404(Ronda, torneo=torneo, numero=num)
+    if torneo.cerrado:
+        messages.error(request, 'El torneo ya está cerrado.')
+        return redirect('torneo_tabla', torneo_id=torneo.id)
+    try:
+        reabrir_ronda(ronda)
+    except ValueError as e:
+        messages.error(request, str(e))
+        return redirect('torneo_tabla', torneo_id=torneo.id)
+    messages.success(request, f'Ronda {num} reabierta: corrige los votos y vuelve a guardarla.')
+    return redirect('ronda_view', torneo_id=torneo.id, num=num)
+
+
+def _seguir_trabajo(request, torneo: Torneo, trabajo: Trabajo):
+    """
+    A dónde ir después de encolar: si el trabajo ya terminó (en línea), al
+    paso siguiente; si no, a la pantalla de espera.
+    """
+    if not trabajo.terminado:
+        return redirect('trabajo_estado', torneo_id=torneo.id, trabajo_id=trabajo.id)
+    ronda = trabajo.ronda
+
+    if trabajo.estado == Trabajo.ERROR:
+        if trabajo.accion == Trabajo.CERRAR:
+            messages.error(request, f"No se pudo cerrar la ronda: {trabajo.mensaje}")
+            return redirect('ronda_view', torneo_id=torneo.id, num=ronda.numero)
+        messages.error(request, trabajo.mensaje)
+        return redirect('torneo_tabla', torneo_id=torneo.id)
+
+    if trabajo.accion == Trabajo.EMPAREJAR:
+        return redirect('ronda_view', torneo_id=torneo.id, num=ronda.numero)
+    if trabajo.accion == Trabajo.CERRAR:
+        torneo.refresh_from_db()
+        return _despues_del_cierre(request, torneo, ronda)
+    messages.success(request, trabajo.mensaje)
+    if 'ronda' in trabajo.resultado:
+        return redirect('ronda_view', torneo_id=torneo.id, num=trabajo.resultado['ronda'])
+    return redirect('torneo_tabla', torneo_id=torneo.id)
+
+
+@login_required
+def trabajo_estado(request, torneo_id: int, trabajo_id: int):
+    """Pantalla de espera: consulta api_trabajo y sigue cuando el trabajo termina."""
+    torneo = get_object_or_404(Torneo, id=torneo_id)
+    trabajo = get_object_or_404(Trabajo.objects.select_related('ronda'), id=trabajo_id, torneo=torneo)
+    if trabajo.terminado:
+        return _seguir_trabajo(request, torneo, trabajo)
+    return render(request, 'trabajo.html', {
+        'torneo': torneo, 'trabajo': trabajo, 'en_cola': en_cola_antes(trabajo),
+    })
+
+
+def _despues_del_cierre(request, torneo: Torneo, ronda: Ronda):
+    """A dónde ir cuando se cierra una ronda: campeón, entre rondas o eliminatorias."""
+    if es_final(torneo, ronda):
+        campeon = torneo.ganador if torneo.cerrado else coronar_campeon(torneo, ronda)
+        if campeon is None:
+            messages.warning(request, "No se encontró el ganador de la Final. Revisa los resultados.")
+            return redirect('ronda_view', torneo_id=torneo.id, num=ronda.numero)
+        messages.success(request, f"🏆 ¡{campeon.nombre} es el campeón de {torneo.nombre}!")
+        return redirect('torneo_tabla', torneo_id=torneo.id)
+
+    # Flujo normal: clasif o siguiente eliminatoria
+    if ronda.numero < torneo.n_rondas:
+        return redirect('entre_rondas', torneo_id=torneo.id, num=ronda.numero)
+    messages.success(request, 'Rondas finalizadas. Puedes crear eliminatorias.')
+    return redirect('eliminatorias', torneo_id=torneo.id)
+
+
+@login_required
+def sala_votos(request, torneo_id: int, sala_id: int):
+    """
+    Carga de votos de una sola sala (un juez por sala, en paralelo).
+    La última sala en llegar cierra la ronda. Con la ronda ya cerrada, el
+    envío es una corrección: solo se recalculan los equipos de la sala.
+    """
+    sala = get_object_or_404(Sala.objects.select_related('ronda__torneo'), id=sala_id, ronda__torneo_id=torneo_id)
+    ronda, torneo = sala.ronda, sala.ronda.torneo
+    ses = list(
+        sala.participaciones.select_related('equipo', 'resultado').order_by('posicion')
+    )
+
+    if request.method == 'POST':
+        valores, error = _leer_votos_sala(request.POST, sala, ses)
+        version = request.POST.get('version', '')
+        if not error and not version.isdigit():
+            error = 'Formulario inválido: recarga la página.'
+        if not error:
+            try:
+                if ronda.cerrada:
+                    resumen = corregir_votos_sala(sala, int(version), valores, usuario=request.user)
+                    messages.success(request, f'Votos de {sala.nombre} corregidos.')
+                    if resumen.desactualizadas:
+                        numeros = ', '.join(str(r.numero) for r in resumen.desactualizadas)
+                        messages.warning(
+                            request,
+                            f'Emparejadas con la tabla anterior (no se modificaron): ronda {numeros}.',
+                        )
+                    return redirect('sala_votos', torneo_id=torneo.id, sala_id=sala.id)
+                cerro = registrar_votos_sala(sala, int(version), valores, usuario=request.user)
+            except (VersionObsoleta, ValueError) as e:
+                error = str(e)
+            else:
+                if cerro:
+                    torneo.refresh_from_db()
+                    return _despues_del_cierre(request, torneo, ronda)
+                messages.success(request, f'Votos de {sala.nombre} guardados.')
+                return redirect('sala_votos', torneo_id=torneo.id, sala_id=sala.id)
+        messages.error(request, error)
+        sala.refresh_from_db(fields=['version'])
+        ses = list(sala.participaciones.select_related('equipo', 'resultado').order_by('posicion'))
+
+    anotar_oradores(ses)
+    return render(request, 'sala_votos.html', {'torneo': torneo, 'ronda': ronda, 'sala': sala, 'ses': ses})
+
+
 # =========================
 # Eliminatorias (progresivas)
 # =========================
-def _nombre_fase(n: int) -> str:
-    mapping = {32: 'Octavos', 16: 'Cuartos', 8: 'Semifinal', 4: 'Final'}
-    return mapping.get(n, 'Eliminatoria')
-
 @login_required
 @transaction.atomic
 def eliminatorias_view(request, torneo_id):
@@ -432,91 +615,355 @@ def eliminatorias_view(request, torneo_id):
         messages.info(request, 'Este torneo ya está cerrado.')
         return redirect('torneo_tabla', torneo_id=torneo.id)
 
-    base = torneo.n_rondas
-    elim_qs = torneo.rondas.filter(numero__gt=base).order_by('numero')
+    # La próxima fase sale de la última ronda: la clasificatoria final o la última eliminatoria
+    origen = torneo.rondas.order_by('-numero').first()
+    if origen is None:
+        messages.error(request, 'El torneo no tiene rondas.')
+        return redirect('torneo_tabla', torneo_id=torneo.id)
+
+    # Si la última eliminatoria NO está cerrada -> ir a ingresarla (no crear otra)
+    if origen.numero > torneo.n_rondas and not origen.cerrada:
+        return redirect('ronda_view', torneo_id=torneo.id, num=origen.numero)
+
+    # Armar la fase (o coronar al campeón) va en la cola: un doble clic no crea dos
+    return _seguir_trabajo(request, torneo, encolar(origen, Trabajo.ELIMINATORIAS, request.user))
+
 
-    # 1) Si no hay eliminatorias aún -> crear la primera desde la tabla final
-    if not elim_qs.exists():
-        clasificados = list(
-            torneo.equipos.order_by('-puntos', '-speakers_total', '-speakers_prom', 'id')[:torneo.n_clasificados]
+@login_required
+@require_GET
+def torneo_ubicacion_api(request, torneo_id: int):
+    torneo = get_object_or_404(Torneo, id=torneo_id)
+    return JsonResponse({
+        'id': torneo.id,
+        'nombre': torneo.nombre,
+        'ubicacion_nombre': torneo.lugar_nombre,
+        'lat': torneo.lugar_lat,
+        'lng': torneo.lugar_lng,
+    })
+
+
+# Tope de resultados por búsqueda de torneos cercanos
+MAX_CERCANOS = 500
+
+
+def _parametros(request, rangos: dict) -> dict:
+    """Lee los floats de la query string; ValueError si falta uno o está fuera de rango."""
+    valores = {}
+    for nombre, (minimo, maximo) in rangos.items():
+        try:
+            valor = float(request.GET[nombre])
+        except (KeyError, ValueError):
+            raise ValueError(f'Falta el parámetro numérico "{nombre}".')
+        if not minimo <= valor <= maximo:
+            raise ValueError(f'"{nombre}" debe estar entre {minimo} y {maximo}.')
+        valores[nombre] = valor
+    return valores
+
+
+def _limite(request) -> int:
+    try:
+        return max(1, min(int(request.GET.get('limite', TORNEOS_CERCANOS)), MAX_CERCANOS))
+    except ValueError:
+        return TORNEOS_CERCANOS
+
+
+def _respuesta_cercanos(torneos, truncado: bool) -> JsonResponse:
+    return JsonResponse({
+        'torneos': [t._asdict() for t in torneos],
+        'truncado': truncado,
+    })
+
+
+@login_required
+@require_GET
+@cache_control(private=True, max_age=60)
+def api_torneos_cerca(request):
+    """?lat=&lng=&radio_km=[&limite=]: torneos dentro del radio, del más cercano al más lejano."""
+    try:
+        p = _parametros(request, {'lat': (-90, 90), 'lng': (-180, 180), 'radio_km': (0, 20040)})
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    return _respuesta_cercanos(*torneos_cerca(p['lat'], p['lng'], p['radio_km'], _limite(request)))
+
+
+@login_required
+@require_GET
+@cache_control(private=True, max_age=60)
+def api_torneos_zona(request):
+    """?sur=&oeste=&norte=&este=[&limite=]: torneos dentro del rectángulo (oeste > este cruza el 180)."""
+    try:
+        p = _parametros(request, {'sur': (-90, 90), 'oeste': (-180, 180),
+                                  'norte': (-90, 90), 'este': (-180, 180)})
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    if p['sur'] > p['norte']:
+        return JsonResponse({'error': '"sur" no puede ser mayor que "norte".'}, status=400)
+    zona = (p['sur'], p['oeste'], p['norte'], p['este'])
+    return _respuesta_cercanos(*torneos_en_zona(zona, _limite(request)))
+
+
+# =========================
+# API JSON con GET condicional (ETag / Last-Modified)
+# =========================
+def _marca_torneo(request, torneo_id):
+    """(version_tabla, actualizado) del torneo: una consulta indexada por request."""
+    if not hasattr(request, '_marca_torneo'):
+        request._marca_torneo = (
+            Torneo.objects.filter(id=torneo_id)
+            .values_list('version_tabla', 'actualizado')
+            .first()
         )
-        if len(clasificados) < 4 or (len(clasificados) % 4 != 0):
-            messages.error(request, 'El número de clasificados debe ser un múltiplo de 4 (mínimo 4).')
-            return redirect('torneo_tabla', torneo_id=torneo.id)
+    return request._marca_torneo
 
-        numero = base + 1
-        ronda = Ronda.objects.create(torneo=torneo, numero=numero, emparejada=True, cerrada=False)
 
-        fase = _nombre_fase(len(clasificados))
-        idx = 1
-        for i in range(0, len(clasificados), 4):
-            grupo = clasificados[i:i+4]
-            sala = Sala.objects.create(ronda=ronda, nombre=f'{fase} {idx}')
-            for pidx, equipo in enumerate(grupo):
-                SalaEquipo.objects.create(sala=sala, equipo=equipo, posicion=['OG', 'OO', 'CG', 'CO'][pidx])
-            idx += 1
+def _etag_torneo(request, torneo_id, **kwargs):
+    marca = _marca_torneo(request, torneo_id)
+    if marca is None:
+        return None
+    version, actualizado = marca
+    return f'{torneo_id}-{version}-{actualizado.timestamp():.6f}'
 
-        messages.success(request, f'{fase} creadas. Ingresa resultados.')
-        return redirect('ronda_view', torneo_id=torneo.id, num=ronda.numero)
 
-    # 2) Ya hay eliminatorias: ver la última
-    last_num = elim_qs.aggregate(m=Max('numero'))['m']
-    last_round = elim_qs.get(numero=last_num)
+def _ultima_modificacion_torneo(request, torneo_id, **kwargs):
+    marca = _marca_torneo(request, torneo_id)
+    return marca[1] if marca else None
+
+
+# Si nada cambió desde el último pedido responde 304 sin ejecutar la vista
+api_condicional = condition(
+    etag_func=_etag_torneo, last_modified_func=_ultima_modificacion_torneo
+)
 
-    # 2.a) Si la última NO está cerrada -> ir a ingresarla (no crear otra)
-    if not last_round.cerrada:
-        return redirect('ronda_view', torneo_id=torneo.id, num=last_round.numero)
 
-    # 2.b) La última sí está cerrada -> calcular ganadores para siguiente fase
-    ganadores = list(
-        Equipo.objects.filter(
-            salaequipo__sala__ronda=last_round,
-            salaequipo__resultado__ranking=1
-        ).distinct()
+def _ronda_actual(torneo: Torneo):
+    """Primera ronda sin cerrar; si están todas cerradas, la última."""
+    return (
+        torneo.rondas.filter(cerrada=False).order_by('numero').first()
+        or torneo.rondas.order_by('-numero').first()
     )
 
-    # Si ya tenemos 1 ganador -> cerrar torneo
-    if len(ganadores) == 1:
-        torneo.ganador = ganadores[0]
-        torneo.cerrado = True
-        torneo.save(update_fields=['ganador', 'cerrado'])
-        messages.success(request, f"🏆 ¡{torneo.ganador.nombre} es el campeón de {torneo.nombre}!")
-        return redirect('torneo_tabla', torneo_id=torneo.id)
 
-    # Si hay 0 ganadores, avisar
-    if len(ganadores) == 0:
-        messages.error(request, 'No se encontraron ganadores en la última eliminatoria. Revisa resultados.')
-        return redirect('ronda_view', torneo_id=torneo.id, num=last_round.numero)
+@login_required
+@require_GET
+@cache_control(private=True, no_cache=True)
+@api_condicional
+def api_tabla(request, torneo_id: int):
+    torneo = get_object_or_404(Torneo, id=torneo_id)
+    return JsonResponse({
+        'torneo': torneo.id,
+        'version': torneo.version_tabla,
+        'equipos': [
+            {'posicion': i, **fila._asdict()}
+            for i, fila in enumerate(tabla_torneo(torneo), start=1)
+        ],
+    })
 
-    # Crear siguiente fase (debe ser múltiplo de 4)
-    if len(ganadores) % 4 != 0:
-        messages.error(request, 'La cantidad de ganadores no es múltiplo de 4. Revisa resultados.')
-        return redirect('ronda_view', torneo_id=torneo.id, num=last_round.numero)
 
-    numero = last_round.numero + 1
-    ronda = Ronda.objects.create(torneo=torneo, numero=numero, emparejada=True, cerrada=False)
+@login_required
+@require_GET
+@cache_control(private=True, no_cache=True)
+@api_condicional
+def api_cuadro(request, torneo_id: int):
+    torneo = get_object_or_404(Torneo, id=torneo_id)
+    ronda = _ronda_actual(torneo)
+    if ronda is None:
+        return JsonResponse({'torneo': torneo.id, 'ronda': None, 'salas': []})
+    return JsonResponse({
+        'torneo': torneo.id,
+        'ronda': ronda.numero,
+        'emparejada': ronda.emparejada,
+        'cerrada': ronda.cerrada,
+        'salas': [
+            {
+                'id': sala.id,
+                'nombre': sala.nombre,
+                'equipos': [
+                    {'posicion': se.posicion, 'equipo_id': se.equipo_id, 'equipo': se.equipo.nombre}
+                    for se in ses
+                ],
+            }
+            for sala, ses in salas_con_participaciones(ronda)
+        ],
+    })
 
-    fase = _nombre_fase(len(ganadores))
-    idx = 1
-    for i in range(0, len(ganadores), 4):
-        grupo = ganadores[i:i+4]
-        sala = Sala.objects.create(ronda=ronda, nombre=f'{fase} {idx}')
-        for pidx, equipo in enumerate(grupo):
-            SalaEquipo.objects.create(sala=sala, equipo=equipo, posicion=['OG', 'OO', 'CG', 'CO'][pidx])
-        idx += 1
 
-    messages.success(request, f'{fase} creadas. Ingresa resultados.')
-    return redirect('ronda_view', torneo_id=torneo.id, num=ronda.numero)
+@login_required
+@require_GET
+@cache_control(private=True, no_cache=True)
+@api_condicional
+def api_estado(request, torneo_id: int):
+    torneo = get_object_or_404(Torneo.objects.select_related('ganador'), id=torneo_id)
+    rondas = (
+        torneo.rondas
+        .order_by('numero')
+        .annotate(
+            participaciones=Count('salas__participaciones'),
+            resultados=Count('salas__participaciones__resultado'),
+        )
+    )
+    actual = next((r for r in rondas if not r.cerrada), None)
+    return JsonResponse({
+        'torneo': torneo.id,
+        'cerrado': torneo.cerrado,
+        'ganador': (
+            {'id': torneo.ganador.id, 'nombre': torneo.ganador.nombre}
+            if torneo.ganador else None
+        ),
+        'ronda_actual': actual.numero if actual else None,
+        'rondas': [
+            {
+                'numero': r.numero,
+                'eliminatoria': r.numero > torneo.n_rondas,
+                'emparejada': r.emparejada,
+                'cerrada': r.cerrada,
+                'resultados': r.resultados,
+                'participaciones': r.participaciones,
+            }
+            for r in rondas
+        ],
+    })
 
 
 @login_required
 @require_GET
-def torneo_ubicacion_api(request, torneo_id: int):
-    torneo = get_object_or_404(Torneo, id=torneo_id)
+@cache_control(private=True, no_cache=True)
+def api_trabajo(request, trabajo_id: int):
+    trabajo = get_object_or_404(Trabajo, id=trabajo_id)
     return JsonResponse({
-        'id': torneo.id,
-        'nombre': torneo.nombre,
-        'ubicacion_nombre': torneo.lugar_nombre,
-        'lat': torneo.lugar_lat,
-        'lng': torneo.lugar_lng,
+        'id': trabajo.id,
+        'torneo': trabajo.torneo_id,
+        'accion': trabajo.accion,
+        'estado': trabajo.estado,
+        'terminado': trabajo.terminado,
+        'en_cola': en_cola_antes(trabajo),
+        'intentos': trabajo.intentos,
+        'mensaje': trabajo.mensaje,
+        'resultado': trabajo.resultado,
+        'creado': trabajo.creado.isoformat(),
+        'iniciado': trabajo.iniciado.isoformat() if trabajo.iniciado else None,
     })
+
+
+# =========================
+# Páginas públicas (sin login, en caché)
+# =========================
+# No tocan la sesión ni el usuario: el HTML entero se guarda en caché bajo la
+# marca del torneo en la base (version_tabla, actualizado), que cambia con
+# cada cambio del torneo en cualquier proceso. Un proxy inverso puede
+# servirlo s-maxage segundos sin llegar a Django.
+pagina_cacheable = cache_control(
+    public=True,
+    max_age=getattr(settings, 'TABLA_PUBLICO_MAX_AGE', 10),
+    s_maxage=getattr(settings, 'TABLA_PUBLICO_S_MAXAGE', 30),
+)
+
+
+def _marca_publica(request, torneo_id):
+    """(publico, version_tabla, actualizado) del torneo: una consulta por PK por request."""
+    if not hasattr(request, '_marca_publica'):
+        request._marca_publica = (
+            Torneo.objects.filter(id=torneo_id)
+            .values_list('publico', 'version_tabla', 'actualizado')
+            .first()
+        )
+    return request._marca_publica
+
+
+def _etag_publica(request, torneo_id, **kwargs):
+    """También es la clave en la caché. None si el torneo no existe o no es público."""
+    marca = _marca_publica(request, torneo_id)
+    if marca is None or not marca[0]:
+        return None
+    _, version, actualizado = marca
+    return f'{request.resolver_match.url_name}-{torneo_id}-{version}-{actualizado.timestamp():.6f}'
+
+
+# 304 si el torneo no cambió, con la sola consulta de la marca
+publica_condicional = condition(etag_func=_etag_publica)
+
+
+def _servir_publica(request, torneo_id: int, vista: str, armar):
+    """`armar(torneo)` da el contexto de la plantilla publico_<vista>.html."""
+    clave = _etag_publica(request, torneo_id)
+    if clave is None:
+        # Antes de tocar la caché: recorrer ids no la llena de páginas vacías
+        raise Http404('Torneo inexistente o no público.')
+
+    def html():
+        torneo = get_object_or_404(Torneo.objects.select_related('ganador'), pk=torneo_id, publico=True)
+        return render_to_string(f'publico_{vista}.html', {'torneo': torneo, 'vista': vista, **armar(torneo)})
+
+    return HttpResponse(pagina_publica(clave, html))
+
+
+@require_GET
+@pagina_cacheable
+@publica_condicional
+def publico_tabla(request, torneo_id: int):
+    return _servir_publica(request, torneo_id, 'tabla', lambda torneo: {'equipos': tabla_torneo(torneo)})
+
+
+@require_GET
+@pagina_cacheable
+@publica_condicional
+def publico_cuadro(request, torneo_id: int):
+    def armar(torneo):
+        ronda = _ronda_actual(torneo)
+        return {
+            'ronda': ronda,
+            'eliminatoria': ronda is not None and ronda.numero > torneo.n_rondas,
+            'salas': salas_con_participaciones(ronda) if ronda and ronda.emparejada else [],
+        }
+    return _servir_publica(request, torneo_id, 'cuadro', armar)
+
+
+@require_GET
+@pagina_cacheable
+@publica_condicional
+def publico_eliminatorias(request, torneo_id: int):
+    def armar(torneo):
+        # Cada fase se nombra por sus salas (también en torneos con un break anterior al plan)
+        rondas = torneo.rondas.filter(numero__gt=torneo.n_rondas, emparejada=True).order_by('numero')
+        fases = []
+        for ronda in rondas:
+            salas = salas_con_participaciones(ronda)
+            fases.append((nombre_fase(len(salas) * EQUIPOS_POR_SALA), ronda, salas))
+        return {'fases': fases}
+    return _servir_publica(request, torneo_id, 'eliminatorias', armar)
+
+
+# =========================
+# Eventos en vivo (SSE, requiere ASGI)
+# =========================
+@login_required
+@require_GET
+async def torneo_eventos(request, torneo_id: int):
+    if not await Torneo.objects.filter(id=torneo_id).aexists():
+        raise Http404('Torneo inexistente.')
+    if not isinstance(request, ASGIRequest):
+        # Con WSGI el stream ocuparía un hilo para siempre; 204 hace que el
+        # EventSource no reintente
+        return HttpResponse(status=204)
+    response = StreamingHttpResponse(flujo_sse(torneo_id), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # que nginx no acumule el stream
+    return response
+
+
+# =========================
+# Exportación (CSV / NDJSON en streaming)
+# =========================
+@login_required
+@require_GET
+def torneo_exportar(request, torneo_id: int, recurso: str, formato: str):
+    if recurso not in RECURSOS or formato not in FORMATOS:
+        raise Http404('Exportación no disponible.')
+    torneo = get_object_or_404(Torneo, id=torneo_id)
+    # Bajo ASGI el iterador tiene que ser asíncrono o Django lo junta todo en memoria
+    lineas = aexportar if isinstance(request, ASGIRequest) else exportar
+    response = StreamingHttpResponse(lineas(torneo, recurso, formato), content_type=FORMATOS[formato])
+    response['Content-Disposition'] = (
+        f'attachment; filename="torneo-{torneo.id}-{recurso}.{formato}"'
+    )
+    return response
+